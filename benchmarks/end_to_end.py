@@ -0,0 +1,200 @@
+"""
+End-to-end benchmark of the crawler and the research runner against a local mock LLM server.
+
+A synthetic corpus is generated, mock servers answer LLM requests behind ``LLM_BACKENDS`` and the first of
+them serves the corpus PDFs, and each scenario runs in a fresh process with an empty working directory, so
+caches are cold and memory is measured per scenario:
+
+- downloader: ``documents_downloader.process_pdfs`` seeded with the first papers of the corpus, crawling the
+  references of relevant papers over HTTP;
+- processor: ``document_processor.main`` over the whole corpus.
+
+Papers per minute, LLM calls per paper and peak RSS are compared with ``baseline.json``, and a run that is
+worse than the baseline by more than the tolerance exits with status 1. Run from the repository root:
+
+    python benchmarks/end_to_end.py [--papers 40] [--backends 2] [--update-baseline]
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any
+
+from mock_llm_server import DEFAULT_PROFILE, MockServer
+from synthetic_corpus import DEFAULT_SPEC, CorpusSpec, generate_corpus
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+SRC_DIR = BENCHMARK_DIR.parent / "src"
+BASELINE_FILE = BENCHMARK_DIR / "baseline.json"
+SCENARIOS = ("downloader", "processor")
+SEED_PAPERS = 3  # Papers put into "to research" for the crawl
+TOLERANCE = 0.15  # Relative change reported as a regression
+HIGHER_IS_BETTER = {"papers_per_minute": True, "llm_calls_per_paper": False, "peak_rss_mb": False}
+SCENARIO_TIMEOUT = 1800  # Seconds
+
+logger = logging.getLogger(__name__)
+
+
+def prepare(scenario: str, workdir: Path, corpus: list[Path]) -> None:
+    """Put the input PDFs of a scenario into its working directory."""
+    inputs = workdir / ("to research" if scenario == "downloader" else "research")
+    inputs.mkdir(parents=True)
+    for pdf_path in corpus[:SEED_PAPERS] if scenario == "downloader" else corpus:
+        shutil.copy(pdf_path, inputs / pdf_path.name)
+
+
+def run_scenario(scenario: str, workdir: Path, servers: list[MockServer], options: list[str]) -> dict[str, Any]:
+    """
+    Run a scenario in a fresh process and measure it.
+
+    Args:
+        scenario: Name of the scenario.
+        workdir: Prepared working directory.
+        servers: Running mock servers; the first one also serves the PDFs and embeddings.
+        options: Extra command line options of ``run_scenario.py``.
+
+    Returns:
+        Papers per minute, LLM calls per paper, peak RSS in MB and the bottleneck stage.
+
+    """
+    for server in servers:
+        server.reset_stats()
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join([str(SRC_DIR), str(BENCHMARK_DIR)]),
+        "LLM_BACKENDS": ",".join(f"{server.url}/v1/chat/completions" for server in servers),
+    }
+    with (workdir / "scenario.log").open("w", encoding="utf-8") as log:
+        completed = subprocess.run(  # noqa: S603
+            [sys.executable, str(BENCHMARK_DIR / "run_scenario.py"), scenario, "--server", servers[0].url, *options],
+            cwd=workdir, env=env, stdout=subprocess.PIPE, stderr=log, text=True, check=True, timeout=SCENARIO_TIMEOUT,
+        )
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    papers = max(result["papers"], 1)
+    return {
+        "papers": result["papers"],
+        "papers_per_minute": round(result["papers"] / result["seconds"] * 60, 2),
+        "llm_calls_per_paper": round(sum(server.stats["chat_requests"] for server in servers) / papers, 2),
+        "peak_rss_mb": round(result["peak_rss_mb"], 1),
+        "bottleneck": result["bottleneck"],
+    }
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[str]:
+    """
+    Compare results with a baseline.
+
+    Args:
+        results: Results by scenario.
+        baseline: Baseline results by scenario.
+        tolerance: Relative change counted as a regression.
+
+    Returns:
+        A description of every regression.
+
+    """
+    regressions = []
+    for scenario, result in results.items():
+        reference = baseline.get(scenario)
+        if not reference:
+            continue
+        for metric, higher_is_better in HIGHER_IS_BETTER.items():
+            change = (result[metric] - reference[metric]) / max(abs(reference[metric]), 1e-9)
+            if (-change if higher_is_better else change) > tolerance:
+                regressions.append(f"{scenario} {metric}: {reference[metric]} -> {result[metric]} ({change:+.0%})")
+    return regressions
+
+
+def _cell(result: dict[str, Any], reference: dict[str, Any], metric: str) -> str:
+    """Format a result with its baseline value in parentheses."""
+    return f"{result[metric]} ({reference[metric]})" if metric in reference else str(result[metric])
+
+
+def report(results: dict[str, Any], baseline: dict[str, Any]) -> None:
+    """Log the results next to the baseline."""
+    row = "%-11s %8s %18s %18s %18s  %s"
+    logger.info(row, "scenario", "papers", "papers/min", "LLM calls/paper", "peak RSS MB", "bound by")
+    for scenario, result in results.items():
+        reference = baseline.get(scenario, {})
+        logger.info(
+            row, scenario, result["papers"], *(_cell(result, reference, metric) for metric in HIGHER_IS_BETTER),
+            result["bottleneck"],
+        )
+    if baseline:
+        logger.info("Baseline values in parentheses")
+
+
+def main() -> None:
+    """Parse the command line, run the scenarios and compare them with the baseline."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--papers", type=int, default=DEFAULT_SPEC.papers, help="Papers in the corpus")
+    parser.add_argument("--pages", type=int, default=DEFAULT_SPEC.pages, help="Pages per paper")
+    parser.add_argument("--words-per-page", type=int, default=DEFAULT_SPEC.words_per_page, help="Text density")
+    parser.add_argument("--references", type=int, default=DEFAULT_SPEC.references, help="arXiv citations per paper")
+    parser.add_argument("--latency", type=float, default=DEFAULT_PROFILE.latency, help="LLM seconds per request")
+    parser.add_argument(
+        "--tokens-per-second", type=float, default=DEFAULT_PROFILE.tokens_per_second, help="LLM decode speed",
+    )
+    parser.add_argument("--slots", type=int, default=DEFAULT_PROFILE.slots, help="LLM requests in parallel")
+    parser.add_argument("--backends", type=int, default=1, help="Mock LLM servers to balance over")
+    parser.add_argument("--bandwidth", type=float, default=DEFAULT_PROFILE.bandwidth, help="PDF bytes per second")
+    parser.add_argument("--extract-workers", type=int, default=2, help="Text extraction processes of the processor")
+    parser.add_argument("--scenario", choices=SCENARIOS, nargs="+", default=list(SCENARIOS), help="Scenarios to run")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE, help="Baseline file")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="Relative change counted as a regression")
+    parser.add_argument("--update-baseline", action="store_true", help="Store the results as the new baseline")
+    args = parser.parse_args()
+
+    spec = CorpusSpec(args.papers, args.pages, args.words_per_page, args.references)
+    profile = DEFAULT_PROFILE._replace(
+        latency=args.latency, tokens_per_second=args.tokens_per_second, slots=args.slots, bandwidth=args.bandwidth,
+    )
+    config = {
+        "corpus": spec._asdict(), "server": profile._asdict(), "backends": args.backends,
+        "extract_workers": args.extract_workers,
+    }
+    stored = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline.exists() else {}
+    baseline = stored.get("results", {}) if stored.get("config") == config else {}
+    if stored and not baseline:
+        logger.warning("Baseline %s was measured with a different configuration, not comparing", args.baseline)
+
+    options = {
+        "downloader": ["--max-papers", str(args.papers)],
+        "processor": ["--extract-workers", str(args.extract_workers)],
+    }
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="benchmark-") as root:
+        corpus = generate_corpus(Path(root) / "corpus", spec)
+        logger.info("Corpus: %d papers of %d pages", len(corpus), spec.pages)
+        with contextlib.ExitStack() as stack:
+            servers = [
+                stack.enter_context(MockServer(Path(root) / "corpus", profile)) for _ in range(args.backends)
+            ]
+            for scenario in args.scenario:
+                workdir = Path(root) / scenario
+                prepare(scenario, workdir, corpus)
+                logger.info("Running %s", scenario)
+                results[scenario] = run_scenario(scenario, workdir, servers, options[scenario])
+
+    report(results, baseline)
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps({"config": config, "results": results}, indent=2) + "\n", encoding="utf-8")
+        logger.info("Stored the results as the baseline in %s", args.baseline)
+        return
+    regressions = compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        logger.warning("Regression: %s", regression)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark of link extraction over a PDF corpus.
+
+Compares the previous extractor (whole document joined into one line, case-insensitive ``findall`` per
+pattern) with the page-streaming ``extract_links``. Documents are parsed before timing, so only extraction is
+measured. Run from the repository root:
+
+    PYTHONPATH=src python benchmarks/link_extraction.py research --repeat 5
+"""
+
+import argparse
+import logging
+import re
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from utils.link_extractor import extract_links
+from utils.parsed_document import ParsedDocument
+from utils.utils import normalize_arxiv_id
+
+logger = logging.getLogger(__name__)
+
+
+def legacy_extract_links(pages: list[str]) -> dict[str, list[str]]:
+    """Extract links the way ``PDFUtils.extract_links_from_pdf`` did before ``extract_links``."""
+    text = "".join(page.replace("\n", " ") for page in pages)
+    patterns = {
+        "arxiv": re.compile(r"arxiv:\s*(\d{4}\.\d{4,}(?:v\d+)?)\b", re.IGNORECASE),
+        "doi": re.compile(r"\b(10\.\d{4,}/[\S]+)\b", re.IGNORECASE),
+        "url": re.compile(r"https?://\S+"),
+        "pubmed": re.compile(r"pmid:\s?(\d+)"),
+        "isbn": re.compile(r"\bISBN(?:-1[0-9]{3}(?:-[0-9]{3}){2}-[0-9X])?\b", re.IGNORECASE),
+    }
+    results = {}
+    for key, pattern in patterns.items():
+        matches = [match.lower().strip() for match in pattern.findall(text)]
+        if matches:
+            results[key] = list(set(matches))
+    if "arxiv" in results:
+        results["arxiv"] = [normalize_arxiv_id(arxiv_id) for arxiv_id in results["arxiv"]]
+    return results
+
+
+def time_extractor(
+        extractor: Callable[[ParsedDocument], dict[str, list[str]]],
+        documents: list[ParsedDocument],
+        repeat: int,
+) -> tuple[float, dict[str, int]]:
+    """Return the best total time over ``repeat`` runs and the number of links found by type."""
+    best = float("inf")
+    counts: dict[str, int] = {}
+    for _ in range(repeat):
+        started = time.perf_counter()
+        results = [extractor(document) for document in documents]
+        best = min(best, time.perf_counter() - started)
+    for links in results:
+        for link_type, values in links.items():
+            counts[link_type] = counts.get(link_type, 0) + len(values)
+    return best, counts
+
+
+def main() -> None:
+    """Parse the command line, load the corpus and report both extractors."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("corpus", type=Path, nargs="?", default=Path("research"), help="Directory of PDF files")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per extractor; the best one is reported")
+    parser.add_argument("--limit", type=int, default=None, help="Maximum number of PDFs")
+    args = parser.parse_args()
+
+    pdf_files = sorted(args.corpus.glob("*.pdf"))[:args.limit]
+    documents = [ParsedDocument.load(pdf_path) for pdf_path in pdf_files]
+    pages = sum(document.page_count for document in documents)
+    logger.info("Corpus: %d PDFs, %d pages", len(documents), pages)
+
+    extractors = {
+        "legacy": lambda document: legacy_extract_links(list(document.pages())),
+        "streaming": lambda document: extract_links(document.pages(), document.uris),
+    }
+    timings = {}
+    for name, extractor in extractors.items():
+        seconds, counts = time_extractor(extractor, documents, args.repeat)
+        timings[name] = seconds
+        logger.info(
+            "%-12s %8.1f ms total  %6.3f ms/page  links: %s",
+            name, seconds * 1000, seconds * 1000 / max(pages, 1),
+            ", ".join(f"{link_type}={count}" for link_type, count in sorted(counts.items())),
+        )
+    logger.info("Speedup: %.2fx", timings["legacy"] / max(timings["streaming"], 1e-9))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    main()
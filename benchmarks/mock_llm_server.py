@@ -0,0 +1,285 @@
+"""
+Local mock of an OpenAI-compatible LLM server, with a PDF mirror for the downloader.
+
+Chat completions answer the prompt kinds of ``PromptService``: the combined relevance and summary prompt gets
+a JSON object, yes/no prompts get "Yes" or "No" followed by an explanation, as a chatty model would give, and
+every other prompt a filler text of a fixed number of tokens, all cut at the ``max_tokens`` of the request.
+Relevance is a stable function of the prompt text, so a crawl takes the same path on every run. A request
+waits for one of ``slots`` generation slots, like a GPU serving a fixed batch size, and then for ``latency``
+plus the prompt and completion tokens at the configured prefill and decode speeds. Streamed requests get one
+server-sent event per word, and generation stops when the client closes the connection, so only the tokens
+actually sent are counted. Embeddings are hashed bags of words. ``GET /pdf/<id>.pdf`` serves the corpus
+directory at a bandwidth limit, and ``GET /v1/models`` answers health checks. Run standalone from the
+repository root:
+
+    python benchmarks/mock_llm_server.py corpus --port 1234 --latency 0.2 --tokens-per-second 50
+"""
+
+import argparse
+import contextlib
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from collections.abc import Callable
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+if TYPE_CHECKING:
+    from typing_extensions import Self
+
+CHARS_PER_TOKEN = 4  # Same estimate as utils.chunking
+EMBEDDING_DIM = 64
+PDF_CHUNK_SIZE = 1 << 16
+MODEL_ID = "mock-model"
+FILLER = "Synthetic analysis of the methods and results reported in the article. "
+PDF_PATH = re.compile(r"^/pdf/(?P<arxiv_id>[\w.]+)\.pdf$")
+
+logger = logging.getLogger(__name__)
+
+
+class ServerProfile(NamedTuple):
+    """Speed of the simulated model and network."""
+
+    latency: float = 0.05  # Seconds per request before generation
+    prefill_tokens_per_second: float = 4000.0
+    tokens_per_second: float = 400.0  # Decode speed per request
+    slots: int = 4  # Requests generated in parallel
+    completion_tokens: int = 64  # Length of free-text answers
+    relevant_ratio: float = 0.7  # Share of papers judged relevant
+    bandwidth: float = 20e6  # PDF bytes per second per download
+
+
+DEFAULT_PROFILE = ServerProfile()
+
+
+def _event(data: dict[str, Any]) -> bytes:
+    """Encode a server-sent event."""
+    return f"data: {json.dumps(data)}\n\n".encode()
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of a text from its length."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+class MockServer:
+    """Threaded mock server; use it as a context manager and read ``stats`` for the requests it answered."""
+
+    def __init__(self, corpus_dir: Path | None = None, profile: ServerProfile = DEFAULT_PROFILE, port: int = 0) -> None:
+        """
+        Initialize the server.
+
+        Args:
+            corpus_dir: Directory of the PDFs served under ``/pdf/``; None serves nothing.
+            profile: Speed of the simulated model and network.
+            port: Port to listen on; 0 picks a free one.
+
+        """
+        self.corpus_dir = corpus_dir
+        self.profile = profile
+        self.slots = threading.BoundedSemaphore(profile.slots)
+        self._lock = threading.Lock()
+        self.stats: dict[str, int] = {}
+        self.reset_stats()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self._server.daemon_threads = True
+        self._server.mock = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        """Base URL of the server."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "Self":
+        """Start serving in a background thread."""
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        """Stop the server."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset_stats(self) -> None:
+        """Zero the request counters."""
+        with self._lock:
+            self.stats = dict.fromkeys(
+                ("chat_requests", "prompt_tokens", "completion_tokens", "embedding_requests", "pdf_requests"), 0,
+            )
+
+    def count(self, **amounts: int) -> None:
+        """Add to the request counters."""
+        with self._lock:
+            for name, amount in amounts.items():
+                self.stats[name] += amount
+
+    def is_relevant(self, text: str) -> bool:
+        """Judge relevance as a stable function of the text."""
+        digest = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "big")
+        return digest / 2 ** 64 < self.profile.relevant_ratio
+
+    def answer(self, prompt: str) -> str:
+        """Build the answer of a chat prompt."""
+        filler = (FILLER * (self.profile.completion_tokens * CHARS_PER_TOKEN // len(FILLER) + 1))[
+            :self.profile.completion_tokens * CHARS_PER_TOKEN
+        ]
+        summary = f"**Title:** {prompt.strip()[:40]!r}\n{filler}"
+        if prompt.rstrip().endswith("JSON:"):
+            relevant = self.is_relevant(prompt)
+            return json.dumps({"relevant": relevant, "summary": summary if relevant else ""})
+        if "'Yes' or 'No'" in prompt:
+            return f"{'Yes' if self.is_relevant(prompt) else 'No'}. {filler}"
+        return summary
+
+    def _content(self, body: dict[str, Any]) -> tuple[str, str]:
+        """Return the prompt of a request and its answer, cut at the requested token limit."""
+        prompt = body["messages"][-1]["content"]
+        return prompt, self.answer(prompt)[:body.get("max_tokens", 1 << 20) * CHARS_PER_TOKEN]
+
+    def complete(self, body: dict[str, Any]) -> dict[str, Any]:
+        """Answer a chat completion request after the simulated generation time."""
+        prompt, content = self._content(body)
+        prompt_tokens = estimate_tokens(prompt)
+        completion_tokens = estimate_tokens(content)
+        with self.slots:
+            time.sleep(
+                self.profile.latency
+                + prompt_tokens / self.profile.prefill_tokens_per_second
+                + completion_tokens / self.profile.tokens_per_second,
+            )
+        self.count(chat_requests=1, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+        return {
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens},
+        }
+
+    def stream(self, body: dict[str, Any], write: Callable[[bytes], object]) -> None:
+        """Stream a chat completion as server-sent events until it is complete or the client goes away."""
+        prompt, content = self._content(body)
+        prompt_tokens = estimate_tokens(prompt)
+        generated = 0
+        with self.slots:
+            time.sleep(self.profile.latency + prompt_tokens / self.profile.prefill_tokens_per_second)
+            try:
+                for word in re.findall(r"\S+\s*", content):
+                    time.sleep(estimate_tokens(word) / self.profile.tokens_per_second)
+                    write(_event({"choices": [{"index": 0, "delta": {"content": word}}]}))
+                    generated += estimate_tokens(word)
+                usage = {"prompt_tokens": prompt_tokens, "completion_tokens": generated}
+                write(_event({"choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "usage": usage}))
+                write(b"data: [DONE]\n\n")
+            except OSError:
+                pass  # The client stopped reading, which cancels the generation
+        self.count(chat_requests=1, prompt_tokens=prompt_tokens, completion_tokens=generated)
+
+    def embed(self, body: dict[str, Any]) -> dict[str, Any]:
+        """Answer an embeddings request with hashed bag-of-words vectors."""
+        vectors = []
+        for text in body["input"]:
+            vector = [0.0] * EMBEDDING_DIM
+            for word in text.lower().split():
+                vector[int.from_bytes(hashlib.md5(word.encode()).digest()[:4], "big") % EMBEDDING_DIM] += 1  # noqa: S324
+            vectors.append(vector)
+        with self.slots:
+            time.sleep(self.profile.latency)
+        self.count(embedding_requests=1)
+        return {"data": [{"index": index, "embedding": vector} for index, vector in enumerate(vectors)]}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Request handler of ``MockServer``, which it finds as ``server.mock``."""
+
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def mock(self) -> MockServer:
+        """The mock server answering the request."""
+        return self.server.mock
+
+    def log_message(self, *_: object) -> None:
+        """Keep the benchmark output clean."""
+
+    def send_body(self, body: bytes, content_type: str, status: HTTPStatus = HTTPStatus.OK) -> None:
+        """Send a complete response."""
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_stream(self, body: dict[str, Any]) -> None:
+        """Stream a chat completion on a connection that is closed afterwards."""
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        self.mock.stream(body, self.wfile.write)
+
+    def do_POST(self) -> None:
+        """Answer chat completion and embeddings requests."""
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        if self.path.endswith("/chat/completions") and body.get("stream"):
+            self.send_stream(body)
+            return
+        if self.path.endswith("/chat/completions"):
+            response = self.mock.complete(body)
+        elif self.path.endswith("/embeddings"):
+            response = self.mock.embed(body)
+        else:
+            self.send_body(b"{}", "application/json", HTTPStatus.NOT_FOUND)
+            return
+        self.send_body(json.dumps(response).encode(), "application/json")
+
+    def do_GET(self) -> None:
+        """Answer health checks and serve a corpus PDF at the bandwidth limit."""
+        if self.path.endswith("/models"):
+            self.send_body(json.dumps({"data": [{"id": MODEL_ID}]}).encode(), "application/json")
+            return
+        match = PDF_PATH.match(self.path)
+        path = self.mock.corpus_dir / f"{match['arxiv_id']}.pdf" if match and self.mock.corpus_dir else None
+        if path is None or not path.is_file():
+            self.send_body(b"not found", "text/plain", HTTPStatus.NOT_FOUND)
+            return
+        self.mock.count(pdf_requests=1)
+        data = path.read_bytes()
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        for start in range(0, len(data), PDF_CHUNK_SIZE):
+            chunk = data[start:start + PDF_CHUNK_SIZE]
+            time.sleep(len(chunk) / self.mock.profile.bandwidth)
+            self.wfile.write(chunk)
+
+
+def main() -> None:
+    """Parse the command line and serve until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("corpus", type=Path, nargs="?", default=None, help="Directory of PDFs served under /pdf/")
+    parser.add_argument("--port", type=int, default=1234, help="Port to listen on")
+    parser.add_argument("--latency", type=float, default=DEFAULT_PROFILE.latency, help="Seconds per request")
+    parser.add_argument(
+        "--tokens-per-second", type=float, default=DEFAULT_PROFILE.tokens_per_second, help="Decode speed",
+    )
+    parser.add_argument("--slots", type=int, default=DEFAULT_PROFILE.slots, help="Requests generated in parallel")
+    args = parser.parse_args()
+
+    profile = DEFAULT_PROFILE._replace(latency=args.latency, tokens_per_second=args.tokens_per_second, slots=args.slots)
+    with MockServer(args.corpus, profile, args.port) as server:
+        logger.info("Serving on %s", server.url)
+        with contextlib.suppress(KeyboardInterrupt):
+            threading.Event().wait()
+        logger.info("Answered %s", server.stats)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    main()
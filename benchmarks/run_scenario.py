@@ -0,0 +1,93 @@
+"""
+One end-to-end benchmark scenario, run by ``end_to_end.py`` in a fresh process inside its working directory.
+
+The runners keep their files relative to the working directory, so the process is started there and imports
+them only then. The LLM and PDF URLs point at the mock server and the per-host download interval is off, so
+the network speed is the bandwidth the server simulates. The result is written to stdout as one JSON object.
+"""
+
+import argparse
+import json
+import resource
+import sys
+import time
+from functools import partial
+from pathlib import Path
+
+import document_processor
+import documents_downloader
+from DAO.document_links import DocumentLinks
+from DAO.research_state import ResearchState
+from prompt import llm_service
+from prompt.llm_service import LLMService
+from utils.download_manager import DownloadManager
+from utils.metrics import metrics
+
+QUESTION = "Which mathematical methods do the articles use, and how do they compare?"
+
+
+def run_downloader(server_url: str, max_papers: int) -> int:
+    """Crawl from the seed papers in ``to research``; returns the number of papers handled."""
+    documents_downloader.DownloadManager = partial(
+        DownloadManager, url_template=f"{server_url}/pdf/{{arxiv_id}}.pdf", host_interval=0.0,
+    )
+    Path("research").mkdir(exist_ok=True)
+    state = ResearchState()
+    links = DocumentLinks()
+    llm_cache = LLMService.configure_cache()
+    metrics.reset()
+    documents_downloader.process_pdfs(
+        state, links, documents_downloader.CrawlMode.FIFO, documents_downloader.CrawlBudget(max_papers=max_papers),
+    )
+    state.save()
+    links.export_json()
+    llm_cache.log_stats()
+    metrics.log_summary()
+    metrics.export()
+    return len(list(Path("to research").glob("*.pdf"))) + len(state.data["processed"])
+
+
+def run_processor(extract_workers: int, llm_concurrency: int | None) -> int:
+    """Answer the research question over ``research``; returns the number of articles."""
+    document_processor.main(QUESTION, extract_workers, llm_concurrency)
+    return len(list(Path("research").glob("*.pdf")))
+
+
+def peak_rss_mb() -> float:
+    """Return the peak resident set size of this process or of its largest worker, in MB."""
+    peak_kb = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    return peak_kb / 1024
+
+
+def main() -> None:
+    """Parse the command line, run the scenario and write its result."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("scenario", choices=("downloader", "processor"), help="Runner to benchmark")
+    parser.add_argument("--server", required=True, help="Base URL of the mock server")
+    parser.add_argument("--max-papers", type=int, default=None, help="Crawl budget of the downloader")
+    parser.add_argument("--extract-workers", type=int, default=document_processor.EXTRACT_WORKERS)
+    parser.add_argument("--llm-concurrency", type=int, default=None, help="Adaptive by default")
+    args = parser.parse_args()
+
+    llm_service.LLM_URL = f"{args.server}/v1/chat/completions"
+    llm_service.EMBEDDING_URL = f"{args.server}/v1/embeddings"
+    started = time.perf_counter()
+    if args.scenario == "downloader":
+        papers = run_downloader(args.server, args.max_papers)
+    else:
+        papers = run_processor(args.extract_workers, args.llm_concurrency)
+    seconds = time.perf_counter() - started
+
+    bottleneck = metrics.bottleneck(metrics.stage_loads())
+    sys.stdout.write(json.dumps({
+        "papers": papers,
+        "seconds": seconds,
+        "peak_rss_mb": peak_rss_mb(),
+        "bottleneck": bottleneck[0] if bottleneck else None,
+    }) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Synthetic PDF corpus for benchmarks.
+
+Every paper gets an arXiv-style ID, an abstract on its first page, body pages of random words at a given
+density, and a reference list of ``arXiv:`` citations on its last page. Most references point to other papers
+of the corpus, so a crawl seeded with a few papers can discover the rest; the others point to IDs outside the
+corpus, which a download attempt reports as missing. The corpus is reproducible from its seed. Run from the
+repository root:
+
+    python benchmarks/synthetic_corpus.py corpus --papers 40 --pages 12 --words-per-page 400
+"""
+
+import argparse
+import logging
+import random
+from pathlib import Path
+from typing import NamedTuple
+
+import fitz
+
+ID_PREFIX = "2501"  # arXiv month of the corpus papers
+EXTERNAL_PREFIX = "2502"  # arXiv month of references outside the corpus
+WORDS = (
+    "model", "attention", "sensor", "fusion", "lidar", "camera", "radar", "trajectory", "prediction", "planning",
+    "control", "policy", "reward", "graph", "network", "embedding", "transformer", "convolution", "latent",
+    "diffusion", "gaussian", "kernel", "estimator", "variance", "bayesian", "posterior", "prior", "likelihood",
+    "gradient", "descent", "optimization", "convex", "manifold", "tensor", "matrix", "eigenvalue", "spectrum",
+    "entropy", "information", "theorem", "lemma", "proof", "bound", "regret", "dataset", "benchmark", "ablation",
+)
+WORDS_PER_LINE = 12
+PAGE_MARGIN = 54  # Points
+MAX_FONT_SIZE = 10.0
+
+logger = logging.getLogger(__name__)
+
+
+class CorpusSpec(NamedTuple):
+    """Shape of a synthetic corpus."""
+
+    papers: int = 40
+    pages: int = 12
+    words_per_page: int = 400
+    references: int = 6  # arXiv citations per paper
+    external_ratio: float = 0.25  # Share of citations pointing outside the corpus
+    seed: int = 0
+
+
+DEFAULT_SPEC = CorpusSpec()
+
+
+def paper_id(index: int) -> str:
+    """Return the arXiv ID of the corpus paper with the given index."""
+    return f"{ID_PREFIX}.{index:05d}"
+
+
+def _write_page(page: fitz.Page, lines: list[str]) -> None:
+    """Write lines from the top of a page, shrinking the font so they fit."""
+    height = page.rect.height - 2 * PAGE_MARGIN
+    font_size = min(MAX_FONT_SIZE, height / max(len(lines), 1) / 1.2)
+    page.insert_text((PAGE_MARGIN, PAGE_MARGIN), "\n".join(lines), fontsize=font_size)
+
+
+def _text_lines(rng: random.Random, words: int) -> list[str]:
+    """Generate lines of random words."""
+    picked = rng.choices(WORDS, k=words)
+    return [" ".join(picked[start:start + WORDS_PER_LINE]) for start in range(0, words, WORDS_PER_LINE)]
+
+
+def _references(rng: random.Random, index: int, spec: CorpusSpec) -> list[str]:
+    """Pick the arXiv IDs a paper cites."""
+    others = [other for other in range(spec.papers) if other != index]
+    references = []
+    for _ in range(spec.references):
+        if others and rng.random() >= spec.external_ratio:
+            references.append(paper_id(rng.choice(others)))
+        else:
+            references.append(f"{EXTERNAL_PREFIX}.{rng.randrange(100000):05d}")
+    return list(dict.fromkeys(references))
+
+
+def write_paper(path: Path, index: int, spec: CorpusSpec) -> list[str]:
+    """
+    Write one synthetic paper.
+
+    Args:
+        path: Output PDF file.
+        index: Index of the paper in the corpus.
+        spec: Shape of the corpus.
+
+    Returns:
+        The arXiv IDs the paper cites.
+
+    """
+    rng = random.Random(f"{spec.seed}:{index}")  # noqa: S311
+    references = _references(rng, index, spec)
+    with fitz.open() as doc:
+        for number in range(spec.pages):
+            lines = _text_lines(rng, spec.words_per_page)
+            if number == 0:
+                lines = [f"Synthetic Paper {paper_id(index)}", "Abstract", *lines[:4], "1. Introduction", *lines[4:]]
+            if number == spec.pages - 1:
+                citations = [f"[{n}] Cited work, arXiv:{reference}" for n, reference in enumerate(references, 1)]
+                lines = [*lines, "References", *citations]
+            _write_page(doc.new_page(), lines)
+        doc.save(path)
+    return references
+
+
+def generate_corpus(directory: Path, spec: CorpusSpec = DEFAULT_SPEC) -> list[Path]:
+    """
+    Write a synthetic corpus.
+
+    Args:
+        directory: Output directory.
+        spec: Shape of the corpus.
+
+    Returns:
+        The PDF files in index order.
+
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for index in range(spec.papers):
+        path = directory / f"{paper_id(index)}.pdf"
+        write_paper(path, index, spec)
+        paths.append(path)
+    return paths
+
+
+def main() -> None:
+    """Parse the command line and write the corpus."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("directory", type=Path, help="Output directory")
+    parser.add_argument("--papers", type=int, default=DEFAULT_SPEC.papers, help="Number of papers")
+    parser.add_argument("--pages", type=int, default=DEFAULT_SPEC.pages, help="Pages per paper")
+    parser.add_argument("--words-per-page", type=int, default=DEFAULT_SPEC.words_per_page, help="Text density")
+    parser.add_argument("--references", type=int, default=DEFAULT_SPEC.references, help="arXiv citations per paper")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SPEC.seed, help="Random seed")
+    args = parser.parse_args()
+
+    spec = CorpusSpec(args.papers, args.pages, args.words_per_page, args.references, seed=args.seed)
+    paths = generate_corpus(args.directory, spec)
+    logger.info("Wrote %d papers to %s", len(paths), args.directory)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    main()
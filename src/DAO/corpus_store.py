@@ -0,0 +1,223 @@
+"""
+Provides the CorpusStore class, a SQLite full-text store of the page texts of the PDF corpus.
+
+Every page is stored once under its document ID and page number, with an FTS5 index over the text for keyword
+search. Documents carry the SHA-256, modification time and size of their file, so a changed file is detected
+without re-parsing an unchanged one. The store is the page cache of ``ParsedDocument``: summaries, chunks and
+link extraction read from it instead of PyMuPDF.
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, ClassVar, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+CORPUS_DB_FILE = Path("corpus.sqlite")
+PARSE_VERSION = 2  # Bump when the stored extraction changes, so documents are parsed again
+BUSY_TIMEOUT = 30.0  # Seconds to wait for another process holding the write lock
+WORD_PATTERN = re.compile(r"\w+")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    doc_id TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    page_count INTEGER NOT NULL,
+    uris TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    indexed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY,
+    doc_id TEXT NOT NULL,
+    page INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    UNIQUE (doc_id, page)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(
+    text, content='pages', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS pages_insert AFTER INSERT ON pages BEGIN
+    INSERT INTO pages_fts (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS pages_delete AFTER DELETE ON pages BEGIN
+    INSERT INTO pages_fts (pages_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+
+class DocumentRecord(NamedTuple):
+    """Stored metadata of a document."""
+
+    doc_id: str
+    path: str
+    content_hash: str
+    mtime_ns: int
+    size: int
+    page_count: int
+    uris: list[str]
+
+
+class SearchHit(NamedTuple):
+    """A page matching a search query."""
+
+    doc_id: str
+    page: int
+    snippet: str
+    score: float
+
+
+class CorpusStore:
+    """SQLite store of page texts with an FTS5 keyword index."""
+
+    _shared: ClassVar["CorpusStore | None"] = None
+    _shared_pid: ClassVar[int] = 0
+
+    def __init__(self, path: Path = CORPUS_DB_FILE) -> None:
+        """
+        Open the store, creating its tables if needed.
+
+        Args:
+            path: SQLite database file.
+
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    @classmethod
+    def shared(cls) -> "CorpusStore":
+        """Return the store of this process at the default location, reopening it after a fork."""
+        if cls._shared is None or cls._shared_pid != os.getpid():
+            cls._shared = cls()
+            cls._shared_pid = os.getpid()
+        return cls._shared
+
+    def document(self, doc_id: str) -> DocumentRecord | None:
+        """
+        Look up the metadata of a document parsed with the current ``PARSE_VERSION``.
+
+        Args:
+            doc_id: Document ID, usually the normalized arXiv ID.
+
+        Returns:
+            The stored record, or None if the document is missing or outdated.
+
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT doc_id, path, content_hash, mtime_ns, size, page_count, uris FROM documents "
+                "WHERE doc_id = ? AND version = ?",
+                (doc_id, PARSE_VERSION),
+            ).fetchone()
+        return DocumentRecord(*row[:6], json.loads(row[6])) if row else None
+
+    def documents(self) -> dict[str, DocumentRecord]:
+        """Return the records of all current documents by ID."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT doc_id, path, content_hash, mtime_ns, size, page_count, uris FROM documents WHERE version = ?",
+                (PARSE_VERSION,),
+            ).fetchall()
+        return {row[0]: DocumentRecord(*row[:6], json.loads(row[6])) for row in rows}
+
+    def pages(self, doc_id: str) -> list[str]:
+        """
+        Return the page texts of a document.
+
+        Args:
+            doc_id: Document ID.
+
+        Returns:
+            Raw text of every page, in order.
+
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT text FROM pages WHERE doc_id = ? ORDER BY page", (doc_id,)).fetchall()
+        return [row[0] for row in rows]
+
+    def put(self, record: DocumentRecord, pages: list[str]) -> None:
+        """
+        Store a document, replacing its previous pages.
+
+        Args:
+            record: Metadata of the document; ``page_count`` is taken from ``pages``.
+            pages: Raw text of every page.
+
+        """
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM pages WHERE doc_id = ?", (record.doc_id,))
+            self._conn.executemany(
+                "INSERT INTO pages (doc_id, page, text) VALUES (?, ?, ?)",
+                ((record.doc_id, number, text) for number, text in enumerate(pages)),
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    record.doc_id, record.path, record.content_hash, record.mtime_ns, record.size, len(pages),
+                    json.dumps(record.uris), PARSE_VERSION, time.time(),
+                ),
+            )
+
+    def touch(self, doc_id: str, path: str, mtime_ns: int, size: int) -> None:
+        """Update the file metadata of a document whose content did not change."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE documents SET path = ?, mtime_ns = ?, size = ? WHERE doc_id = ?",
+                (path, mtime_ns, size, doc_id),
+            )
+
+    def remove(self, doc_id: str) -> None:
+        """Delete a document and its pages."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM pages WHERE doc_id = ?", (doc_id,))
+            self._conn.execute("DELETE FROM documents WHERE doc_id = ?", (doc_id,))
+
+    def search(self, query: str, limit: int = 10) -> list[SearchHit]:
+        """
+        Find the pages best matching a keyword query.
+
+        Args:
+            query: FTS5 query; if it is not valid FTS5 syntax, its words are searched as plain terms.
+            limit: Maximum number of hits.
+
+        Returns:
+            Matching pages ordered by BM25 relevance, best first.
+
+        """
+        sql = (
+            "SELECT pages.doc_id, pages.page, snippet(pages_fts, 0, '[', ']', '...', 16), bm25(pages_fts) "
+            "FROM pages_fts JOIN pages ON pages.id = pages_fts.rowid "
+            "WHERE pages_fts MATCH ? ORDER BY bm25(pages_fts) LIMIT ?"
+        )
+        with self._lock:
+            try:
+                rows = self._conn.execute(sql, (query, limit)).fetchall()
+            except sqlite3.OperationalError:
+                terms = " ".join(f'"{word}"' for word in WORD_PATTERN.findall(query))
+                rows = self._conn.execute(sql, (terms, limit)).fetchall() if terms else []
+        return [SearchHit(*row) for row in rows]
+
+    def stats(self) -> dict[str, Any]:
+        """Return the number of documents and pages in the store."""
+        with self._lock:
+            documents = self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+            pages = self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+        return {"documents": documents, "pages": pages}
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
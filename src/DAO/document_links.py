@@ -1,40 +1,66 @@
 """Handle storage and retrieval of document links and summaries."""
 
-import json
 import logging
+from collections import Counter
 from pathlib import Path
 from typing import Any
 
+from DAO.journal_store import JournalStore
 from utils.utils import normalize_arxiv_id
 
 logger = logging.getLogger(__name__)
 
 
 class DocumentLinks:
-    """Manage storage and retrieval of document links and summaries in a JSON file."""
+    """Manage storage and retrieval of document links and summaries in a journaled JSON file."""
 
     def __init__(self) -> None:
         """Initialize instance with path to links file and load existing data."""
         self.links_file = Path("document_links.json")
-        self.links_data: dict[str, dict[str, Any]] = {}
+        self.store = JournalStore(self.links_file, dict)
         self.load()
 
-    def load(self) -> None:
-        """Load document links from JSON file into memory."""
-        if self.links_file.exists():
-            try:
-                with self.links_file.open() as f:
-                    self.links_data = json.load(f)
-            except Exception:
-                logger.exception("Error loading links")
+    @property
+    def links_data(self) -> dict[str, dict[str, Any]]:
+        """Document links and summaries keyed by normalized arXiv ID."""
+        return self.store.data
 
-    def save(self) -> None:
-        """Save current document links to JSON file."""
+    def load(self) -> None:
+        """Load document links from the JSON snapshot and its journal into memory."""
         try:
-            with self.links_file.open("w") as f:
-                json.dump(self.links_data, f, indent=2)
+            self.store.load()
         except Exception:
-            logger.exception("Error saving links")
+            logger.exception("Error loading links")
+
+    def save(self) -> None:
+        """Commit pending document updates to the journal."""
+        self.store.commit()
+
+    def export_json(self, path: Path | None = None) -> Path:
+        """
+        Write the current links in the JSON shape read by ``index.html``.
+
+        Args:
+            path: Target file; by default ``document_links.json`` itself is brought up to date.
+
+        Returns:
+            The written file.
+
+        """
+        return self.store.export_json(path)
+
+    def citation_counts(self) -> Counter[str]:
+        """
+        Count how many stored papers cite each arXiv ID.
+
+        Returns:
+            In-degree of every cited arXiv ID.
+
+        """
+        counts: Counter[str] = Counter()
+        for document in self.links_data.values():
+            counts.update(set(document.get("links", {}).get("arxiv", [])))
+        return counts
 
     def add_document(self, arxiv_id: str, links: dict[str, Any], summary: str) -> None:
         """
@@ -47,11 +73,10 @@ class DocumentLinks:
 
         """
         normalized_id = normalize_arxiv_id(arxiv_id)
-        self.links_data[normalized_id] = {
+        self.store.set(None, normalized_id, {
             "links": self._normalize_links(links),
             "summary": summary,
-        }
-        self.save()
+        })
 
     def _normalize_links(self, links: dict[str, Any]) -> dict[str, Any]:
         """
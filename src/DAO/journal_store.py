@@ -0,0 +1,231 @@
+"""
+Provides the JournalStore class, a JSON document persisted as a snapshot plus an append-only journal.
+
+Every update is recorded as one journal line, so its I/O cost does not depend on the size of the document.
+Updates are buffered and committed in batches, and the journal is periodically folded into the snapshot.
+The snapshot keeps the plain JSON shape, so other tools can read it after ``compact``.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from collections.abc import Callable
+from pathlib import Path
+from typing import IO, Any
+
+logger = logging.getLogger(__name__)
+
+COMMIT_EVERY = 50  # Buffered records before an automatic commit
+COMPACT_EVERY = 2000  # Journal records before the journal is folded into the snapshot
+
+
+class JournalStore:
+    """JSON document with journaled updates and periodic compaction."""
+
+    def __init__(
+            self,
+            snapshot_file: Path,
+            default: Callable[[], dict[str, Any]],
+            indent: int | None = 2,
+            *,
+            ensure_ascii: bool = True,
+            set_fields: tuple[str, ...] = (),
+    ) -> None:
+        """
+        Initialize the store without loading it.
+
+        Args:
+            snapshot_file: JSON snapshot; the journal lives next to it with a ``.journal`` suffix.
+            default: Factory of the empty document.
+            indent: Indentation of the snapshot JSON.
+            ensure_ascii: Escape non-ASCII characters in the snapshot.
+            set_fields: List fields kept in memory as insertion-ordered sets with O(1) add and discard.
+
+        """
+        self.snapshot_file = snapshot_file
+        self.journal_file = snapshot_file.with_name(f"{snapshot_file.name}.journal")
+        self.default = default
+        self.indent = indent
+        self.ensure_ascii = ensure_ascii
+        self.set_fields = set_fields
+        self.data: dict[str, Any] = self._with_sets(default())
+        self._buffer: list[str] = []
+        self._journal: IO[str] | None = None
+        self._journal_records = 0
+
+    def load(self) -> None:
+        """Load the snapshot and replay the journal records written on top of it."""
+        self.close()
+        self.data = self.default()
+        self._buffer = []
+        self._journal_records = 0
+
+        snapshot_hash = ""
+        if self.snapshot_file.exists():
+            raw = self.snapshot_file.read_bytes()
+            snapshot_hash = hashlib.sha256(raw).hexdigest()
+            self.data.update(json.loads(raw))
+        self.data = self._with_sets(self.data)
+
+        if not self.journal_file.exists():
+            return
+        with self.journal_file.open(encoding="utf-8") as f:
+            header = f.readline()
+            if not header or json.loads(header).get("base") != snapshot_hash:
+                logger.info("Journal %s is already part of the snapshot", self.journal_file)
+                self.compact()
+                return
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning("Ignoring torn journal record in %s", self.journal_file)
+                    self.compact()
+                    return
+                self._apply(record)
+                self._journal_records += 1
+
+    def _with_sets(self, data: dict[str, Any]) -> dict[str, Any]:
+        """Convert the set fields of a plain JSON document to ordered sets."""
+        for field in self.set_fields:
+            data[field] = dict.fromkeys(data.get(field, []))
+        return data
+
+    def to_json_data(self) -> dict[str, Any]:
+        """Return the document with set fields as plain lists."""
+        return {field: list(value) if field in self.set_fields else value for field, value in self.data.items()}
+
+    def _target(self, field: str | None) -> Any:  # noqa: ANN401
+        """Return the container addressed by a record."""
+        return self.data if field is None else self.data[field]
+
+    def _apply(self, record: list[Any]) -> None:
+        """Apply a journal record to the in-memory document."""
+        op, field, *args = record
+        if op == "set":
+            self._target(field)[args[0]] = args[1]
+        elif op == "del":
+            self._target(field).pop(args[0], None)
+        elif op == "put":
+            self.data[field] = dict.fromkeys(args[0]) if field in self.set_fields else args[0]
+        elif op == "append":
+            self._target(field).append(args[0])
+        elif op == "remove":
+            values = self._target(field)
+            if args[0] in values:
+                values.remove(args[0])
+        elif op == "add":
+            self.data[field][args[0]] = None
+        elif op == "discard":
+            self.data[field].pop(args[0], None)
+        else:
+            logger.error("Unknown journal operation %s", op)
+
+    def _record(self, *record: Any) -> None:  # noqa: ANN401
+        """Apply a record and buffer it for the next commit."""
+        self._apply(list(record))
+        self._buffer.append(json.dumps(record, ensure_ascii=False))
+        if len(self._buffer) >= COMMIT_EVERY:
+            self.commit()
+
+    def set(self, field: str | None, key: str, value: Any) -> None:  # noqa: ANN401
+        """Set ``data[field][key]``; a ``None`` field addresses the document itself."""
+        self._record("set", field, key, value)
+
+    def delete(self, field: str | None, key: str) -> None:
+        """Delete ``data[field][key]`` if present."""
+        self._record("del", field, key)
+
+    def put(self, field: str, value: Any) -> None:  # noqa: ANN401
+        """Replace ``data[field]``."""
+        self._record("put", field, value)
+
+    def append(self, field: str, value: Any) -> None:  # noqa: ANN401
+        """Append a value to the list ``data[field]``."""
+        self._record("append", field, value)
+
+    def remove(self, field: str, value: Any) -> None:  # noqa: ANN401
+        """Remove the first occurrence of a value from the list ``data[field]`` if present."""
+        self._record("remove", field, value)
+
+    def add(self, field: str, value: str) -> None:
+        """Add a value to the set field ``data[field]``."""
+        self._record("add", field, value)
+
+    def discard(self, field: str, value: str) -> None:
+        """Remove a value from the set field ``data[field]`` if present."""
+        self._record("discard", field, value)
+
+    def commit(self) -> None:
+        """Append the buffered records to the journal in one durable write."""
+        if not self._buffer:
+            return
+        try:
+            journal = self._open_journal()
+            journal.write("".join(f"{line}\n" for line in self._buffer))
+            journal.flush()
+            os.fsync(journal.fileno())
+            self._journal_records += len(self._buffer)
+            self._buffer = []
+        except Exception:
+            logger.exception("Error committing journal %s", self.journal_file)
+            return
+
+        if self._journal_records >= COMPACT_EVERY:
+            self.compact()
+
+    def _open_journal(self) -> IO[str]:
+        """Open the journal for appending, starting it with a header that names its snapshot."""
+        if self._journal is None:
+            if not self.journal_file.exists() or self.journal_file.stat().st_size == 0:
+                raw = self.snapshot_file.read_bytes() if self.snapshot_file.exists() else None
+                base = hashlib.sha256(raw).hexdigest() if raw is not None else ""
+                self.journal_file.write_text(json.dumps({"base": base}) + "\n", encoding="utf-8")
+            self._journal = self.journal_file.open("a", encoding="utf-8")
+        return self._journal
+
+    def compact(self) -> None:
+        """Write the whole document as a new snapshot and start an empty journal."""
+        self._buffer = []
+        try:
+            raw = json.dumps(self.to_json_data(), indent=self.indent, ensure_ascii=self.ensure_ascii).encode()
+            tmp_file = self.snapshot_file.with_name(f"{self.snapshot_file.name}.tmp")
+            with tmp_file.open("wb") as f:
+                f.write(raw)
+                f.flush()
+                os.fsync(f.fileno())
+            tmp_file.replace(self.snapshot_file)
+
+            self.close()
+            header = json.dumps({"base": hashlib.sha256(raw).hexdigest()}) + "\n"
+            self.journal_file.write_text(header, encoding="utf-8")
+            self._journal_records = 0
+        except Exception:
+            logger.exception("Error compacting %s", self.snapshot_file)
+
+    def export_json(self, path: Path | None = None) -> Path:
+        """
+        Write the current document as plain JSON.
+
+        Args:
+            path: Target file; by default the snapshot itself is rewritten and the journal emptied.
+
+        Returns:
+            The written file.
+
+        """
+        if path is None or path == self.snapshot_file:
+            self.commit()
+            self.compact()
+            return self.snapshot_file
+        path.write_text(
+            json.dumps(self.to_json_data(), indent=self.indent, ensure_ascii=self.ensure_ascii), encoding="utf-8",
+        )
+        return path
+
+    def close(self) -> None:
+        """Close the journal file handle."""
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
@@ -2,13 +2,15 @@
 Provides the ProcessingState class for maintaining hierarchical processing state.
 
 The ProcessingState class manages the state of processed articles and groups,
-including their outputs and the main question. It provides methods to load and save
-the state to a JSON file.
+including their outputs and the main question. The state is persisted as a JSON
+snapshot plus a journal of updates.
 """
 
-import json
 import logging
 from pathlib import Path
+from typing import Any
+
+from DAO.journal_store import JournalStore
 
 # Create a custom logger
 logger = logging.getLogger(__name__)
@@ -19,28 +21,53 @@ class ProcessingState:
     def __init__(self) -> None:
         """Initialize the ProcessingState with default values."""
         self.state_file = Path("processing_state.json")
-        self.data = {
+        self.store = JournalStore(self.state_file, lambda: {
             "processed_articles": [],
             "processed_groups": [],
             "article_outputs": {},
+            "article_hashes": {},
             "group_outputs": {},
             "main_question": "",
-        }
+        }, ensure_ascii=False)
         self.load()
 
-    def load(self) -> None:
-        """Load the processing state from a file."""
-        if self.state_file.exists():
-            try:
-                with self.state_file.open() as f:
-                    self.data = json.load(f)
-            except Exception:
-                logger.exception("Error loading state")
+    @property
+    def data(self) -> dict[str, Any]:
+        """Current state; update it through the methods of this class."""
+        return self.store.data
 
-    def save(self) -> None:
-        """Save the processing state to a file."""
+    def load(self) -> None:
+        """Load the processing state from the JSON snapshot and its journal."""
         try:
-            with self.state_file.open("w") as f:
-                json.dump(self.data, f, indent=2, ensure_ascii=False)
+            self.store.load()
         except Exception:
-            logger.exception("Error saving state")
+            logger.exception("Error loading state")
+
+    def save(self) -> None:
+        """Commit pending state updates to the journal."""
+        self.store.commit()
+
+    def set_main_question(self, question: str) -> None:
+        """Record the research question."""
+        self.store.put("main_question", question)
+
+    def record_article(self, article_id: str, output: str, content_hash: str) -> None:
+        """Record the aggregated output of an article and the SHA-256 of the PDF it was mapped from."""
+        self.store.set("article_outputs", article_id, output)
+        self.set_article_hash(article_id, content_hash)
+        if article_id not in self.data["processed_articles"]:
+            self.store.append("processed_articles", article_id)
+
+    def set_article_hash(self, article_id: str, content_hash: str) -> None:
+        """Record the SHA-256 of the PDF behind the output of an article."""
+        self.store.set("article_hashes", article_id, content_hash)
+
+    def record_group(self, key: str, node: dict[str, Any]) -> None:
+        """Record an aggregation node."""
+        self.store.set("group_outputs", key, node)
+        self.store.append("processed_groups", key)
+
+    def drop_group(self, key: str) -> None:
+        """Remove an aggregation node."""
+        self.store.delete("group_outputs", key)
+        self.store.remove("processed_groups", key)
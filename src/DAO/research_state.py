@@ -1,12 +1,18 @@
 """
 Manages the state of research data, including a queue of tasks, a list of processed tasks, and main summaries.
 
-The state can be saved to and loaded from a JSON file.
+The state is persisted as a compact JSON snapshot plus a journal of updates. In memory the queue is served by a
+CrawlFrontier, so dequeueing and duplicate checks are O(1). Results of the stages of a paper in flight are
+memoized until the paper is finished, so a resumed crawl never repeats a stage.
 """
 
-import json
 import logging
+from collections import Counter
 from pathlib import Path
+from typing import Any
+
+from DAO.journal_store import JournalStore
+from utils.frontier import BloomFilter, CrawlFrontier, PriorityFrontier
 
 # Set up a dedicated logger
 logger = logging.getLogger(__name__)
@@ -14,29 +20,137 @@ logger = logging.getLogger(__name__)
 class ResearchState:
     """A class to manage the state of research data."""
 
-    def __init__(self) -> None:
-        """Initialize the ResearchState with default data."""
+    def __init__(self, seen_capacity: int | None = None) -> None:
+        """
+        Initialize the ResearchState with default data.
+
+        Args:
+            seen_capacity (int | None): Expected crawl size; if given, processed IDs are folded into a bloom
+                filter on load instead of being kept as an exact list.
+
+        """
         self.state_file = Path("research_state.json")
-        self.data = {
+        self.seen_capacity = seen_capacity
+        self.store = JournalStore(self.state_file, lambda: {
             "queue": [],
             "processed": [],
             "main_summaries": [],
-        }
+            "stages": {},
+        }, indent=None, set_fields=("queue", "processed"))
+        self.frontier = CrawlFrontier()
 
-    def load(self) -> None:
-        """Load the state from a JSON file."""
-        if self.state_file.exists():
-            try:
-                with self.state_file.open() as f:
-                    self.data = json.load(f)
-                logger.info("State loaded successfully")
-            except Exception:
-                logger.exception("Error loading state")
+    @property
+    def data(self) -> dict[str, Any]:
+        """Current state; update it through the methods of this class."""
+        return self.store.data
 
-    def save(self) -> None:
-        """Save the state to a JSON file."""
+    def load(self) -> None:
+        """Load the state from the JSON snapshot and its journal."""
         try:
-            with self.state_file.open("w") as f:
-                json.dump(self.data, f, indent=2)
+            self.store.load()
+            logger.info("State loaded successfully")
         except Exception:
-            logger.exception("Error saving state")
+            logger.exception("Error loading state")
+
+        # States written before finished IDs left the queue still list them there
+        processed = self.data["processed"]
+        finished = [arxiv_id for arxiv_id in self.data["queue"] if arxiv_id in processed]
+        for arxiv_id in finished:
+            self.store.discard("queue", arxiv_id)
+        if finished:
+            logger.info("Dropped %d processed IDs from the queue", len(finished))
+            self.save()
+
+        seen = None
+        if self.seen_capacity is not None:
+            bloom_data = self.data.get("seen_bloom")
+            seen = BloomFilter.from_dict(bloom_data) if bloom_data else BloomFilter(self.seen_capacity)
+        self.frontier = CrawlFrontier(self.data["queue"], self.data["processed"], seen)
+
+        if seen is not None and self.data["processed"]:
+            self.store.put("seen_bloom", seen.to_dict())
+            self.store.put("processed", [])
+            self.store.compact()
+
+    def prioritize(self, scores: Counter[str]) -> None:
+        """
+        Serve the queue best-first by score instead of in discovery order.
+
+        Call it after ``load`` and before the first ``next_id``.
+
+        Args:
+            scores (Counter[str]): Initial score of every ID, e.g. from ``DocumentLinks.citation_counts``.
+
+        """
+        self.frontier = PriorityFrontier(self.data["queue"], self.data["processed"], self.frontier.seen, scores)
+
+    def save(self) -> None:
+        """Commit pending state updates to the journal."""
+        self.store.commit()
+
+    def enqueue(self, arxiv_id: str) -> bool:
+        """
+        Queue an arXiv ID unless it is already queued, in flight or processed.
+
+        Args:
+            arxiv_id (str): The normalized arXiv ID.
+
+        Returns:
+            bool: True if the ID was queued.
+
+        """
+        if not self.frontier.push(arxiv_id):
+            return False
+        self.store.add("queue", arxiv_id)
+        return True
+
+    def add_citation(self, arxiv_id: str) -> None:
+        """Queue an ID cited by a relevant paper and raise its priority."""
+        self.enqueue(arxiv_id)
+        self.frontier.bump(arxiv_id)
+
+    def next_id(self) -> str | None:
+        """Hand out the next queued ID; it stays in the persisted queue until it is finished."""
+        return self.frontier.pop()
+
+    def complete(self, arxiv_id: str) -> None:
+        """Record an in-flight ID as processed."""
+        self.frontier.complete(arxiv_id)
+        self.store.discard("queue", arxiv_id)
+        self.store.add("processed", arxiv_id)
+        self._forget_stages(arxiv_id)
+
+    def drop(self, arxiv_id: str) -> None:
+        """Remove an in-flight ID from the queue without marking it processed."""
+        self.frontier.drop(arxiv_id)
+        self.store.discard("queue", arxiv_id)
+        self._forget_stages(arxiv_id)
+
+    def stages(self, arxiv_id: str) -> dict[str, Any]:
+        """Return the memoized stage results of a paper that is not finished yet."""
+        return self.data["stages"].get(arxiv_id, {})
+
+    def record_stage(self, arxiv_id: str, stage: str, result: Any) -> None:  # noqa: ANN401
+        """
+        Memoize the result of a stage of a paper until the paper is finished.
+
+        Args:
+            arxiv_id (str): The arXiv ID.
+            stage (str): Name of the stage.
+            result (Any): JSON-serializable result of the stage.
+
+        """
+        self.store.set("stages", arxiv_id, {**self.stages(arxiv_id), stage: result})
+
+    def _forget_stages(self, arxiv_id: str) -> None:
+        """Drop the memoized stage results of a finished paper."""
+        if arxiv_id in self.data["stages"]:
+            self.store.delete("stages", arxiv_id)
+
+    def release(self, arxiv_id: str) -> None:
+        """Put an in-flight ID back at the front of the queue after a failure."""
+        self.frontier.release(arxiv_id)
+
+    def add_summary(self, summary: str) -> None:
+        """Record the summary of an initial PDF."""
+        self.store.append("main_summaries", summary)
@@ -0,0 +1,118 @@
+"""
+Ask questions of the research corpus.
+
+The chunks of every PDF in the corpus are embedded into the vector index (only new or changed articles are
+embedded), then each question is answered by the LLM from the chunks closest to it, with the document IDs of
+the sources. Without a question on the command line, questions are read interactively until an empty line.
+
+Usage:
+    python src/ask.py ["question"] [--dirs research] [--k 8]
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from pathlib import Path
+
+from prompt.llm_service import AsyncEmbeddingClient, AsyncLLMClient, LLMService
+from prompt.prompt_service import PromptService
+from utils.pdf_utils import PDFUtils
+from utils.retrieval import RETRIEVAL_CHUNK_TOKENS, ChunkRetriever
+from utils.vector_index import VectorIndex
+
+CORPUS_DIRS = (Path("research"),)
+ASK_TOP_K = 8  # Chunks given to the LLM per question
+
+logger = logging.getLogger(__name__)
+
+
+async def embed_corpus(retriever: ChunkRetriever, dirs: tuple[Path, ...]) -> dict[str, list[str]]:
+    """
+    Bring the vector index up to date with the corpus.
+
+    Args:
+        retriever: Retriever holding the index.
+        dirs: Directories of PDF files.
+
+    Returns:
+        Chunk texts by article ID.
+
+    """
+    chunks = {}
+    for pdf_path in sorted(path for directory in dirs for path in directory.glob("*.pdf")):
+        article_chunks = await asyncio.to_thread(PDFUtils.read_pdf_chunks, pdf_path, RETRIEVAL_CHUNK_TOKENS)
+        if article_chunks and await retriever.embed_article(pdf_path.stem, article_chunks):
+            chunks[pdf_path.stem] = article_chunks
+    logger.info("Corpus of %d articles ready", len(chunks))
+    return chunks
+
+
+async def answer(
+        question: str,
+        retriever: ChunkRetriever,
+        llm: AsyncLLMClient,
+        chunks: dict[str, list[str]],
+        k: int,
+) -> str:
+    """
+    Answer a question from the most relevant chunks of the corpus.
+
+    Args:
+        question: The question.
+        retriever: Retriever over the embedded corpus.
+        llm: LLM client.
+        chunks: Chunk texts by article ID.
+        k: Number of chunks given to the LLM.
+
+    Returns:
+        The answer followed by its sources, or an empty string if nothing was retrieved.
+
+    """
+    hits = [hit for hit in await retriever.search(question, k) if hit.article_id in chunks]
+    if not hits:
+        return ""
+    passages = [(hit.article_id, chunks[hit.article_id][hit.chunk]) for hit in hits]
+    response = await llm.get_llm_response(PromptService.create_corpus_question_prompt(question, passages))
+    sources = ", ".join(dict.fromkeys(hit.article_id for hit in hits))
+    return f"{response}\n\nSources: {sources}\n"
+
+
+async def ask(questions: list[str], dirs: tuple[Path, ...], k: int) -> None:
+    """Embed the corpus and answer the given questions, or read questions from the terminal if there are none."""
+    index = VectorIndex()
+    index.load()
+    async with AsyncLLMClient() as llm, AsyncEmbeddingClient() as embedder:
+        retriever = ChunkRetriever(embedder, index)
+        chunks = await embed_corpus(retriever, dirs)
+        interactive = not questions
+        while True:
+            if interactive:
+                question = (await asyncio.to_thread(input, "Question> ")).strip()
+            else:
+                question = questions.pop(0) if questions else ""
+            if not question:
+                break
+            sys.stdout.write(await answer(question, retriever, llm, chunks, k) or "No matching passages.\n")
+
+
+def main() -> None:
+    """Parse the command line and answer the questions."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("question", nargs="*", help="Questions to answer; interactive when omitted")
+    parser.add_argument("--dirs", type=Path, nargs="+", default=list(CORPUS_DIRS), help="PDF directories")
+    parser.add_argument("--k", type=int, default=ASK_TOP_K, help="Chunks given to the LLM per question")
+    args = parser.parse_args()
+
+    llm_cache = LLMService.configure_cache()
+    try:
+        asyncio.run(ask(args.question, tuple(args.dirs), args.k))
+    except (KeyboardInterrupt, EOFError):
+        pass
+    finally:
+        llm_cache.log_stats()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    main()
@@ -0,0 +1,139 @@
+"""
+Corpus indexer and keyword search.
+
+``index`` extracts the page text of every PDF in the corpus directories into the corpus store, parsing in a
+process pool across all cores while the main process is the only writer. The update is incremental: a file
+whose modification time and size match the store is skipped, and one whose content hash matches only has its
+metadata refreshed. ``search`` runs an FTS5 keyword query over the stored pages.
+
+Usage:
+    python src/corpus_index.py index [--dirs research "to research"] [--workers N]
+    python src/corpus_index.py search "attention AND transformer" [--limit 20]
+"""
+
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from DAO.corpus_store import CORPUS_DB_FILE, CorpusStore, DocumentRecord
+from utils.parsed_document import ParsedDocument
+
+CORPUS_DIRS = (Path("research"), Path("to research"))
+INDEX_WORKERS = os.cpu_count() or 1  # Processes parsing PDFs
+
+logger = logging.getLogger(__name__)
+
+
+def parse_pdf(pdf_path: Path, known_hash: str | None) -> tuple[DocumentRecord, list[str] | None]:
+    """
+    Hash a PDF and parse it unless its content is already stored; runs in a worker process.
+
+    Args:
+        pdf_path: The PDF file.
+        known_hash: Content hash stored for the document, if any.
+
+    Returns:
+        The document record, and its page texts, or None if the stored pages are still current.
+
+    """
+    content_hash = ParsedDocument.hash_file(pdf_path)
+    if content_hash == known_hash:
+        stat = pdf_path.stat()
+        doc_id = ParsedDocument.doc_id(pdf_path)
+        return DocumentRecord(doc_id, str(pdf_path), content_hash, stat.st_mtime_ns, stat.st_size, 0, []), None
+    document = ParsedDocument.parse(pdf_path, content_hash)
+    return document.record(pdf_path), list(document.pages())
+
+
+def index_corpus(
+        store: CorpusStore,
+        dirs: tuple[Path, ...] = CORPUS_DIRS,
+        workers: int = INDEX_WORKERS,
+) -> dict[str, int]:
+    """
+    Bring the store up to date with the PDFs in the corpus directories.
+
+    Args:
+        store: The corpus store.
+        dirs: Directories of PDF files.
+        workers: Number of parsing processes.
+
+    Returns:
+        Counts of parsed, unchanged, refreshed, failed and removed documents.
+
+    """
+    counts = dict.fromkeys(("parsed", "unchanged", "refreshed", "failed", "removed"), 0)
+    records = store.documents()
+    pdf_files = {ParsedDocument.doc_id(path): path for directory in dirs for path in sorted(directory.glob("*.pdf"))}
+
+    pending = {}
+    for doc_id, pdf_path in pdf_files.items():
+        stat = pdf_path.stat()
+        record = records.get(doc_id)
+        if record is not None and (record.mtime_ns, record.size) == (stat.st_mtime_ns, stat.st_size):
+            counts["unchanged"] += 1
+        else:
+            pending[doc_id] = (pdf_path, record.content_hash if record else None)
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(parse_pdf, *job): job[0] for job in pending.values()}
+            for future in as_completed(futures):
+                try:
+                    record, pages = future.result()
+                except Exception:
+                    logger.exception("Error indexing %s", futures[future])
+                    counts["failed"] += 1
+                    continue
+                if pages is None:
+                    store.touch(record.doc_id, record.path, record.mtime_ns, record.size)
+                    counts["refreshed"] += 1
+                else:
+                    store.put(record, pages)
+                    counts["parsed"] += 1
+
+    for doc_id, record in records.items():
+        if doc_id not in pdf_files and not Path(record.path).exists():
+            store.remove(doc_id)
+            counts["removed"] += 1
+    return counts
+
+
+def main() -> None:
+    """Parse the command line and run the requested command."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", type=Path, default=CORPUS_DB_FILE, help="Corpus store file")
+    commands = parser.add_subparsers(dest="command", required=True)
+    index_parser = commands.add_parser("index", help="Extract the page text of the corpus into the store")
+    index_parser.add_argument("--dirs", type=Path, nargs="+", default=list(CORPUS_DIRS), help="PDF directories")
+    index_parser.add_argument("--workers", type=int, default=INDEX_WORKERS, help="Parsing processes")
+    search_parser = commands.add_parser("search", help="Keyword search over the stored pages")
+    search_parser.add_argument("query", help="FTS5 query, e.g. 'sparse NEAR attention' or '\"state space\"'")
+    search_parser.add_argument("--limit", type=int, default=10, help="Maximum number of hits")
+    args = parser.parse_args()
+
+    store = CorpusStore(args.db)
+    started = time.perf_counter()
+    try:
+        if args.command == "index":
+            counts = index_corpus(store, tuple(args.dirs), args.workers)
+            logger.info(
+                "Indexed in %.1fs: %s; store holds %s",
+                time.perf_counter() - started, ", ".join(f"{name}={count}" for name, count in counts.items()),
+                store.stats(),
+            )
+        else:
+            hits = store.search(args.query, args.limit)
+            for hit in hits:
+                logger.info("%s p.%d  %s", hit.doc_id, hit.page + 1, " ".join(hit.snippet.split()))
+            logger.info("%d hits in %.1f ms", len(hits), (time.perf_counter() - started) * 1000)
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    main()
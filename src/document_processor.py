@@ -1,15 +1,31 @@
 """Main file."""
+import asyncio
+import hashlib
+import json
 import logging
+import os
 from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Any, NamedTuple
 
 from DAO.processing_state import ProcessingState
-from prompt.llm_service import LLMService
+from prompt.llm_service import MAX_TOKENS, MODEL_CONTEXT_WINDOW, AsyncEmbeddingClient, AsyncLLMClient, LLMService
 from prompt.prompt_service import PromptService
+from utils.chunking import token_budget
+from utils.metrics import metrics
+from utils.parsed_document import ParsedDocument
 from utils.pdf_utils import PDFUtils
-from utils.utils import batched, sanitize_text, setup_signal_handler
+from utils.retrieval import RETRIEVAL_CHUNK_TOKENS, ChunkRetriever
+from utils.utils import sanitize_text, setup_signal_handler
+from utils.vector_index import VectorIndex
 
 GROUP_SIZE = 10  # Items per aggregation group
+MAX_GROUP_SIZE = 2 * GROUP_SIZE  # Upper bound of a content-defined aggregation group
+CHUNK_TOKEN_BUDGET = token_budget(MODEL_CONTEXT_WINDOW, MAX_TOKENS)  # Chunk text tokens per LLM call
+CHUNK_OVERLAP_TOKENS = 0  # Trailing tokens repeated in the next chunk
+EXTRACT_WORKERS = os.cpu_count() or 1  # Processes extracting PDF text
+RETRIEVAL_TOP_K_ENV = "RETRIEVAL_TOP_K"  # Set to map only the top-k question-relevant chunks of each article
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -19,58 +35,412 @@ logging.basicConfig(
     handlers=[logging.FileHandler("processing.log"), logging.StreamHandler()],
 )
 
-def hierarchical_aggregation(
-        content: list[str],
-        prompt_creator: Callable[[list[str], int], str],
-        level_name: str,
-) -> str:
-    """Recursive aggregation with error handling."""
-    aggregated = []
-    try:
-        for group_number, group in enumerate(batched(content, GROUP_SIZE), 1):
-            group_prompt = prompt_creator(group, group_number)
-            response = LLMService.get_llm_response(group_prompt)
-            if response:
-                aggregated.append(response)
-                logger.info("Aggregated %s group %d", level_name, group_number)
+class ReduceTree:
+    """
+    Incremental, resumable hierarchical aggregation.
+
+    A group is merged as soon as GROUP_SIZE items are available on its level, groups of the same level run
+    concurrently, and every merged node is persisted in ``ProcessingState.group_outputs``. Merged nodes move up
+    in group order, so the shape of the tree does not depend on which merge finishes first. On restart the
+    persisted nodes are restored, so only work above the deepest completed nodes is redone.
+    """
+
+    def __init__(
+            self,
+            scope: str,
+            prompt_creator: Callable[[list[Any], int], str],
+            state: ProcessingState,
+            llm: AsyncLLMClient,
+    ) -> None:
+        """
+        Initialize the tree and restore the nodes persisted for this scope.
+
+        Args:
+            scope: Prefix of the node keys, unique per aggregation.
+            prompt_creator: Builds the merge prompt of a group.
+            state: Processing state holding the persisted nodes.
+            llm: Client for the merge calls.
+
+        """
+        self.scope = scope
+        self.prompt_creator = prompt_creator
+        self.state = state
+        self.llm = llm
+        self.pending: list[list[tuple[str, Any]]] = [[]]
+        self.produced = [0]
+        self.next_group = [0]
+        self.tasks: list[set[asyncio.Task]] = [set()]
+        self.finished: list[dict[int, tuple[str, Any] | None]] = [{}]  # Merged groups waiting for their turn
+        self.passed = [0]  # Next group of every level to move up
+
+        nodes = sorted(
+            ((key, node) for key, node in state.data["group_outputs"].items() if key.startswith(f"{scope}/")),
+            key=lambda entry: (entry[1]["level"], entry[1]["group"]),
+        )
+        self.consumed = {member for _, node in nodes for member in node["members"]}
+        for key, node in nodes:
+            level = node["level"]
+            self._ensure_level(level + 1)
+            self.next_group[level] = max(self.next_group[level], node["group"] + 1)
+            self.produced[level + 1] += 1
+            if key not in self.consumed:
+                self.pending[level + 1].append((key, node["output"]))
+        self.passed = self.next_group.copy()
+        if nodes:
+            logger.info("Restored %d aggregation nodes for %s", len(nodes), scope)
+
+    def _ensure_level(self, level: int) -> None:
+        """Grow the per-level bookkeeping up to ``level``."""
+        while len(self.pending) <= level:
+            self.pending.append([])
+            self.produced.append(0)
+            self.next_group.append(0)
+            self.tasks.append(set())
+            self.finished.append({})
+            self.passed.append(0)
+
+    def add(self, key: str, item: Any) -> None:  # noqa: ANN401
+        """
+        Add a map result, merging a group as soon as it is full.
+
+        Args:
+            key: Stable identifier of the item.
+            item: Map result passed to the prompt creator.
+
+        """
+        self.produced[0] += 1
+        if key in self.consumed:
+            return
+        self.pending[0].append((key, item))
+        self._launch_full_groups(0)
+
+    def _launch_full_groups(self, level: int) -> None:
+        """Start a merge for every full group on a level."""
+        while len(self.pending[level]) >= GROUP_SIZE:
+            self._launch(level, self.pending[level][:GROUP_SIZE])
+            del self.pending[level][:GROUP_SIZE]
+
+    def _launch(self, level: int, members: list[tuple[str, Any]]) -> None:
+        """Start the merge of a group."""
+        group = self.next_group[level]
+        self.next_group[level] += 1
+        self.tasks[level].add(asyncio.create_task(self._merge(level, group, members)))
+
+    async def _merge(self, level: int, group: int, members: list[tuple[str, Any]]) -> None:
+        """Merge a group, persist the node and pass its output to the next level."""
+        key = f"{self.scope}/L{level}/G{group}"
+        try:
+            response = await self.llm.get_llm_response(self.prompt_creator([item for _, item in members], group + 1))
+        except Exception:
+            logger.exception("Error processing group %s", key)
+            self._pass_up(level, group, None)
+            return
+        if not response:
+            logger.warning("Empty response for group %s", key)
+            self._pass_up(level, group, None)
+            return
+
+        self.state.record_group(key, {
+            "level": level,
+            "group": group,
+            "members": [member for member, _ in members],
+            "output": response,
+        })
+        self.state.save()
+        logger.info("Aggregated %s level %d group %d", self.scope, level, group + 1)
+        self._pass_up(level, group, (key, response))
+
+    def _pass_up(self, level: int, group: int, node: tuple[str, Any] | None) -> None:
+        """Move the merged groups of a level up in group order; a failed group passes None."""
+        self._ensure_level(level + 1)
+        self.finished[level][group] = node
+        while self.passed[level] in self.finished[level]:
+            node = self.finished[level].pop(self.passed[level])
+            self.passed[level] += 1
+            if node is not None:
+                self.produced[level + 1] += 1
+                self.pending[level + 1].append(node)
+        self._launch_full_groups(level + 1)
+
+    async def settle(self) -> None:
+        """Wait for the running merges without flushing partial groups, so every started node is persisted."""
+        while any(self.tasks):
+            for level, running in enumerate(self.tasks):
+                self.tasks[level] = set()
+                await asyncio.gather(*running)
+
+    async def finish(self) -> str:
+        """
+        Flush the partial groups level by level once all items are added.
+
+        Returns:
+            The root output, or an empty string if nothing could be aggregated.
+
+        """
+        level = 0
+        while level < len(self.pending):
+            while self.tasks[level]:
+                running = self.tasks[level]
+                self.tasks[level] = set()
+                await asyncio.gather(*running)
+
+            if level > 0 and self.produced[level] == 1 and self.pending[level]:
+                return self.pending[level][0][1]
+            if self.pending[level]:
+                self._launch(level, self.pending[level])
+                self.pending[level] = []
+                continue
+            level += 1
+        return ""
+
+def _digest(*parts: Any) -> str:  # noqa: ANN401
+    """Hash JSON-serializable parts."""
+    return hashlib.sha256(json.dumps(parts, ensure_ascii=False).encode()).hexdigest()
+
+class _TreeNode(NamedTuple):
+    """Node of a ``MerkleReduceTree``: content hash, key, last item key below it and prompt input."""
+
+    digest: str
+    key: str
+    last_key: str
+    item: Any
+
+class MerkleReduceTree:
+    """
+    Content-addressed hierarchical aggregation, persisted as a Merkle tree.
+
+    Items are ordered by key and cut into groups at content-defined boundaries: a node closes its group when
+    the hash of the last item key below it falls into one bucket of GROUP_SIZE, or when the group reaches
+    MAX_GROUP_SIZE. A new item therefore only changes the groups on its path to the root instead of shifting
+    every later group. Every merged node is stored in ``ProcessingState.group_outputs`` under the hash of its
+    children's hashes, leaves being hashed over key and content, so all nodes whose subtree is unchanged are
+    reused without an LLM call, and nodes no longer in the tree are pruned.
+    """
+
+    def __init__(
+            self,
+            scope: str,
+            prompt_creator: Callable[[list[Any], int], str],
+            state: ProcessingState,
+            llm: AsyncLLMClient,
+    ) -> None:
+        """
+        Initialize the tree.
+
+        Args:
+            scope: Prefix of the node keys, unique per aggregation.
+            prompt_creator: Builds the merge prompt of a group.
+            state: Processing state holding the persisted nodes.
+            llm: Client for the merge calls.
+
+        """
+        self.scope = scope
+        self.prompt_creator = prompt_creator
+        self.state = state
+        self.llm = llm
+        self.merged = 0
+        self.reused = 0
+        self._live: set[str] = set()
+
+    def _closes_group(self, level: int, node: _TreeNode) -> bool:
+        """Check whether a node ends its group, on about one key in GROUP_SIZE."""
+        return int(_digest(self.scope, level, node.last_key)[:8], 16) % GROUP_SIZE == 0
+
+    def _groups(self, level: int, nodes: list[_TreeNode]) -> list[list[_TreeNode]]:
+        """Cut the nodes of a level into groups at content-defined boundaries."""
+        groups: list[list[_TreeNode]] = [[]]
+        for node in nodes:
+            if len(groups[-1]) == MAX_GROUP_SIZE:
+                groups.append([])
+            groups[-1].append(node)
+            if self._closes_group(level, node):
+                groups.append([])
+        groups = [group for group in groups if group]
+        if level > 0 and len(groups) == len(nodes):
+            # Every node closed its own group, so the level would not shrink
+            groups = [nodes[start:start + GROUP_SIZE] for start in range(0, len(nodes), GROUP_SIZE)]
+        return groups
+
+    async def reduce(self, items: dict[str, Any]) -> str:
+        """
+        Aggregate all items into the root output.
+
+        Args:
+            items: Map results by stable key; the key orders them and places them in the tree.
+
+        Returns:
+            The root output, or an empty string if nothing could be aggregated.
+
+        """
+        nodes = [_TreeNode(_digest(key, item), key, key, item) for key, item in sorted(items.items())]
+        level = 0
+        while nodes and (level == 0 or len(nodes) > 1):
+            groups = self._groups(level, nodes)
+            merged = await asyncio.gather(*(self._merge(level, number, group) for number, group in enumerate(groups)))
+            nodes = [node for node in merged if node is not None]
+            level += 1
+
+        stale = [
+            key for key in self.state.data["group_outputs"]
+            if key.startswith(f"{self.scope}/") and key not in self._live
+        ]
+        for key in stale:
+            self.state.drop_group(key)
+        self.state.save()
+        logger.info(
+            "Aggregated %s: %d nodes reused, %d merged, %d stale nodes pruned",
+            self.scope, self.reused, self.merged, len(stale),
+        )
+        return nodes[0].item if nodes else ""
+
+    async def _merge(self, level: int, number: int, group: list[_TreeNode]) -> _TreeNode | None:
+        """Return the stored node of a group, or merge and persist it; a lone node above the leaves passes up."""
+        if level > 0 and len(group) == 1:
+            return group[0]
+        digest = _digest(self.scope, level, [child.digest for child in group])
+        key = f"{self.scope}/{digest}"
+        stored = self.state.data["group_outputs"].get(key)
+        if stored is not None:
+            self.reused += 1
+            self._live.add(key)
+            return _TreeNode(digest, key, group[-1].last_key, stored["output"])
+
+        try:
+            response = await self.llm.get_llm_response(self.prompt_creator([child.item for child in group], number + 1))
+        except Exception:
+            logger.exception("Error processing group %s", key)
+            return None
+        if not response:
+            logger.warning("Empty response for group %s", key)
+            return None
+
+        self.state.record_group(key, {
+            "level": level,
+            "group": number,
+            "members": [child.key for child in group],
+            "output": response,
+        })
+        self.state.save()
+        self.merged += 1
+        self._live.add(key)
+        logger.info("Aggregated %s level %d group %d", self.scope, level, number + 1)
+        return _TreeNode(digest, key, group[-1].last_key, response)
+
+def extract_chunks(
+        pdf_path: Path,
+        token_budget: int = CHUNK_TOKEN_BUDGET,
+) -> tuple[str, str, list[str], dict[str, Any]]:
+    """
+    Read the content hash and the chunks of a PDF.
+
+    Runs in a worker process and also returns the metrics recorded meanwhile.
+    """
+    chunks = PDFUtils.read_pdf_chunks(pdf_path, token_budget, CHUNK_OVERLAP_TOKENS)
+    return pdf_path.stem, ParsedDocument.current_hash(pdf_path), chunks, metrics.drain()
+
+def record_article(state: ProcessingState, article_id: str, article_response: str, content_hash: str) -> None:
+    """
+    Store an article result and persist the state in one step, without yielding to other tasks.
+
+    The chunk nodes of the article are dropped, including those of earlier versions of its PDF.
+    """
+    state.record_article(article_id, article_response, content_hash)
+    prefix = f"chunks:{article_id}@"
+    for key in [key for key in state.data["group_outputs"] if key.startswith(prefix)]:
+        state.drop_group(key)
+    state.save()
+
+async def map_chunks(
+        article_id: str,
+        chunks: list[tuple[int, str]],
+        question: str,
+        chunk_tree: ReduceTree,
+        llm: AsyncLLMClient,
+) -> tuple[int, int]:
+    """
+    Map the chunks of an article concurrently and add the results to its chunk tree in chunk order.
+
+    Returns:
+        The numbers of mapped chunks and of chunks that got no response.
+
+    """
+    async def map_chunk(index: int, chunk: str) -> tuple[int, str]:
+        prompt = PromptService.create_partial_prompt(question, chunk, 1, 1)
+        return index, await llm.get_llm_response(prompt)
+
+    mapped = 0
+    missing = 0
+    order = [index for index, _ in chunks]
+    ready: dict[int, str] = {}
+    position = 0
+    for completed in asyncio.as_completed([map_chunk(index, chunk) for index, chunk in chunks]):
+        index, response = await completed
+        ready[index] = response
+        # Results join the tree in chunk order, so its groups do not depend on which call finishes first
+        while position < len(order) and order[position] in ready:
+            index = order[position]
+            position += 1
+            if response := ready.pop(index):
+                chunk_tree.add(f"{article_id}#{index}", response)
+                mapped += 1
             else:
-                logger.warning("Empty response for group %d", group_number)
-    except Exception:
-        logger.exception("Error processing group" )
+                missing += 1
+    return mapped, missing
 
-    if len(aggregated) > 1:
-        return hierarchical_aggregation(aggregated, prompt_creator, f"{level_name}-groups")
-    return aggregated[0] if aggregated else ""
+async def process_article(
+        article_id: str,
+        chunks: list[str],
+        question: str,
+        state: ProcessingState,
+        *,
+        content_hash: str,
+        llm: AsyncLLMClient,
+        retriever: ChunkRetriever | None = None,
+        token_budget: int = CHUNK_TOKEN_BUDGET,
+) -> None:
+    """
+    Process single article with validation and record its result.
 
-def process_article(pdf_path: Path, question: str, state: ProcessingState) -> None:
-    """Process single article with validation."""
-    article_id = pdf_path.stem
-    if article_id in state.data["processed_articles"]:
+    An article already recorded with the same content hash is skipped, and a changed one replaces its earlier
+    output. With a retriever, only the chunks closest to the question are mapped. The chunk nodes persisted for
+    a resume are keyed on ``token_budget``, the budget the chunks were split with, since chunk indexes only
+    match between runs that split the text the same way.
+    """
+    if state.data["article_hashes"].get(article_id) == content_hash:
         logger.info("Skipping processed article: %s", article_id)
         return
 
     try:
-        chunks = PDFUtils.read_pdf_chunks(pdf_path)
         if not chunks:
             logger.warning("No readable content in %s", article_id)
             return
 
-        processed_chunks = []
-        for chunk in chunks:
-            prompt = PromptService.create_partial_prompt(question, chunk, 1, 1)
-            response = LLMService.get_llm_response(prompt)
-            if response:
-                processed_chunks.append(response)
-
-        if processed_chunks:
-            article_response = hierarchical_aggregation(
-                processed_chunks,
-                PromptService.create_chunk_aggregation_prompt,
-                "chunks",
+        chunk_tree = ReduceTree(
+            f"chunks:{article_id}@{content_hash[:16]}:{token_budget}", PromptService.create_chunk_aggregation_prompt,
+            state, llm,
+        )
+
+        selected = range(len(chunks))
+        if retriever is not None:
+            selected = await retriever.select(article_id, chunks, question)
+            logger.info("Mapping %d of %d chunks of %s", len(selected), len(chunks), article_id)
+        # Chunks merged into a node persisted by an interrupted run are not mapped again
+        selected = [index for index in selected if f"{article_id}#{index}" not in chunk_tree.consumed]
+
+        mapped, missing = await map_chunks(article_id, [(index, chunks[index]) for index in selected], question,
+                                           chunk_tree, llm)
+        if missing:
+            # A partial map is not recorded; the merged groups are kept, so a rerun only maps what is missing
+            await chunk_tree.settle()
+            logger.warning(
+                "%d of %d chunks of %s got no response, the article is retried on the next run",
+                missing, len(selected), article_id,
             )
-            state.data["article_outputs"][article_id] = article_response
-            state.data["processed_articles"].append(article_id)
-            state.save()
+            return
+
+        article_response = await chunk_tree.finish() if mapped or chunk_tree.consumed else ""
+        if article_response:
+            record_article(state, article_id, article_response, content_hash)
             logger.info("Processed article: %s", article_id)
         else:
             logger.warning("No valid responses for %s", article_id)
@@ -78,39 +448,149 @@ def process_article(pdf_path: Path, question: str, state: ProcessingState) -> No
     except Exception:
         logger.exception("Failed processing %s", article_id)
 
-def main(question: str) -> None:
-    """Runner."""
-    pdf_dir = Path("research")
-    pdf_files = list(pdf_dir.glob("*.pdf"))
+async def map_articles(
+        pdf_files: list[Path],
+        question: str,
+        state: ProcessingState,
+        *,
+        llm: AsyncLLMClient,
+        extract_workers: int = EXTRACT_WORKERS,
+        retriever: ChunkRetriever | None = None,
+) -> None:
+    """
+    Run the map phase over all pending articles.
+
+    Text extraction runs in a process pool; every article starts its chunk prompts as soon as its text is
+    ready, and the shared client caps the number of LLM calls in flight across all articles. In retrieval
+    mode the articles are split into smaller chunks, so the selection is finer.
+    """
+    loop = asyncio.get_running_loop()
+    token_budget = CHUNK_TOKEN_BUDGET if retriever is None else RETRIEVAL_CHUNK_TOKENS
+    metrics.set("stage_limit", extract_workers, stage="parse")
+    with ProcessPoolExecutor(max_workers=extract_workers, initializer=metrics.reset) as pool:
+        extractions = [
+            loop.run_in_executor(pool, extract_chunks, pdf_path, token_budget) for pdf_path in pdf_files
+        ]
+        metrics.set("queue_depth", len(extractions), queue="extract")
+        articles = []
+        for done, extraction in enumerate(asyncio.as_completed(extractions), 1):
+            try:
+                article_id, content_hash, chunks, recorded = await extraction
+            except Exception:
+                logger.exception("Text extraction failed")
+                continue
+            finally:
+                metrics.set("queue_depth", len(extractions) - done, queue="extract")
+            metrics.merge(recorded)
+            article = process_article(
+                article_id, chunks, question, state, content_hash=content_hash, llm=llm, retriever=retriever,
+                token_budget=token_budget,
+            )
+            articles.append(asyncio.create_task(article))
+        await asyncio.gather(*articles)
+
+async def research(
+        pending: list[Path],
+        question: str,
+        state: ProcessingState,
+        extract_workers: int = EXTRACT_WORKERS,
+        llm_concurrency: int | None = None,
+        *,
+        retrieval_top_k: int | None = None,
+) -> str | None:
+    """
+    Map the pending articles and aggregate all article outputs into the final answer.
+
+    The article-level tree is content-addressed, so only the groups above new or changed articles are merged
+    again; the rest of the tree is reused from earlier runs.
+    """
+    llm_concurrency = llm_concurrency or LLMService.backends().capacity
+    metrics.set("stage_limit", llm_concurrency, stage="llm")
+    async with AsyncLLMClient(concurrency=llm_concurrency) as llm, AsyncEmbeddingClient() as embedder:
+        retriever = None
+        if retrieval_top_k:
+            index = VectorIndex()
+            index.load()
+            retriever = ChunkRetriever(embedder, index, retrieval_top_k)
+
+        await map_articles(pending, question, state, llm=llm, extract_workers=extract_workers, retriever=retriever)
+
+        articles = {
+            article_id: (article_id, text) for article_id, text in state.data["article_outputs"].items() if text.strip()
+        }
+        if not articles:
+            return None
+        article_tree = MerkleReduceTree("articles", PromptService.create_article_aggregation_prompt, state, llm)
+        return await article_tree.reduce(articles)
+
+def pending_articles(state: ProcessingState, pdf_dir: Path) -> list[Path]:
+    """
+    List the PDFs that are new or whose content changed since their article output was recorded.
+
+    Articles processed before content hashes were recorded are taken as unchanged and get their current hash.
 
+    Args:
+        state: Processing state with the recorded article hashes.
+        pdf_dir: Directory of the research PDFs.
+
+    Returns:
+        The PDFs to map.
+
+    """
+    hashes = state.data["article_hashes"]
+    pending = []
+    for pdf_path in sorted(pdf_dir.glob("*.pdf")):
+        content_hash = ParsedDocument.current_hash(pdf_path)
+        if pdf_path.stem not in hashes and pdf_path.stem in state.data["processed_articles"]:
+            state.set_article_hash(pdf_path.stem, content_hash)
+        elif hashes.get(pdf_path.stem) != content_hash:
+            pending.append(pdf_path)
+    state.save()
+    logger.info("%d new or changed articles to map", len(pending))
+    return pending
+
+def main(
+        question: str,
+        extract_workers: int = EXTRACT_WORKERS,
+        llm_concurrency: int | None = None,
+        *,
+        retrieval_top_k: int | None = None,
+) -> None:
+    """
+    Runner.
+
+    Args:
+        question: Research question.
+        extract_workers: Processes extracting PDF text; 1 disables parallel extraction.
+        llm_concurrency: LLM calls in flight; 1 processes chunks one at a time. If None, the adaptive
+            concurrency limits of the LLM backends alone decide.
+        retrieval_top_k: Map only this many question-relevant chunks per article; all chunks when None.
+
+    """
+    llm_cache = LLMService.configure_cache()
+    metrics.reset()
     state = ProcessingState()
     if not state.data["main_question"]:
-        state.data["main_question"] = sanitize_text(question)
+        state.set_main_question(sanitize_text(question))
         state.save()
 
     setup_signal_handler(state)
 
-    for pdf_path in pdf_files:
-        if pdf_path.stem not in state.data["processed_articles"]:
-            process_article(pdf_path, question, state)
-
-    valid_articles = [
-        (article_id, text) for article_id, text in state.data["article_outputs"].items()
-        if text.strip()
-    ]
-
-    if valid_articles:
-        final_answer = hierarchical_aggregation(
-            valid_articles,
-            PromptService.create_article_aggregation_prompt,
-            "articles",
-        )
+    pending = pending_articles(state, Path("research"))
+    final_answer = asyncio.run(
+        research(pending, question, state, extract_workers, llm_concurrency, retrieval_top_k=retrieval_top_k),
+    )
 
+    if final_answer is not None:
         with Path("final_answer.md").open("w", encoding="utf-8") as f:
             f.write(f"# Research Synthesis\n\n**Question**: {question}\n\n## Final Analysis\n{final_answer}")
     else:
         logger.error("No valid articles processed")
 
+    llm_cache.log_stats()
+    metrics.log_summary()
+    metrics.export()
+
 if __name__ == "__main__":
     user_question = """
     Analyze the provided research articles to identify and categorize the mathematical methods used. For each article:
@@ -125,4 +605,5 @@ if __name__ == "__main__":
     Relationships between different mathematical tools used
     Comparisons with standard approaches in the field"""
 
-    main(user_question)
+    top_k = os.environ.get(RETRIEVAL_TOP_K_ENV)
+    main(user_question, retrieval_top_k=int(top_k) if top_k else None)
@@ -1,17 +1,134 @@
 """Module for downloading documents."""
+import asyncio
 import logging
+import os
+import time
+from enum import Enum
 from pathlib import Path
+from typing import Any
 
 from DAO.document_links import DocumentLinks
 from DAO.research_state import ResearchState
-from prompt.llm_service import LLMService
-from prompt.prompt_service import PromptService
+from graph_export import export_graph
+from prompt.llm_service import AsyncLLMClient, LLMService, StopCondition, stop_at_verdict
+from prompt.prompt_service import (
+    SUMMARY_MAX_TOKENS,
+    SUMMARY_REJECTION_PATTERN,
+    SUMMARY_RELEVANCE_SCHEMA,
+    VERDICT_MAX_TOKENS,
+    PromptService,
+)
+from utils.download_manager import DownloadManager
+from utils.metrics import metrics
 from utils.pdf_utils import PDFUtils
+from utils.relevance_filter import RelevanceFilter
 from utils.utils import normalize_arxiv_id, setup_signal_handler
 
+DOWNLOAD_CONCURRENCY = 4  # Downloads in flight
+PARSE_CONCURRENCY = 2  # PDF parses in flight
+LLM_CALLS_PER_PAPER = 3  # Worst case: abstract verdict, combined call, summary after a malformed answer
+CRAWL_MODE_ENV = "CRAWL_MODE"
+CRAWL_MAX_PAPERS_ENV = "CRAWL_MAX_PAPERS"
+CRAWL_MAX_LLM_CALLS_ENV = "CRAWL_MAX_LLM_CALLS"
+CRAWL_MAX_SECONDS_ENV = "CRAWL_MAX_SECONDS"
+CRAWL_SEEN_CAPACITY_ENV = "CRAWL_SEEN_CAPACITY"
+
 # Set up a dedicated logger
 logger = logging.getLogger(__name__)
 
+class CrawlMode(Enum):
+    """Order in which queued papers are crawled."""
+
+    FIFO = "fifo"
+    PRIORITY = "priority"
+
+class CrawlBudget:
+    """
+    Hard limits for a crawl run.
+
+    LLM calls are counted as they are made, and every paper in flight reserves ``LLM_CALLS_PER_PAPER`` calls,
+    so a paper is only started if the calls it may need still fit. Papers already in flight when the time
+    runs out are allowed to finish.
+    """
+
+    def __init__(
+            self,
+            max_papers: int | None = None,
+            max_llm_calls: int | None = None,
+            max_seconds: float | None = None,
+    ) -> None:
+        """
+        Initialize the budget; a limit of None means unlimited.
+
+        Args:
+            max_papers (int | None): Maximum number of papers to start.
+            max_llm_calls (int | None): Maximum number of LLM calls.
+            max_seconds (float | None): Maximum wall time in seconds after which no paper is started.
+
+        """
+        self.max_papers = max_papers
+        self.max_llm_calls = max_llm_calls
+        self.max_seconds = max_seconds
+        self.papers = 0
+        self.llm_calls = 0
+        self.active = 0
+        self.started_at = time.monotonic()
+
+    @classmethod
+    def from_env(cls) -> "CrawlBudget":
+        """Read the limits from the CRAWL_MAX_* environment variables."""
+        def limit(name: str, kind: type) -> int | float | None:
+            value = os.environ.get(name)
+            return kind(value) if value else None
+
+        return cls(
+            limit(CRAWL_MAX_PAPERS_ENV, int),
+            limit(CRAWL_MAX_LLM_CALLS_ENV, int),
+            limit(CRAWL_MAX_SECONDS_ENV, float),
+        )
+
+    def try_start(self) -> bool:
+        """
+        Start a paper if the budget allows it.
+
+        Returns:
+            bool: True if the paper may be started.
+
+        """
+        if (
+            (self.max_papers is not None and self.papers >= self.max_papers)
+            or (
+                self.max_llm_calls is not None
+                and self.llm_calls + (self.active + 1) * LLM_CALLS_PER_PAPER > self.max_llm_calls
+            )
+            or (self.max_seconds is not None and time.monotonic() - self.started_at >= self.max_seconds)
+        ):
+            return False
+        self.papers += 1
+        self.active += 1
+        return True
+
+    def charge_llm_call(self) -> None:
+        """Count an LLM call made for a paper in flight."""
+        self.llm_calls += 1
+
+    def finish(self) -> None:
+        """Release the reservation of a paper that is no longer in flight."""
+        self.active -= 1
+
+def is_positive_answer(response: str) -> bool:
+    """
+    Check whether an LLM answer to a relevance prompt is positive.
+
+    Args:
+        response (str): The raw LLM answer.
+
+    Returns:
+        bool: True if the answer starts with 'yes', False otherwise.
+
+    """
+    return LLMService.parse_verdict(response) is True
+
 def check_relevance(candidate_summary: str, arxiv_id: str) -> bool:
     """
     Check the relevance of a candidate summary.
@@ -26,8 +143,8 @@ def check_relevance(candidate_summary: str, arxiv_id: str) -> bool:
     """
     try:
         prompt = PromptService.create_relevance_prompt(candidate_summary)
-        response = LLMService.get_llm_response(prompt, 0.8)
-        return response.strip().lower() in ["да", "yes"]
+        response = LLMService.stream_llm_response(prompt, 0.8, max_tokens=VERDICT_MAX_TOKENS, stop=stop_at_verdict)
+        return is_positive_answer(response)
     except Exception:
         logger.exception("Relevance check failed for %s", arxiv_id)
         return False
@@ -42,78 +159,299 @@ def process_initial_pdfs(state: ResearchState, links: DocumentLinks, initial_fil
         initial_files (List[Path]): The list of initial PDF files.
 
     """
-    for pdf_path in initial_files:
-        try:
-            text = PDFUtils.read_and_clean_pdf(pdf_path)
-            if not text:
-                continue
-
-            summary = LLMService.get_llm_response(PromptService.create_summary_prompt(text), 0.8)
-            state.data["main_summaries"].append(summary)
-
-            arxiv_id_from_filename = pdf_path.stem
-            normalized_id = normalize_arxiv_id(arxiv_id_from_filename)
-
-            doc_links = PDFUtils.extract_links_from_pdf(pdf_path)
-            links.add_document(normalized_id, doc_links, summary)
+    texts = {pdf_path: PDFUtils.read_and_clean_pdf(pdf_path) for pdf_path in initial_files}
+    readable = [pdf_path for pdf_path, text in texts.items() if text]
+    summaries = LLMService.get_llm_responses(
+        [PromptService.create_summary_prompt(texts[pdf_path]) for pdf_path in readable], 0.8,
+        max_tokens=SUMMARY_MAX_TOKENS,
+    )
 
-            for arxiv_id in doc_links.get("arxiv", []):
-                norm_id = normalize_arxiv_id(arxiv_id)
-                if norm_id not in state.data["queue"] + state.data["processed"]:
-                    state.data["queue"].append(norm_id)
-        except Exception:
-            logger.exception("Initial processing failed")
+    for pdf_path, summary in zip(readable, summaries, strict=True):
+        add_initial_pdf(state, links, pdf_path, summary)
 
-def process_queue(state: ResearchState, links: DocumentLinks) -> None:
+def add_initial_pdf(state: ResearchState, links: DocumentLinks, pdf_path: Path, summary: str) -> None:
     """
-    Process the queue of arXiv IDs.
+    Register a summarized initial PDF and queue the papers it references.
 
     Args:
         state (ResearchState): The research state.
         links (DocumentLinks): The document links.
+        pdf_path (Path): The initial PDF file.
+        summary (str): The LLM summary of the PDF.
 
     """
-    while state.data["queue"]:
-        current_id = state.data["queue"].pop(0)
+    try:
+        state.add_summary(summary)
 
-        try:
-            if current_id in state.data["processed"]:
-                continue
+        arxiv_id_from_filename = pdf_path.stem
+        normalized_id = normalize_arxiv_id(arxiv_id_from_filename)
 
-            logger.info("Processing: %s", current_id)
+        doc_links = PDFUtils.extract_links_from_pdf(pdf_path)
+        links.add_document(normalized_id, doc_links, summary)
 
-            if PDFUtils.download_arxiv_pdf(current_id):
-                pdf_path = Path("research") / f"{current_id}.pdf"
-                doc_links = PDFUtils.extract_links_from_pdf(pdf_path)
-                text = PDFUtils.read_and_clean_pdf(pdf_path)
-                summary = LLMService.get_llm_response(PromptService.create_summary_prompt(text), 0.8)
-                new_ids = [normalize_arxiv_id(arxiv_id) for arxiv_id in doc_links.get("arxiv", [])]
+        for arxiv_id in dict.fromkeys(normalize_arxiv_id(arxiv_id) for arxiv_id in doc_links.get("arxiv", [])):
+            state.add_citation(arxiv_id)
+    except Exception:
+        logger.exception("Initial processing failed")
 
-                if check_relevance(summary, current_id):
-                    state.data["queue"].extend(new_ids)
-                    links.add_document(current_id, doc_links, summary)
-                    logger.info("Added relevant paper: %s", current_id)
-                else:
-                    logger.info("Skipped irrelevant paper: %s", current_id)
+class CrawlEngine:
+    """
+    Asyncio crawl engine with a bounded worker pool.
 
-                state.data["processed"].append(current_id)
+    Every stage of the per-paper pipeline has its own concurrency limit, so downloads, PDF parsing and LLM
+    calls overlap instead of waiting for each other. All state mutations happen on the event loop thread,
+    and an ID stays in the persisted queue until its result is committed, so a crash resumes from
+    ``ResearchState``.
+    """
 
-            state.save()
-            links.save()
+    def __init__(
+            self,
+            state: ResearchState,
+            links: DocumentLinks,
+            download_limit: int = DOWNLOAD_CONCURRENCY,
+            parse_limit: int = PARSE_CONCURRENCY,
+            llm_limit: int | None = None,
+            *,
+            budget: CrawlBudget | None = None,
+            prefilter: RelevanceFilter | None = None,
+    ) -> None:
+        """
+        Initialize the engine.
+
+        Args:
+            state (ResearchState): The research state.
+            links (DocumentLinks): The document links.
+            download_limit (int): Maximum number of downloads in flight.
+            parse_limit (int): Maximum number of PDF parses in flight.
+            llm_limit (int | None): Maximum number of LLM calls in flight; if None, the LLM backends' adaptive
+                concurrency limits alone decide.
+            budget (CrawlBudget | None): Limits of the run; unlimited if None.
+            prefilter (RelevanceFilter | None): Local classifier deciding confident relevance checks.
+
+        """
+        self.state = state
+        self.links = links
+        self.download_slots = asyncio.Semaphore(download_limit)
+        self.download_limit = download_limit
+        self.parse_slots = asyncio.Semaphore(parse_limit)
+        llm_limit = llm_limit or LLMService.backends().capacity
+        self.llm_slots = asyncio.Semaphore(llm_limit)
+        self.llm_limit = llm_limit
+        self.max_workers = download_limit + parse_limit + llm_limit
+        self.budget = budget or CrawlBudget()
+        self.prefilter = prefilter
+        self.stopping = False
+        self.llm: AsyncLLMClient | None = None
+        self.downloader: DownloadManager | None = None
+        for stage, limit in (("download", download_limit), ("parse", parse_limit), ("llm", llm_limit)):
+            metrics.set("stage_limit", limit, stage=stage)
+
+    async def run(self) -> None:
+        """Process the queue until it is empty, the budget is spent or an item fails."""
+        async with (
+            AsyncLLMClient(concurrency=self.llm_limit) as self.llm,
+            DownloadManager(max_connections=self.download_limit) as self.downloader,
+        ):
+            workers: set[asyncio.Task] = set()
+            while True:
+                metrics.set("queue_depth", len(self.state.frontier), queue="frontier")
+                while not self.stopping and len(workers) < self.max_workers and len(self.state.frontier):
+                    if not self.budget.try_start():
+                        logger.info("Crawl budget exhausted, %d papers left in the queue", len(self.state.frontier))
+                        self.stopping = True
+                        break
+                    workers.add(asyncio.create_task(self._process(self.state.next_id())))
+
+                if not workers:
+                    break
+                _, workers = await asyncio.wait(workers, return_when=asyncio.FIRST_COMPLETED)
+
+    async def _process(self, arxiv_id: str) -> None:
+        """
+        Run the stages of a single arXiv ID, cheapest first.
+
+        Relevance is decided from the abstract, by the pre-filter if it is confident or else by a short LLM
+        verdict; only papers that pass get the structured call that returns the verdict and the summary together.
+        Link extraction only runs for relevant papers, while their summary streams if it is still missing. Stage
+        results are memoized in ``ResearchState``, so a resumed crawl skips finished stages.
+        """
+        try:
+            logger.info("Processing: %s", arxiv_id)
+
+            async with metrics.waiting("download", self.download_slots):
+                pdf_path = await self.downloader.download(arxiv_id)
+            if pdf_path is None:
+                self._drop(arxiv_id)
+                return
+
+            if "relevant" not in self.state.stages(arxiv_id) and not await self._judge(arxiv_id, pdf_path):
+                self._drop(arxiv_id)
+                return
+
+            if not self.state.stages(arxiv_id)["relevant"]:
+                self._commit(arxiv_id)
+                return
+
+            summary = None
+            if "summary" not in self.state.stages(arxiv_id):
+                async with metrics.waiting("parse", self.parse_slots):
+                    text = await asyncio.to_thread(PDFUtils.read_and_clean_pdf, pdf_path)
+                summary = asyncio.create_task(
+                    self._ask(PromptService.create_summary_prompt(text), max_tokens=SUMMARY_MAX_TOKENS),
+                )
+
+            # Links are extracted while the summary streams
+            try:
+                async with metrics.waiting("parse", self.parse_slots):
+                    doc_links = await asyncio.to_thread(PDFUtils.extract_links_from_pdf, pdf_path)
+                if summary is not None:
+                    self._record_stage(arxiv_id, "summary", await summary)
+            finally:
+                if summary is not None and not summary.done():
+                    summary.cancel()
+            self._commit(arxiv_id, doc_links, self.state.stages(arxiv_id)["summary"])
 
         except Exception:
-            logger.exception("Failed processing %s", current_id)
-            state.data["queue"].insert(0, current_id)
-            state.save()
-            break
+            logger.exception("Failed processing %s", arxiv_id)
+            self.state.release(arxiv_id)
+            self.stopping = True
+        finally:
+            self.budget.finish()
+
+    async def _judge(self, arxiv_id: str, pdf_path: Path) -> bool:
+        """
+        Record the relevance verdict of a paper, and its summary if one LLM call produced both.
+
+        The full text is only read and sent for papers whose abstract passes. The structured answer then has the
+        final say, since it saw the whole paper; a malformed one keeps the abstract verdict.
+
+        Returns:
+            bool: False if the paper is unreadable.
+
+        """
+        async with metrics.waiting("parse", self.parse_slots):
+            abstract = await asyncio.to_thread(PDFUtils.read_abstract, pdf_path)
+        if not abstract:
+            logger.warning("No text on the first page of %s", arxiv_id)
+            return False
+
+        if self.prefilter:
+            verdict = await asyncio.to_thread(self.prefilter.decide, arxiv_id, abstract)
+            if verdict is not None:
+                if not verdict:
+                    self.prefilter.count_saved_calls(1)
+                self._record_stage(arxiv_id, "relevant", verdict)
+                return True
+
+        verdict = await self._ask(
+            PromptService.create_abstract_relevance_prompt(abstract), max_tokens=VERDICT_MAX_TOKENS,
+            stop=stop_at_verdict,
+        )
+        relevant = is_positive_answer(verdict)
+        if relevant:
+            relevant = await self._judge_full_text(arxiv_id, pdf_path)
+
+        if self.prefilter:
+            await asyncio.to_thread(self.prefilter.record, arxiv_id, abstract, relevant=relevant)
+        self._record_stage(arxiv_id, "relevant", relevant)
+        return True
+
+    async def _judge_full_text(self, arxiv_id: str, pdf_path: Path) -> bool:
+        """
+        Check a paper that passed on its abstract against its full text, recording the summary if one is produced.
+
+        Returns:
+            bool: The verdict of the structured answer, or True if it is malformed.
+
+        """
+        async with metrics.waiting("parse", self.parse_slots):
+            text = await asyncio.to_thread(PDFUtils.read_and_clean_pdf, pdf_path)
+        # The verdict comes first in the answer, so a rejection ends the stream before any summary is generated
+        response = await self._ask(
+            PromptService.create_summary_relevance_prompt(text),
+            max_tokens=SUMMARY_MAX_TOKENS,
+            stop=lambda answer: SUMMARY_REJECTION_PATTERN.search(answer) is not None,
+        )
+        if SUMMARY_REJECTION_PATTERN.search(response):
+            result = {"relevant": False, "summary": ""}
+        else:
+            result = LLMService.parse_structured_response(response, SUMMARY_RELEVANCE_SCHEMA)
+
+        if result is None:
+            logger.info("Keeping the abstract verdict of %s after a malformed answer", arxiv_id)
+            return True
+        if result["relevant"] and result["summary"].strip():
+            self.state.record_stage(arxiv_id, "summary", result["summary"].strip())
+        return result["relevant"]
+
+    async def _ask(self, prompt: str, *, max_tokens: int, stop: StopCondition | None = None) -> str:
+        """Stream a prompt to the LLM, counting it against the budget."""
+        self.budget.charge_llm_call()
+        async with metrics.waiting("llm", self.llm_slots):
+            return await self.llm.stream_llm_response(prompt, 0.8, max_tokens=max_tokens, stop=stop)
+
+    def _record_stage(self, arxiv_id: str, stage: str, result: Any) -> None:  # noqa: ANN401
+        """Memoize a stage result and commit it, so a crash does not lose the LLM call behind it."""
+        self.state.record_stage(arxiv_id, stage, result)
+        self.state.save()
+
+    def _drop(self, arxiv_id: str) -> None:
+        """Remove a paper that could not be downloaded or read from the queue."""
+        self.state.drop(arxiv_id)
+        self.state.save()
+
+    def _commit(self, arxiv_id: str, doc_links: dict[str, list[str]] | None = None, summary: str = "") -> None:
+        """Mark a paper processed; a relevant paper, given with its links, is added to the graph with its references."""
+        if doc_links is None:
+            logger.info("Skipped irrelevant paper: %s", arxiv_id)
+        else:
+            for new_id in dict.fromkeys(normalize_arxiv_id(new_id) for new_id in doc_links.get("arxiv", [])):
+                self.state.add_citation(new_id)
+            self.links.add_document(arxiv_id, doc_links, summary)
+            logger.info("Added relevant paper: %s", arxiv_id)
+
+        self.state.complete(arxiv_id)
+        self.state.save()
+        self.links.save()
+
+def process_queue(
+        state: ResearchState,
+        links: DocumentLinks,
+        mode: CrawlMode = CrawlMode.FIFO,
+        budget: CrawlBudget | None = None,
+        prefilter: RelevanceFilter | None = None,
+) -> None:
+    """
+    Process the queue of arXiv IDs.
+
+    Args:
+        state (ResearchState): The research state.
+        links (DocumentLinks): The document links.
+        mode (CrawlMode): FIFO discovery order, or best-first by the number of relevant papers citing an ID.
+        budget (CrawlBudget | None): Limits of the run; unlimited if None.
+        prefilter (RelevanceFilter | None): Local classifier deciding confident relevance checks.
 
-def process_pdfs(state: ResearchState, links: DocumentLinks) -> None:
+    """
+    if mode is CrawlMode.PRIORITY:
+        state.prioritize(links.citation_counts())
+    asyncio.run(CrawlEngine(state, links, budget=budget, prefilter=prefilter).run())
+
+def process_pdfs(
+        state: ResearchState,
+        links: DocumentLinks,
+        mode: CrawlMode = CrawlMode.FIFO,
+        budget: CrawlBudget | None = None,
+        prefilter: RelevanceFilter | None = None,
+) -> None:
     """
     Process PDFs and update the research state and document links.
 
     Args:
         state (ResearchState): The research state.
         links (DocumentLinks): The document links.
+        mode (CrawlMode): Order in which the queue is crawled.
+        budget (CrawlBudget | None): Limits of the crawl; unlimited if None.
+        prefilter (RelevanceFilter | None): Local classifier deciding confident relevance checks.
 
     """
     state.load()
@@ -125,7 +463,7 @@ def process_pdfs(state: ResearchState, links: DocumentLinks) -> None:
     state.save()
     links.save()
 
-    process_queue(state, links)
+    process_queue(state, links, mode, budget, prefilter)
 
 if __name__ == "__main__":
     logging.basicConfig(
@@ -140,15 +478,32 @@ if __name__ == "__main__":
     Path("to research").mkdir(exist_ok=True)
     Path("research").mkdir(exist_ok=True)
 
-    state = ResearchState()
+    seen_capacity = os.environ.get(CRAWL_SEEN_CAPACITY_ENV)
+    state = ResearchState(seen_capacity=int(seen_capacity) if seen_capacity else None)
     links = DocumentLinks()
-    setup_signal_handler(state, links)
+    prefilter = RelevanceFilter()
+    prefilter.load()
+    setup_signal_handler(state, links, prefilter)
+    llm_cache = LLMService.configure_cache()
+    metrics.reset()
 
     try:
-        process_pdfs(state, links)
+        process_pdfs(
+            state,
+            links,
+            CrawlMode(os.environ.get(CRAWL_MODE_ENV, CrawlMode.FIFO.value)),
+            CrawlBudget.from_env(),
+            prefilter,
+        )
         logger.info("Processing completed successfully")
     except Exception:
         logger.exception("Fatal error")
     finally:
         state.save()
-        links.save()
+        links.export_json()
+        export_graph(links)
+        prefilter.save()
+        prefilter.log_stats()
+        llm_cache.log_stats()
+        metrics.log_summary()
+        metrics.export()
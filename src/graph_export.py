@@ -0,0 +1,205 @@
+"""
+Export of the citation graph for the ``index.html`` viewer.
+
+``graph/graph.json`` holds only what the viewer needs to draw: node IDs and titles as columns, edges as a flat
+list of integer node indices, the degree of every node, and the analytics of ``utils.graph_analytics``: a
+precomputed layout in [-1, 1], PageRank, in-degree and the connected component. Nodes are sorted by degree and
+edges by the smaller degree of their endpoints, both descending, so the nodes and edges visible at a "Min Links"
+setting are prefixes whose lengths are precomputed in ``node_cutoffs`` and ``edge_cutoffs``. Summaries go to
+``graph/summaries/<shard>.json`` files of ``SHARD_SIZE`` nodes each, which the viewer fetches on hover.
+
+Usage:
+    python src/graph_export.py [--out graph]
+"""
+
+import argparse
+import json
+import logging
+import re
+from pathlib import Path
+from typing import Any, NamedTuple
+
+import numpy as np
+
+from DAO.document_links import DocumentLinks
+from utils.graph_analytics import connected_components, force_layout, in_degree, pagerank
+
+GRAPH_DIR = Path("graph")
+GRAPH_FILE = "graph.json"
+SUMMARY_DIR = "summaries"
+SHARD_SIZE = 64  # Summaries per side file
+MAX_FILTER = 20  # Highest "Min Links" setting of the viewer
+TITLE_PATTERN = re.compile(r"Title([^\n]+)", re.IGNORECASE)
+UNTITLED = "Untitled Article"
+
+logger = logging.getLogger(__name__)
+
+
+class CitationGraph(NamedTuple):
+    """Citation graph between stored papers, with nodes sorted by degree."""
+
+    ids: list[str]
+    titles: list[str]
+    summaries: list[str]
+    degrees: list[int]
+    edges: list[tuple[int, int]]
+
+
+def extract_title(summary: str) -> str:
+    """
+    Read the title line of a generated summary.
+
+    Args:
+        summary: Summary text with a ``**Title:**`` line.
+
+    Returns:
+        The title without markup, or ``UNTITLED``.
+
+    """
+    match = TITLE_PATTERN.search(summary)
+    if not match:
+        return UNTITLED
+    title = match[1].replace(":**", "").replace("**:", "").replace('"', "").strip()
+    return title or UNTITLED
+
+
+def build_graph(links_data: dict[str, dict[str, Any]]) -> CitationGraph:
+    """
+    Build the graph of arXiv citations between stored papers.
+
+    Args:
+        links_data: Document links and summaries keyed by arXiv ID.
+
+    Returns:
+        The graph; self-citations, duplicate edges and citations of papers outside the store are dropped.
+
+    """
+    edge_ids = {
+        (source, target)
+        for source, document in links_data.items()
+        for target in document.get("links", {}).get("arxiv", [])
+        if target != source and target in links_data
+    }
+    degree = dict.fromkeys(links_data, 0)
+    for source, target in edge_ids:
+        degree[source] += 1
+        degree[target] += 1
+
+    ids = sorted(links_data, key=lambda node_id: (-degree[node_id], node_id))
+    position = {node_id: index for index, node_id in enumerate(ids)}
+    degrees = [degree[node_id] for node_id in ids]
+    edges = sorted(
+        ((position[source], position[target]) for source, target in edge_ids),
+        key=lambda edge: (-min(degrees[edge[0]], degrees[edge[1]]), edge),
+    )
+    summaries = [links_data[node_id].get("summary", "") for node_id in ids]
+    return CitationGraph(ids, [extract_title(summary) for summary in summaries], summaries, degrees, edges)
+
+
+def cutoffs(thresholds: list[int], max_filter: int = MAX_FILTER) -> list[int]:
+    """
+    Count the items of a descending threshold list that pass every filter value.
+
+    Args:
+        thresholds: Per-item thresholds, sorted in descending order.
+        max_filter: Highest filter value.
+
+    Returns:
+        For every filter value from 0 to ``max_filter``, the length of the prefix with thresholds at least that value.
+
+    """
+    counts = []
+    visible = len(thresholds)
+    for minimum in range(max_filter + 1):
+        while visible and thresholds[visible - 1] < minimum:
+            visible -= 1
+        counts.append(visible)
+    return counts
+
+
+def graph_payload(graph: CitationGraph) -> dict[str, Any]:
+    """
+    Build the JSON document read by the viewer.
+
+    Args:
+        graph: The citation graph.
+
+    Returns:
+        Columns of node data with layout positions and centrality, the flat edge list and the filter cutoffs.
+
+    """
+    edge_thresholds = [min(graph.degrees[source], graph.degrees[target]) for source, target in graph.edges]
+    node_count = len(graph.ids)
+    edges = np.array(graph.edges, dtype=np.int64).reshape(-1, 2)
+    sources, targets = edges[:, 0], edges[:, 1]
+    positions = force_layout(node_count, sources, targets)
+    return {
+        "version": 2,
+        "shard_size": SHARD_SIZE,
+        "nodes": {
+            "id": graph.ids,
+            "title": graph.titles,
+            "degree": graph.degrees,
+            "in_degree": in_degree(node_count, targets).tolist(),
+            "pagerank": [float(f"{rank:.4g}") for rank in pagerank(node_count, sources, targets)],
+            "component": connected_components(node_count, sources, targets).tolist(),
+            "x": np.round(positions[:, 0], 4).tolist(),
+            "y": np.round(positions[:, 1], 4).tolist(),
+        },
+        "edges": [index for edge in graph.edges for index in edge],
+        "node_cutoffs": cutoffs(graph.degrees),
+        "edge_cutoffs": cutoffs(edge_thresholds),
+    }
+
+
+def _write_json(path: Path, data: object) -> None:
+    """Write compact JSON atomically."""
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    tmp_path.write_text(json.dumps(data, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+    tmp_path.replace(path)
+
+
+def export_graph(links: DocumentLinks, out_dir: Path = GRAPH_DIR) -> Path | None:
+    """
+    Write the graph file and the summary shards.
+
+    Args:
+        links: Stored document links and summaries.
+        out_dir: Output directory.
+
+    Returns:
+        The written graph file, or None if the export failed.
+
+    """
+    try:
+        graph = build_graph(links.links_data)
+        summary_dir = out_dir / SUMMARY_DIR
+        summary_dir.mkdir(parents=True, exist_ok=True)
+
+        shards = range(0, len(graph.ids), SHARD_SIZE)
+        for number, start in enumerate(shards):
+            _write_json(summary_dir / f"{number}.json", graph.summaries[start:start + SHARD_SIZE])
+        for stale in summary_dir.glob("*.json"):
+            if not stale.stem.isdigit() or int(stale.stem) >= len(shards):
+                stale.unlink()
+
+        graph_file = out_dir / GRAPH_FILE
+        _write_json(graph_file, graph_payload(graph))
+    except Exception:
+        logger.exception("Error exporting graph to %s", out_dir)
+        return None
+    logger.info("Exported graph of %d nodes and %d edges to %s", len(graph.ids), len(graph.edges), graph_file)
+    return graph_file
+
+
+def main() -> None:
+    """Parse the command line and export the graph of ``document_links.json``."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--out", type=Path, default=GRAPH_DIR, help="Output directory")
+    args = parser.parse_args()
+    export_graph(DocumentLinks(), args.out)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    main()
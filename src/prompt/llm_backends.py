@@ -0,0 +1,247 @@
+"""
+Pool of OpenAI-compatible inference servers behind the LLM calls.
+
+Every request goes to the healthy backend with the fewest outstanding requests that is below its concurrency
+limit, and is sent with the model name of that backend. The limit of every backend adapts to its latency
+(``utils.adaptive_limit``): it grows while requests complete as fast as ever, up to the configured cap, and
+backs off on timeouts, overload responses and latency spikes, so the pool settles at the throughput each
+server can actually sustain. It is exported as the ``llm_concurrency_limit`` gauge. A backend that fails
+``EJECT_AFTER_FAILURES`` requests in a row is ejected; a background thread then probes its ``/models``
+endpoint every ``HEALTH_CHECK_INTERVAL`` seconds and puts it back as soon as it answers. Backends are listed
+in ``LLM_BACKENDS`` as comma-separated ``url|model|concurrency`` entries, where model and concurrency may be
+left out:
+
+    LLM_BACKENDS="http://gpu1:1234/v1/chat/completions|mistral-nemo-instruct-2407|4,http://gpu2:8080/v1/chat/completions"
+"""
+
+import logging
+import os
+import threading
+import time
+from collections.abc import Sequence
+
+import httpx
+
+from utils.adaptive_limit import AdaptiveLimit
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+LLM_BACKENDS_ENV = "LLM_BACKENDS"
+BACKEND_CONCURRENCY = 16  # Cap of the adaptive limit per backend unless configured
+EJECT_AFTER_FAILURES = 3  # Consecutive failed requests that eject a backend
+HEALTH_CHECK_INTERVAL = 10.0  # Seconds between probes of an ejected backend
+HEALTH_CHECK_TIMEOUT = 5.0  # Seconds per probe
+
+
+class Backend:
+    """One inference server with its live request accounting."""
+
+    def __init__(self, url: str, model: str, concurrency: int = BACKEND_CONCURRENCY) -> None:
+        """
+        Initialize the backend.
+
+        Args:
+            url: Chat completions endpoint.
+            model: Model name sent to this server.
+            concurrency: Cap of the adaptive limit on requests in flight on this server.
+
+        """
+        self.url = url
+        self.model = model
+        self.concurrency = concurrency
+        self.limit = AdaptiveLimit(concurrency)
+        self.in_flight = 0
+        self.failures = 0  # Consecutive failed requests
+        self.healthy = True
+
+    @property
+    def health_url(self) -> str:
+        """Model list endpoint next to the chat completions endpoint, cheap for any live server to answer."""
+        return f"{self.url.removesuffix('/').removesuffix('/chat/completions')}/models"
+
+    def __repr__(self) -> str:
+        """Describe the backend for logs."""
+        return f"Backend({self.url!r}, {self.model!r}, {self.concurrency})"
+
+
+class BackendPool:
+    """
+    Least-outstanding-requests balancer over inference servers, with passive ejection and active recovery.
+
+    The pool is thread-safe and not bound to an event loop, so the synchronous service and every async client
+    of the process share one view of the backends.
+    """
+
+    def __init__(
+            self,
+            backends: Sequence[Backend],
+            eject_after: int = EJECT_AFTER_FAILURES,
+            check_interval: float = HEALTH_CHECK_INTERVAL,
+    ) -> None:
+        """
+        Initialize the pool.
+
+        Args:
+            backends: The servers to balance over.
+            eject_after: Consecutive failed requests that eject a backend.
+            check_interval: Seconds between probes of an ejected backend.
+
+        Raises:
+            ValueError: If no backend is given.
+
+        """
+        if not backends:
+            msg = "A backend pool needs at least one backend"
+            raise ValueError(msg)
+        self.backends = list(backends)
+        self.eject_after = eject_after
+        self.check_interval = check_interval
+        self._condition = threading.Condition()
+        self._checker: threading.Thread | None = None
+
+    @classmethod
+    def from_spec(cls, spec: str, default_model: str, default_concurrency: int = BACKEND_CONCURRENCY) -> "BackendPool":
+        """
+        Build a pool from ``url|model|concurrency`` entries separated by commas.
+
+        Args:
+            spec: The backend list.
+            default_model: Model of entries that name none.
+            default_concurrency: Concurrency cap of entries that set none.
+
+        Returns:
+            The pool.
+
+        """
+        backends = []
+        for entry in filter(None, (entry.strip() for entry in spec.split(","))):
+            url, model, concurrency = (part.strip() for part in [*entry.split("|"), "", ""][:3])
+            backends.append(Backend(url, model or default_model, int(concurrency or default_concurrency)))
+        return cls(backends)
+
+    @classmethod
+    def from_env(cls, default_url: str, default_model: str, default_concurrency: int) -> "BackendPool":
+        """Build the pool from ``LLM_BACKENDS``, or of the single default server when it is not set."""
+        spec = os.environ.get(LLM_BACKENDS_ENV, "")
+        if spec.strip():
+            pool = cls.from_spec(spec, default_model)
+            logger.info("Balancing LLM requests over %d backends", len(pool))
+            return pool
+        return cls([Backend(default_url, default_model, default_concurrency)])
+
+    def __len__(self) -> int:
+        """Return the number of backends, healthy or not."""
+        return len(self.backends)
+
+    @property
+    def models(self) -> list[str]:
+        """Distinct model names of the backends, in pool order."""
+        return list(dict.fromkeys(backend.model for backend in self.backends))
+
+    @property
+    def capacity(self) -> int:
+        """Requests the healthy backends accept in flight at most, whatever their adaptive limits."""
+        with self._condition:
+            return sum(backend.concurrency for backend in self.backends if backend.healthy)
+
+    @property
+    def limit(self) -> int:
+        """Requests the healthy backends accept in flight now."""
+        with self._condition:
+            return sum(backend.limit.current for backend in self.backends if backend.healthy)
+
+    def try_acquire(self) -> Backend | None:
+        """Take a slot on the least loaded healthy backend, or return None if none is free."""
+        with self._condition:
+            return self._pick()
+
+    def acquire(self, timeout: float | None = None) -> Backend | None:
+        """
+        Take a slot on the least loaded healthy backend, waiting for one to free up or recover.
+
+        Args:
+            timeout: Seconds to wait at most; None waits indefinitely.
+
+        Returns:
+            The backend, which must be handed back to ``release``, or None on timeout.
+
+        """
+        with self._condition:
+            return self._condition.wait_for(self._pick, timeout)
+
+    def release(self, backend: Backend, sent_at: float, *, tokens: float | None = None, failed: bool = False) -> None:
+        """
+        Hand back a slot taken by ``acquire`` and adapt the limit of the backend to the request.
+
+        Args:
+            backend: The backend the request went to.
+            sent_at: ``time.monotonic()`` when the request was sent.
+            tokens: Work of a completed request in generated-token equivalents; its latency per token is the
+                sample of the adaptive limit. None if the request carries no sample.
+            failed: Whether the server failed the request (timeout, transport error or retryable status); it
+                cuts the limit, and enough failures in a row eject the backend.
+
+        """
+        latency = (time.monotonic() - sent_at) / max(tokens, 1) if tokens is not None else None
+        with self._condition:
+            limit = backend.limit.update(latency, backend.in_flight, sent_at, dropped=failed)
+            metrics.set("llm_concurrency_limit", limit, backend=backend.url)
+            metrics.set("stage_limit", sum(item.limit.current for item in self.backends if item.healthy), stage="llm")
+            backend.in_flight -= 1
+            backend.failures = backend.failures + 1 if failed else 0
+            if failed:
+                metrics.inc("llm_backend_failures_total", backend=backend.url)
+            if backend.healthy and backend.failures >= self.eject_after:
+                self._eject(backend)
+            self._condition.notify_all()
+
+    def _pick(self) -> Backend | None:
+        """Take a slot on the free healthy backend with the fewest outstanding requests; call with the lock held."""
+        free = [backend for backend in self.backends if backend.healthy and backend.in_flight < backend.limit.current]
+        if not free:
+            return None
+        backend = min(free, key=lambda candidate: candidate.in_flight)
+        backend.in_flight += 1
+        metrics.inc("llm_backend_requests_total", backend=backend.url)
+        return backend
+
+    def _eject(self, backend: Backend) -> None:
+        """Take a backend out of rotation and make sure it is probed; call with the lock held."""
+        backend.healthy = False
+        metrics.inc("llm_backend_ejections_total", backend=backend.url)
+        logger.warning("LLM backend %s ejected after %d failed requests", backend.url, backend.failures)
+        if self._checker is None:
+            self._checker = threading.Thread(target=self._check_health, name="llm-health-check", daemon=True)
+            self._checker.start()
+
+    def _recover(self, backend: Backend) -> None:
+        """Put a backend back into rotation."""
+        with self._condition:
+            backend.healthy = True
+            backend.failures = 0
+            self._condition.notify_all()
+        logger.info("LLM backend %s recovered", backend.url)
+
+    @staticmethod
+    def probe(client: httpx.Client, backend: Backend) -> bool:
+        """Check whether a backend answers its model list."""
+        try:
+            client.get(backend.health_url).raise_for_status()
+        except httpx.HTTPError:
+            return False
+        return True
+
+    def _check_health(self) -> None:
+        """Probe the ejected backends until every one of them has recovered."""
+        with httpx.Client(timeout=HEALTH_CHECK_TIMEOUT) as client:
+            while True:
+                time.sleep(self.check_interval)
+                with self._condition:
+                    ejected = [backend for backend in self.backends if not backend.healthy]
+                    if not ejected:
+                        self._checker = None
+                        return
+                for backend in ejected:
+                    if self.probe(client, backend):
+                        self._recover(backend)
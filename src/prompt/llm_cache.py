@@ -0,0 +1,192 @@
+"""
+Persistent content-addressed cache for LLM responses.
+
+Responses are stored in SQLite under a hash of the model, prompt, temperature and max_tokens, so reruns
+over the same inputs never reach the model. The store is bounded in size and evicts least recently used
+entries first.
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from enum import Enum
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_FILE = Path("llm_cache.sqlite")
+MAX_CACHE_BYTES = 512 * 1024 * 1024
+LLM_CACHE_MODE_ENV = "LLM_CACHE_MODE"
+
+
+class CacheMode(Enum):
+    """How a run uses the response cache."""
+
+    READ_ONLY = "read-only"
+    WRITE_THROUGH = "write-through"
+    BYPASS = "bypass"
+
+
+class LLMCache:
+    """SQLite-backed LRU cache of LLM responses with hit/miss accounting."""
+
+    def __init__(
+            self,
+            path: Path = LLM_CACHE_FILE,
+            mode: CacheMode = CacheMode.WRITE_THROUGH,
+            max_bytes: int = MAX_CACHE_BYTES,
+    ) -> None:
+        """
+        Open the cache.
+
+        Args:
+            path: SQLite database file.
+            mode: Read-only, write-through or bypass.
+            max_bytes: Upper bound for the total size of stored responses.
+
+        """
+        self.path = path
+        self.mode = mode
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self.saved_seconds = 0.0
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._total_bytes = 0
+
+        if mode is CacheMode.BYPASS:
+            return
+        if mode is CacheMode.READ_ONLY and not path.exists():
+            logger.warning("LLM cache %s does not exist, running without cache", path)
+            return
+
+        uri = f"file:{path}?mode=ro" if mode is CacheMode.READ_ONLY else f"file:{path}"
+        self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        if mode is CacheMode.WRITE_THROUGH:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL, "
+                "latency REAL NOT NULL, last_access REAL NOT NULL)",
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_access)")
+            self._conn.commit()
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def make_key(payload: dict[str, Any]) -> str:
+        """
+        Build the cache key of a chat completion request.
+
+        Args:
+            payload: Request body with model, messages, temperature and max_tokens.
+
+        Returns:
+            Hex digest identifying the request.
+
+        """
+        material = [payload["model"], payload["messages"], payload["temperature"], payload["max_tokens"]]
+        return hashlib.sha256(json.dumps(material, ensure_ascii=False).encode()).hexdigest()
+
+    def get(self, *keys: str) -> str | None:
+        """
+        Look up a cached response, counting one hit or miss.
+
+        Args:
+            keys: Cache keys from ``make_key``; alternative keys of one request are tried in order.
+
+        Returns:
+            The cached response, or None on a miss.
+
+        """
+        if self._conn is None:
+            return None
+
+        with self._lock:
+            for key in keys:
+                row = self._conn.execute("SELECT response, latency FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    break
+            else:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self.saved_seconds += row[1]
+            if self.mode is CacheMode.WRITE_THROUGH:
+                self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+                self._conn.commit()
+            return row[0]
+
+    def put(self, key: str, response: str, latency: float) -> None:
+        """
+        Store a response, evicting least recently used entries beyond the size bound.
+
+        Args:
+            key: Cache key from ``make_key``.
+            response: Generated response.
+            latency: Seconds the model needed for the response.
+
+        """
+        if self._conn is None or self.mode is not CacheMode.WRITE_THROUGH:
+            return
+
+        size = len(response.encode())
+        with self._lock:
+            previous = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, latency, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, response, size, latency, time.time()),
+            )
+            self._total_bytes += size - (previous[0] if previous else 0)
+            self.writes += 1
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """Delete least recently used entries until the store fits into ``max_bytes``."""
+        while self._total_bytes > self.max_bytes:
+            rows = self._conn.execute("SELECT key, size FROM responses ORDER BY last_access LIMIT 64").fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if self._total_bytes <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._total_bytes -= size
+                self.evictions += 1
+
+    def stats(self) -> dict[str, Any]:
+        """Return hit/miss counters and the model time saved by hits."""
+        lookups = self.hits + self.misses
+        return {
+            "mode": self.mode.value,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "saved_gpu_minutes": self.saved_seconds / 60,
+            "size_bytes": self._total_bytes,
+        }
+
+    def log_stats(self) -> None:
+        """Log a one-line summary of the cache statistics."""
+        stats = self.stats()
+        logger.info(
+            "LLM cache (%s): %d hits, %d misses (%.1f%% hit rate), %d writes, %d evictions, %.1f GPU-minutes saved",
+            stats["mode"], stats["hits"], stats["misses"], stats["hit_rate"] * 100,
+            stats["writes"], stats["evictions"], stats["saved_gpu_minutes"],
+        )
+
+    def close(self) -> None:
+        """Close the database connection."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
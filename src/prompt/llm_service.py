@@ -1,45 +1,904 @@
-"""Module for interacting with the LLM service using the Mistral model."""
+"""
+Module for interacting with the LLM service using the Mistral model.
 
+Responses are requested whole, or streamed as server-sent events. A stream hands every text delta to an
+optional callback as it arrives, and a stop condition closes the connection as soon as the text received so
+far settles the answer, which makes the server cancel the rest of the generation. Requests are balanced over
+the inference servers of ``LLMService.backends()`` under a concurrency limit per server that adapts to the
+latency per token, and every retry picks a backend again, so a failing server is routed around.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
 import logging
-from typing import Any
+import os
+import random
+import re
+import time
+from collections.abc import Awaitable, Callable, Sequence
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
 import httpx
+import numpy as np
+
+from prompt.llm_backends import Backend, BackendPool
+from prompt.llm_cache import LLM_CACHE_FILE, LLM_CACHE_MODE_ENV, CacheMode, LLMCache
+from utils.chunking import estimate_tokens
+from utils.metrics import metrics
+
+if TYPE_CHECKING:
+    from typing_extensions import Self
 
 logger = logging.getLogger(__name__)
 LLM_URL = "http://localhost:1234/v1/chat/completions"
+LLM_MODEL = "mistral-nemo-instruct-2407"
+MAX_TOKENS = 10000
+MODEL_CONTEXT_WINDOW = 32768
+EMBEDDING_URL = "http://localhost:1234/v1/embeddings"
+EMBEDDING_MODEL = "text-embedding-nomic-embed-text-v1.5"
+EMBEDDING_BATCH_SIZE = 32  # Texts per embeddings request
+EMBEDDING_CONCURRENCY = 2  # Embeddings requests in flight
+
+REQUEST_TIMEOUT = 120.0  # Seconds per attempt
+REQUEST_DEADLINE = 600.0  # Seconds per request from the time it gets a slot, retries included
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0  # Seconds before the first retry
+BACKOFF_MAX = 30.0  # Upper bound for a single backoff delay
+POOL_SIZE = 16  # Pooled connections and requests in flight
+PROMPT_TOKEN_WEIGHT = 0.1  # Prefill cost of a prompt token relative to generating one
+BACKEND_POLL_INTERVAL = 0.05  # Seconds between checks for a free backend while all are busy or ejected
+BACKEND_WAIT_TIMEOUT = 600.0  # Seconds an attempt waits for a free backend; not counted against the deadline
+RETRY_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+VERDICT_PATTERN = re.compile(r"^[\W_]*(yes|no|да|нет)(?=[\W_])", re.IGNORECASE)
+POSITIVE_VERDICTS = frozenset({"yes", "да"})
+
+StopCondition = Callable[[str], bool]
+TextCallback = Callable[[str], None]
+Attempt = Callable[[Backend, float], tuple[str, float]]  # One try of a request on a backend within a timeout
+AsyncAttempt = Callable[[Backend, float], Awaitable[tuple[str, float]]]
+Reply = tuple[str, str]  # Response text and the model that generated it
+
+
+def _build_payload(prompt: str, temperature: float, max_tokens: int = MAX_TOKENS) -> dict[str, Any]:
+    """Build the chat completion request body."""
+    return {
+        "model": LLM_MODEL,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+    }
+
+
+def _parse_response(response_data: dict[str, Any]) -> str:
+    """Extract the message content from a chat completion response."""
+    if response_data.get("choices"):
+        return response_data["choices"][0]["message"]["content"].strip()
+    logger.error("Unexpected response structure: %s", response_data)
+    return ""
+
+
+def _record_tokens(data: dict[str, Any], usage: dict[str, Any] | None, content: str) -> float:
+    """
+    Record the token usage of a chat completion, estimated from the texts if the server reports none.
+
+    Returns:
+        The work of the request in generated-token equivalents, which normalizes its latency.
+
+    """
+    usage = usage or {}
+    prompt_tokens = usage.get("prompt_tokens") or estimate_tokens(data["messages"][-1]["content"])
+    completion_tokens = usage.get("completion_tokens") or estimate_tokens(content)
+    metrics.observe("llm_prompt_tokens", prompt_tokens)
+    metrics.observe("llm_completion_tokens", completion_tokens)
+    return completion_tokens + PROMPT_TOKEN_WEIGHT * prompt_tokens
+
+
+class _StreamedText:
+    """Text of a streamed chat completion, assembled from server-sent event lines."""
+
+    def __init__(self, data: dict[str, Any], stop: StopCondition | None, on_text: TextCallback | None) -> None:
+        """Start an empty stream of the given request."""
+        self.data = data
+        self.stop = stop
+        self.on_text = on_text
+        self.parts: list[str] = []
+        self.usage: dict[str, Any] | None = None
+        self.tokens = 0.0
+        self.started = time.monotonic()
+
+    @property
+    def text(self) -> str:
+        """Text received so far."""
+        return "".join(self.parts)
+
+    def feed(self, line: str) -> bool:
+        """
+        Consume one line of the event stream.
+
+        Returns:
+            True once the stream is complete or the stop condition accepts the text, so reading can end.
+
+        """
+        if not line.startswith("data:"):
+            return False
+        payload = line.removeprefix("data:").strip()
+        if payload == "[DONE]":
+            return True
+        event = json.loads(payload)
+        self.usage = event.get("usage") or self.usage
+        for choice in event.get("choices") or []:
+            delta = (choice.get("delta") or {}).get("content")
+            if not delta:
+                continue
+            if not self.parts:
+                metrics.observe("llm_first_token_seconds", time.monotonic() - self.started)
+            self.parts.append(delta)
+            if self.on_text:
+                self.on_text(delta)
+        if self.stop and self.parts and self.stop(self.text):
+            metrics.inc("llm_stream_stops_total")
+            return True
+        return False
+
+    def finish(self) -> str:
+        """Record the token usage and return the text."""
+        text = self.text.strip()
+        self.tokens = _record_tokens(self.data, self.usage, text)
+        return text
+
+
+class _StopTracker:
+    """Stop condition of a request that remembers whether it cut the stream short."""
+
+    def __init__(self, stop: StopCondition) -> None:
+        """Wrap a stop condition."""
+        self.stop = stop
+        self.fired = False
+
+    def __call__(self, text: str) -> bool:
+        """Check the text received so far."""
+        self.fired = self.fired or self.stop(text)
+        return self.fired
+
+
+def stop_at_verdict(text: str) -> bool:
+    """Stop condition of a streamed yes/no answer: the verdict word is complete."""
+    return LLMService.parse_verdict(text, complete=False) is not None
+
+
+def _cache_keys(data: dict[str, Any], backends: BackendPool) -> list[str]:
+    """
+    Build the cache keys of a request for every model it may be sent to.
+
+    A response is stored under the model of the backend that generated it, so pools of different models never
+    serve each other's answers.
+    """
+    return [LLMCache.make_key({**data, "model": model}) for model in backends.models] if LLMService.cache else []
+
+
+def _is_transient(error: Exception) -> bool:
+    """Check whether a failed request is worth retrying."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRY_STATUS_CODES
+    return isinstance(error, httpx.TransportError)
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Return a full-jitter exponential backoff delay for the given attempt."""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))  # noqa: S311
+
+
+class _InterruptedStreamError(Exception):
+    """A stream failed after text arrived; a retry would hand the same text to the callback again."""
+
+
+def _is_backend_failure(error: Exception) -> bool:
+    """Check whether a failed attempt counts against the backend that served it."""
+    return _is_transient(error.__cause__ if isinstance(error, _InterruptedStreamError) else error)
+
+
+def _retry_delay(error: Exception, attempt: int, max_retries: int, expires_at: float, what: str) -> float | None:
+    """
+    Decide whether a failed attempt is retried.
+
+    Args:
+        error: The error of the attempt.
+        attempt: Number of the attempt, starting at 0.
+        max_retries: Maximum number of retries after the first attempt.
+        expires_at: ``time.monotonic()`` deadline of the request.
+        what: Name of the request in logs.
+
+    Returns:
+        The backoff delay before the next attempt, or None if the request has failed for good.
+
+    """
+    if not _is_transient(error) or attempt == max_retries:
+        return None
+    delay = min(_backoff_delay(attempt), max(expires_at - time.monotonic(), 0))
+    logger.warning("%s failed (%s), retry %d in %.1fs", what, error, attempt + 1, delay)
+    return delay
+
+
+class AsyncLLMClient:
+    """
+    Asynchronous LLM client on top of a persistent ``httpx.AsyncClient`` connection pool.
+
+    Transient errors are retried with jittered exponential backoff until the per-request deadline runs out.
+    The client is bound to the event loop it was opened on, so use it as an async context manager.
+    """
+
+    def __init__(
+            self,
+            url: str | None = None,
+            concurrency: int = POOL_SIZE,
+            timeout: float = REQUEST_TIMEOUT,
+            deadline: float = REQUEST_DEADLINE,
+            max_retries: int = MAX_RETRIES,
+    ) -> None:
+        """
+        Initialize the client.
+
+        Args:
+            url: Single chat completions endpoint; the shared ``LLMService.backends()`` pool by default.
+            concurrency: Maximum number of pooled connections and requests in flight.
+            timeout: Timeout of a single attempt in seconds.
+            deadline: Time budget of a request in seconds, retries included, counted from the time it gets a slot.
+            max_retries: Maximum number of retries after the first attempt.
+
+        """
+        self.backends = BackendPool([Backend(url, LLM_MODEL, concurrency)]) if url else LLMService.backends()
+        self.timeout = timeout
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self._slots = asyncio.Semaphore(concurrency)
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+            timeout=timeout,
+        )
+
+    async def __aenter__(self) -> "Self":
+        """Enter the client context."""
+        return self
+
+    async def __aexit__(self, *_: object) -> None:
+        """Close the connection pool."""
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close the connection pool."""
+        await self._client.aclose()
+
+    async def get_llm_response(
+            self,
+            prompt: str,
+            temperature: float = 0.8,
+            deadline: float | None = None,
+            *,
+            max_tokens: int = MAX_TOKENS,
+    ) -> str:
+        """
+        Retrieve a generated response from the LLM.
+
+        Args:
+            prompt: The input text prompt to generate a response for.
+            temperature: Controls randomness in response generation (default: 0.8).
+            deadline: Overrides the client deadline for this request, in seconds.
+            max_tokens: Upper bound of generated tokens for this prompt type.
+
+        Returns:
+            Generated response content as a string, or empty string if every attempt failed.
+
+        """
+        data = _build_payload(prompt, temperature, max_tokens)
+        return await self._cached(
+            data, lambda expires_at: self._with_retries(self._post(data), expires_at, "LLM request"), deadline,
+        )
+
+    async def stream_llm_response(
+            self,
+            prompt: str,
+            temperature: float = 0.8,
+            *,
+            max_tokens: int = MAX_TOKENS,
+            stop: StopCondition | None = None,
+            on_text: TextCallback | None = None,
+    ) -> str:
+        """
+        Stream a generated response from the LLM over server-sent events.
+
+        Args:
+            prompt: The input text prompt to generate a response for.
+            temperature: Controls randomness in response generation (default: 0.8).
+            max_tokens: Upper bound of generated tokens for this prompt type.
+            stop: Called with the text received so far; returning True cancels the rest of the generation, and
+                the text cut short is not cached.
+            on_text: Called with every text delta as it arrives; a cached response is passed whole.
+
+        Returns:
+            The streamed text up to the stop, or empty string if the stream failed.
+
+        """
+        data = _build_payload(prompt, temperature, max_tokens)
+        tracker = _StopTracker(stop) if stop else None
+        return await self._cached(
+            data,
+            lambda expires_at: self._with_retries(self._stream(data, tracker, on_text), expires_at, "LLM stream"),
+            None,
+            on_text,
+            tracker,
+        )
+
+    async def _cached(
+            self,
+            data: dict[str, Any],
+            send: Callable[[float], Awaitable[Reply]],
+            deadline: float | None,
+            on_text: TextCallback | None = None,
+            stop: _StopTracker | None = None,
+    ) -> str:
+        """Answer a request from the cache, or send it in a free slot and cache the response unless ``stop`` cut it."""
+        cache_keys = _cache_keys(data, self.backends)
+        if cache_keys and (cached := LLMService.cache.get(*cache_keys)) is not None:
+            metrics.inc("llm_cache_hits_total")
+            if on_text:
+                on_text(cached)
+            return cached
+
+        async with metrics.waiting("llm", self._slots):
+            # The deadline starts once the request has a slot, so a long queue does not time out its tail
+            sent = time.monotonic()
+            response, model = await send(sent + (deadline or self.deadline))
+            metrics.observe("llm_request_seconds", time.monotonic() - sent)
+        if cache_keys and response and not (stop and stop.fired):
+            LLMService.cache.put(LLMCache.make_key({**data, "model": model}), response, time.monotonic() - sent)
+        return response
+
+    async def _with_retries(self, send: AsyncAttempt, expires_at: float, what: str) -> Reply:
+        """
+        Send a request to free backends, retrying transient errors until ``expires_at``.
+
+        Time spent waiting for a free backend extends the deadline; the wait has its own bound,
+        ``BACKEND_WAIT_TIMEOUT``.
+
+        Args:
+            send: Makes one attempt on a backend within a timeout; returns the text and the work of the request
+                in generated-token equivalents.
+            expires_at: ``time.monotonic()`` deadline of the request, retries included.
+            what: Name of the request in logs.
+
+        Returns:
+            The text and the model of the backend that generated it, or empty strings if every attempt failed.
+
+        """
+        for attempt in range(self.max_retries + 1):
+            remaining = expires_at - time.monotonic()
+            if remaining <= 0:
+                break
+            waiting = time.monotonic()
+            backend = await self._acquire(waiting + BACKEND_WAIT_TIMEOUT)
+            if backend is None:
+                break
+            sent = time.monotonic()
+            expires_at += sent - waiting
+            try:
+                with metrics.stage("llm"):
+                    text, tokens = await send(backend, min(self.timeout, remaining))
+            except Exception as error:
+                self.backends.release(backend, sent, failed=_is_backend_failure(error))
+                if (delay := _retry_delay(error, attempt, self.max_retries, expires_at, what)) is None:
+                    logger.exception("%s failed", what)
+                    return "", ""
+                await asyncio.sleep(delay)
+            else:
+                self.backends.release(backend, sent, tokens=tokens)
+                return text, backend.model
+
+        logger.error("%s deadline exceeded", what)
+        return "", ""
+
+    async def _acquire(self, expires_at: float) -> Backend | None:
+        """Take a slot on a backend, polling while all of them are busy or ejected; None past ``expires_at``."""
+        if (backend := self.backends.try_acquire()) is not None:
+            return backend
+        metrics.adjust("queue_depth", 1, queue="llm_backend")
+        try:
+            while (backend := self.backends.try_acquire()) is None:
+                if time.monotonic() >= expires_at:
+                    logger.error("No LLM backend available")
+                    return None
+                await asyncio.sleep(BACKEND_POLL_INTERVAL)
+        finally:
+            metrics.adjust("queue_depth", -1, queue="llm_backend")
+        return backend
+
+    def _post(self, data: dict[str, Any]) -> AsyncAttempt:
+        """Build the attempt of a whole-response request."""
+        async def send(backend: Backend, timeout: float) -> tuple[str, float]:
+            response = await self._client.post(backend.url, json={**data, "model": backend.model}, timeout=timeout)
+            response.raise_for_status()
+            response_data = response.json()
+            content = _parse_response(response_data)
+            return content, _record_tokens(data, response_data.get("usage"), content)
+
+        return send
+
+    def _stream(self, data: dict[str, Any], stop: StopCondition | None, on_text: TextCallback | None) -> AsyncAttempt:
+        """
+        Build the attempt of a streamed request; it is retried as long as no text has arrived.
+
+        The timeout applies to every read, so a long generation that keeps producing tokens is not cut off.
+        """
+        body = {**data, "stream": True, "stream_options": {"include_usage": True}}
+
+        async def send(backend: Backend, timeout: float) -> tuple[str, float]:
+            streamed = _StreamedText(data, stop, on_text)
+            try:
+                async with self._client.stream(
+                    "POST", backend.url, json={**body, "model": backend.model}, timeout=timeout,
+                ) as response:
+                    response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        if streamed.feed(line):
+                            break
+            except Exception as error:
+                if streamed.parts:
+                    raise _InterruptedStreamError(str(error)) from error
+                raise
+            return streamed.finish(), streamed.tokens
+
+        return send
+
+    async def get_structured_response(
+            self,
+            prompt: str,
+            schema: dict[str, type],
+            temperature: float = 0.8,
+            *,
+            max_tokens: int = MAX_TOKENS,
+    ) -> dict[str, Any] | None:
+        """
+        Retrieve a response that must be a JSON object matching a schema.
+
+        Args:
+            prompt: The input text prompt asking for a JSON object.
+            schema: Required keys and their types.
+            temperature: Controls randomness in response generation (default: 0.8).
+            max_tokens: Upper bound of generated tokens for this prompt type.
+
+        Returns:
+            The validated object, or None if the request failed or the response does not match the schema.
+
+        """
+        response = await self.get_llm_response(prompt, temperature, max_tokens=max_tokens)
+        return LLMService.parse_structured_response(response, schema)
+
+    async def get_llm_responses(
+            self,
+            prompts: Sequence[str],
+            temperature: float = 0.8,
+            *,
+            max_tokens: int = MAX_TOKENS,
+    ) -> list[str]:
+        """
+        Retrieve responses for a batch of prompts concurrently.
+
+        Args:
+            prompts: The input text prompts.
+            temperature: Controls randomness in response generation (default: 0.8).
+            max_tokens: Upper bound of generated tokens per response.
+
+        Returns:
+            Responses in the order of the prompts; failed requests yield empty strings.
+
+        """
+        return list(await asyncio.gather(
+            *(self.get_llm_response(prompt, temperature, max_tokens=max_tokens) for prompt in prompts),
+        ))
+
+
+class AsyncEmbeddingClient:
+    """
+    Asynchronous client of the OpenAI-compatible embeddings endpoint.
+
+    Texts are sent in batches and every vector is stored in the LLM response cache, so a text is embedded once
+    across runs. Vectors are returned L2-normalized. Use it as an async context manager.
+    """
+
+    def __init__(
+            self,
+            url: str | None = None,
+            model: str = EMBEDDING_MODEL,
+            batch_size: int = EMBEDDING_BATCH_SIZE,
+            concurrency: int = EMBEDDING_CONCURRENCY,
+            timeout: float = REQUEST_TIMEOUT,
+    ) -> None:
+        """
+        Initialize the client.
+
+        Args:
+            url: Embeddings endpoint, ``EMBEDDING_URL`` by default.
+            model: Embedding model name.
+            batch_size: Maximum number of texts per request.
+            concurrency: Maximum number of requests in flight.
+            timeout: Timeout of a single attempt in seconds.
+
+        """
+        self.url = url or EMBEDDING_URL
+        self.model = model
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self._slots = asyncio.Semaphore(concurrency)
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+            timeout=timeout,
+        )
+
+    async def __aenter__(self) -> "Self":
+        """Enter the client context."""
+        return self
+
+    async def __aexit__(self, *_: object) -> None:
+        """Close the connection pool."""
+        await self._client.aclose()
+
+    def _cache_key(self, text: str) -> str:
+        """Build the cache key of a text embedding."""
+        return hashlib.sha256(json.dumps(["embedding", self.model, text], ensure_ascii=False).encode()).hexdigest()
+
+    async def embed(self, texts: Sequence[str]) -> np.ndarray | None:
+        """
+        Embed texts, reusing cached vectors.
+
+        Args:
+            texts: The texts to embed.
+
+        Returns:
+            One normalized float32 vector per text, or None if a request failed.
+
+        """
+        vectors: list[np.ndarray | None] = [None] * len(texts)
+        keys = [self._cache_key(text) for text in texts] if LLMService.cache else []
+        for index, key in enumerate(keys):
+            if (cached := LLMService.cache.get(key)) is not None:
+                vectors[index] = np.frombuffer(base64.b64decode(cached), dtype=np.float32)
+
+        missing = [index for index, vector in enumerate(vectors) if vector is None]
+        batches = [missing[start:start + self.batch_size] for start in range(0, len(missing), self.batch_size)]
+        results = await asyncio.gather(*(self._embed_batch([texts[index] for index in batch]) for batch in batches))
+        for batch, (batch_vectors, latency) in zip(batches, results, strict=True):
+            if batch_vectors is None:
+                return None
+            for index, vector in zip(batch, batch_vectors, strict=True):
+                vectors[index] = vector
+                if keys:
+                    LLMService.cache.put(keys[index], base64.b64encode(vector.tobytes()).decode(), latency)
+
+        if not vectors:
+            return np.empty((0, 0), dtype=np.float32)
+        matrix = np.vstack(vectors)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms > 0, norms, 1)
+
+    async def _embed_batch(self, batch: list[str]) -> tuple[np.ndarray | None, float]:
+        """Embed one batch; returns the vectors and the latency per text."""
+        async with metrics.waiting("embedding", self._slots):
+            sent = time.monotonic()
+            with metrics.stage("embedding"):
+                vectors = await self._request({"model": self.model, "input": batch}, sent + REQUEST_DEADLINE)
+            metrics.observe("embedding_request_seconds", time.monotonic() - sent)
+        metrics.inc("embedding_texts_total", len(batch))
+        return vectors, (time.monotonic() - sent) / len(batch)
+
+    async def _request(self, data: dict[str, Any], expires_at: float) -> np.ndarray | None:
+        """Post an embeddings request, retrying transient errors until ``expires_at``."""
+        for attempt in range(MAX_RETRIES + 1):
+            remaining = expires_at - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                response = await self._client.post(self.url, json=data, timeout=min(self.timeout, remaining))
+                response.raise_for_status()
+                items = sorted(response.json()["data"], key=lambda item: item["index"])
+                return np.array([item["embedding"] for item in items], dtype=np.float32)
+            except Exception as error:
+                if (delay := _retry_delay(error, attempt, MAX_RETRIES, expires_at, "Embeddings request")) is None:
+                    logger.exception("Embeddings request failed")
+                    return None
+                await asyncio.sleep(delay)
+
+        logger.error("Embeddings request deadline exceeded")
+        return None
 
 
 class LLMService:
     """Service class for handling interactions with the Large Language Model (LLM)."""
 
+    _client: httpx.Client | None = None
+    _backends: BackendPool | None = None
+    cache: LLMCache | None = None
+
+    @classmethod
+    def configure_cache(cls, mode: CacheMode | str | None = None, path: Path = LLM_CACHE_FILE) -> LLMCache:
+        """
+        Attach a persistent response cache to all LLM calls.
+
+        Args:
+            mode: Read-only, write-through or bypass; taken from ``LLM_CACHE_MODE`` when omitted.
+            path: SQLite database file.
+
+        Returns:
+            The configured cache, whose ``stats()`` report hits and misses.
+
+        """
+        if cls.cache is not None:
+            cls.cache.close()
+        cls.cache = LLMCache(path, CacheMode(mode or os.environ.get(LLM_CACHE_MODE_ENV, CacheMode.WRITE_THROUGH.value)))
+        return cls.cache
+
+    @classmethod
+    def configure_backends(cls, pool: BackendPool | None = None) -> BackendPool:
+        """
+        Set the inference servers that all LLM calls are balanced over.
+
+        Args:
+            pool: The backends; built from ``LLM_BACKENDS``, or of ``LLM_URL`` alone, when omitted.
+
+        Returns:
+            The configured pool.
+
+        """
+        cls._backends = pool or BackendPool.from_env(LLM_URL, LLM_MODEL, POOL_SIZE)
+        return cls._backends
+
+    @classmethod
+    def backends(cls) -> BackendPool:
+        """Return the shared backend pool, configuring it on first use."""
+        return cls._backends or cls.configure_backends()
+
+    @classmethod
+    def _get_client(cls) -> httpx.Client:
+        """Return the shared connection pool for synchronous requests."""
+        if cls._client is None:
+            cls._client = httpx.Client(timeout=REQUEST_TIMEOUT)
+        return cls._client
+
     @staticmethod
-    def get_llm_response(prompt: str, temperature: float = 0.8) -> str:
+    def get_llm_response(prompt: str, temperature: float = 0.8, *, max_tokens: int = MAX_TOKENS) -> str:
         """
         Retrieve a generated response from the LLM based on the provided prompt.
 
         Args:
             prompt: The input text prompt to generate a response for.
             temperature: Controls randomness in response generation (default: 0.8).
+            max_tokens: Upper bound of generated tokens for this prompt type.
 
         Returns:
             Generated response content as a string, or empty string if an error occurs.
 
         """
+        data = _build_payload(prompt, temperature, max_tokens)
+        return LLMService._cached(
+            data, lambda expires_at: LLMService._with_retries(LLMService._post(data), expires_at, "LLM request"),
+        )
+
+    @staticmethod
+    def stream_llm_response(
+            prompt: str,
+            temperature: float = 0.8,
+            *,
+            max_tokens: int = MAX_TOKENS,
+            stop: StopCondition | None = None,
+            on_text: TextCallback | None = None,
+    ) -> str:
+        """
+        Stream a generated response from the LLM over server-sent events.
+
+        Args:
+            prompt: The input text prompt to generate a response for.
+            temperature: Controls randomness in response generation (default: 0.8).
+            max_tokens: Upper bound of generated tokens for this prompt type.
+            stop: Called with the text received so far; returning True cancels the rest of the generation, and
+                the text cut short is not cached.
+            on_text: Called with every text delta as it arrives; a cached response is passed whole.
+
+        Returns:
+            The streamed text up to the stop, or empty string if the stream failed.
+
+        """
+        data = _build_payload(prompt, temperature, max_tokens)
+        tracker = _StopTracker(stop) if stop else None
+        return LLMService._cached(
+            data,
+            lambda expires_at: LLMService._with_retries(
+                LLMService._stream(data, tracker, on_text), expires_at, "LLM stream",
+            ),
+            on_text,
+            tracker,
+        )
+
+    @staticmethod
+    def _cached(
+            data: dict[str, Any],
+            send: Callable[[float], Reply],
+            on_text: TextCallback | None = None,
+            stop: _StopTracker | None = None,
+    ) -> str:
+        """Answer a request from the cache, or send it and cache the response unless ``stop`` cut it short."""
+        cache_keys = _cache_keys(data, LLMService.backends())
+        if cache_keys and (cached := LLMService.cache.get(*cache_keys)) is not None:
+            metrics.inc("llm_cache_hits_total")
+            if on_text:
+                on_text(cached)
+            return cached
+
+        started = time.monotonic()
+        response, model = send(started + REQUEST_DEADLINE)
+        metrics.observe("llm_request_seconds", time.monotonic() - started)
+        if cache_keys and response and not (stop and stop.fired):
+            LLMService.cache.put(LLMCache.make_key({**data, "model": model}), response, time.monotonic() - started)
+        return response
+
+    @staticmethod
+    def parse_verdict(response: str, *, complete: bool = True) -> bool | None:
+        """
+        Read the yes/no verdict at the start of an answer.
+
+        Markup and punctuation before the word are skipped, and whatever follows it is ignored, so verbose
+        answers still count.
+
+        Args:
+            response: The answer text.
+            complete: False while the answer is still streaming; the verdict word must then be followed by
+                another character, so a partial word is never taken for a verdict.
+
+        Returns:
+            True for yes, False for no, None if the answer does not start with a verdict (yet).
+
+        """
+        match = VERDICT_PATTERN.match(response + ("\n" if complete else ""))
+        return match[1].lower() in POSITIVE_VERDICTS if match else None
+
+    @staticmethod
+    def parse_structured_response(response: str, schema: dict[str, type]) -> dict[str, Any] | None:
+        """
+        Extract the JSON object of a structured response and validate it against a schema.
+
+        Args:
+            response: Raw response text; prose or code fences around the object are ignored.
+            schema: Required keys and their types.
+
+        Returns:
+            The parsed object, or None if there is none or it does not match the schema.
+
+        """
+        start = response.find("{")
+        if start < 0:
+            return None
         try:
-            data: dict[str, Any] = {
-                "model": "mistral-nemo-instruct-2407",
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": temperature,
-                "max_tokens": 10000,
-            }
-            response = httpx.post(LLM_URL, json=data, timeout=30.0)
+            # Models often put raw newlines inside a multi-paragraph summary string
+            value, _ = json.JSONDecoder(strict=False).raw_decode(response, start)
+        except json.JSONDecodeError:
+            logger.warning("Structured response is not valid JSON")
+            return None
+        if not isinstance(value, dict):
+            return None
+        for key, kind in schema.items():
+            if not isinstance(value.get(key), kind):
+                logger.warning("Structured response has no %s field of type %s", key, kind.__name__)
+                return None
+        return value
+
+    @staticmethod
+    def _with_retries(send: Attempt, expires_at: float, what: str) -> Reply:
+        """
+        Send a request to free backends over the shared client, retrying transient errors until ``expires_at``.
+
+        Time spent waiting for a free backend extends the deadline; the wait has its own bound,
+        ``BACKEND_WAIT_TIMEOUT``.
+
+        Args:
+            send: Makes one attempt on a backend within a timeout; returns the text and the work of the request
+                in generated-token equivalents.
+            expires_at: ``time.monotonic()`` deadline of the request, retries included.
+            what: Name of the request in logs.
+
+        Returns:
+            The text and the model of the backend that generated it, or empty strings if every attempt failed.
+
+        """
+        backends = LLMService.backends()
+        for attempt in range(MAX_RETRIES + 1):
+            remaining = expires_at - time.monotonic()
+            if remaining <= 0:
+                break
+            waiting = time.monotonic()
+            backend = backends.acquire(BACKEND_WAIT_TIMEOUT)
+            if backend is None:
+                logger.error("No LLM backend available")
+                break
+            sent = time.monotonic()
+            expires_at += sent - waiting
+            try:
+                with metrics.stage("llm"):
+                    text, tokens = send(backend, min(REQUEST_TIMEOUT, remaining))
+            except Exception as error:
+                backends.release(backend, sent, failed=_is_backend_failure(error))
+                if (delay := _retry_delay(error, attempt, MAX_RETRIES, expires_at, what)) is None:
+                    logger.exception("%s failed", what)
+                    return "", ""
+                time.sleep(delay)
+            else:
+                backends.release(backend, sent, tokens=tokens)
+                return text, backend.model
+
+        logger.error("%s deadline exceeded", what)
+        return "", ""
+
+    @staticmethod
+    def _post(data: dict[str, Any]) -> Attempt:
+        """Build the attempt of a whole-response request over the shared client."""
+        def send(backend: Backend, timeout: float) -> tuple[str, float]:
+            response = LLMService._get_client().post(
+                backend.url, json={**data, "model": backend.model}, timeout=timeout,
+            )
             response.raise_for_status()
             response_data = response.json()
-        except Exception:
-            logger.exception("LLM request failed")
-            return ""
-        else:
-            if response_data.get("choices"):
-                return response_data["choices"][0]["message"]["content"].strip()
-            logger.error("Unexpected response structure: %s", response_data)
-            return ""
+            content = _parse_response(response_data)
+            return content, _record_tokens(data, response_data.get("usage"), content)
+
+        return send
+
+    @staticmethod
+    def _stream(data: dict[str, Any], stop: StopCondition | None, on_text: TextCallback | None) -> Attempt:
+        """Build the attempt of a streamed request over the shared client; it is retried until the first text."""
+        body = {**data, "stream": True, "stream_options": {"include_usage": True}}
+
+        def send(backend: Backend, timeout: float) -> tuple[str, float]:
+            streamed = _StreamedText(data, stop, on_text)
+            try:
+                with LLMService._get_client().stream(
+                    "POST", backend.url, json={**body, "model": backend.model}, timeout=timeout,
+                ) as response:
+                    response.raise_for_status()
+                    for line in response.iter_lines():
+                        if streamed.feed(line):
+                            break
+            except Exception as error:
+                if streamed.parts:
+                    raise _InterruptedStreamError(str(error)) from error
+                raise
+            return streamed.finish(), streamed.tokens
+
+        return send
+
+    @staticmethod
+    def get_llm_responses(
+            prompts: Sequence[str],
+            temperature: float = 0.8,
+            concurrency: int = POOL_SIZE,
+            *,
+            max_tokens: int = MAX_TOKENS,
+    ) -> list[str]:
+        """
+        Retrieve responses for a batch of prompts over a pooled async client.
+
+        Must not be called from a running event loop; use ``AsyncLLMClient.get_llm_responses`` there.
+
+        Args:
+            prompts: The input text prompts.
+            temperature: Controls randomness in response generation (default: 0.8).
+            concurrency: Maximum number of requests in flight.
+            max_tokens: Upper bound of generated tokens per response.
+
+        Returns:
+            Responses in the order of the prompts; failed requests yield empty strings.
+
+        """
+        async def run_batch() -> list[str]:
+            async with AsyncLLMClient(concurrency=concurrency) as client:
+                return await client.get_llm_responses(prompts, temperature, max_tokens=max_tokens)
+
+        return asyncio.run(run_batch()) if prompts else []
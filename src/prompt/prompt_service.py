@@ -1,9 +1,15 @@
 """Module containing prompt generation services for autonomous driving articles."""
 
+import re
+
 RELEVANCE_QUESTION = (
     "Does the article discuss topics related to autonomous driving "
     "or topics that can aid in understanding autonomous driving?"
 )
+SUMMARY_RELEVANCE_SCHEMA = {"relevant": bool, "summary": str}
+SUMMARY_REJECTION_PATTERN = re.compile(r'\{\s*"relevant"\s*:\s*false\b')  # Settles a summary/relevance answer early
+VERDICT_MAX_TOKENS = 8  # Yes/no answers, with room for markup around the word
+SUMMARY_MAX_TOKENS = 2048  # Structured article summaries
 
 
 class PromptService:
@@ -29,6 +35,26 @@ class PromptService:
 
         Please provide a clear and concise answer: 'Yes' or 'No'. Only 'yes' or 'no' text in answer is accepted."""
 
+    @staticmethod
+    def create_abstract_relevance_prompt(abstract: str) -> str:
+        """
+        Generate a prompt to determine article relevance from its abstract alone.
+
+        Args:
+            abstract: Abstract, or first page text, of the article
+
+        Returns:
+            Formatted relevance check prompt
+
+        """
+        return f"""Question:  {RELEVANCE_QUESTION}
+
+        ### ARTICLE ABSTRACT START ###
+        {abstract}
+        ### ARTICLE ABSTRACT END ###
+
+        Please provide a clear and concise answer: 'Yes' or 'No'. Only 'yes' or 'no' text in answer is accepted."""
+
     @staticmethod
     def create_summary_prompt(text: str) -> str:
         """
@@ -59,6 +85,44 @@ class PromptService:
 
         Summary:"""
 
+    @staticmethod
+    def create_summary_relevance_prompt(text: str) -> str:
+        """
+        Generate a prompt for the relevance verdict and the structured summary in one JSON answer.
+
+        The verdict comes first and the summary stays empty for irrelevant articles, so rejecting an article
+        costs only a few output tokens. The answer matches ``SUMMARY_RELEVANCE_SCHEMA``.
+
+        Args:
+            text: Article content to judge and summarize
+
+        Returns:
+            Formatted combined prompt
+
+        """
+        return f"""
+        Question: {RELEVANCE_QUESTION}
+
+        Answer the question for the article below, then summarize the article if the answer is yes.
+        Respond with a single JSON object and nothing else:
+        {{"relevant": true or false, "summary": "..."}}
+
+        If "relevant" is false, "summary" must be an empty string. Otherwise "summary" is a comprehensive,
+        structured summary that addresses the following elements:
+
+        1. **Title**: State the exact title of the article (if available).
+        2. **Scope and Field**: Identify the article's domain, research field, and overarching focus.
+        3. **Methodology**: Explain *what* was investigated and *how* (methods, approaches, or frameworks used).
+        4. **Key Results**: Summarize the findings, including quantitative/qualitative outcomes.
+        5. **Critical Analysis**: Highlight limitations, uncertainties, or potential biases in the results.
+        6. **Broader Context**: Discuss the article's implications for its field or real-world applications.
+
+        ### ARTICLE START ###
+        {text}
+        ### ARTICLE END ###
+
+        JSON:"""
+
     @staticmethod
     def create_partial_prompt(question: str, chunk_text: str, part: int, total: int) -> str:
         """
@@ -148,3 +212,29 @@ class PromptService:
             5. Maintain document references
 
             Integrated Analysis:"""
+
+    @staticmethod
+    def create_corpus_question_prompt(question: str, passages: list[tuple[str, str]]) -> str:
+        """
+        Generate a prompt answering a question from passages retrieved from the corpus.
+
+        Args:
+            question: Question about the corpus
+            passages: Pairs of document ID and passage text, most relevant first
+
+        Returns:
+            Formatted question answering prompt
+
+        """
+        sources = "".join(f"\n--- Document {doc_id} ---\n{text}" for doc_id, text in passages)
+        return f"""Answer the question using only the document passages below.
+
+        Question: {question}
+
+        Passages:{sources}
+
+        Guidelines:
+        1. Cite the document ID of every claim
+        2. Say so if the passages do not answer the question
+
+        Answer:"""
@@ -0,0 +1,88 @@
+"""
+Adaptive concurrency limit driven by observed latency (AIMD).
+
+The limit starts low and grows while the latency of completed requests stays close to the lowest latency seen,
+first by one per request (slow start) and, once latency starts to rise or after the first back-off, by one per
+``limit`` requests. A dropped request (timeout, overload status) or a smoothed latency above
+``LATENCY_TOLERANCE`` times the baseline cuts the limit by ``BACKOFF``. Only requests sent after the previous
+cut can cut it again, so a burst of slow responses to one overload counts once. The limit only grows while it
+is actually used, so an idle server is not credited with capacity it never proved.
+"""
+
+import threading
+import time
+
+INITIAL_LIMIT = 2.0
+MIN_LIMIT = 1.0
+LATENCY_TOLERANCE = 1.5  # Smoothed latency over baseline that counts as congestion
+SLOW_START_EXIT = 1.2  # Smoothed latency over baseline that ends slow start without backing off
+BACKOFF = 0.7  # Multiplicative decrease on congestion
+SMOOTHING = 0.2  # Weight of a new sample in the smoothed latency
+BASELINE_DRIFT = 0.01  # Relative rise of the baseline per sample, so it follows a slower server
+
+
+class AdaptiveLimit:
+    """Thread-safe AIMD limit on requests in flight."""
+
+    def __init__(self, max_limit: float, initial: float = INITIAL_LIMIT, min_limit: float = MIN_LIMIT) -> None:
+        """
+        Initialize the limit.
+
+        Args:
+            max_limit: Upper bound of the limit.
+            initial: Limit before any sample.
+            min_limit: Lower bound of the limit.
+
+        """
+        self.max_limit = max_limit
+        self.min_limit = min(min_limit, max_limit)
+        self.limit = min(max(initial, self.min_limit), max_limit)
+        self.baseline: float | None = None
+        self.smoothed: float | None = None
+        self.slow_start = True
+        self._backed_off_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def current(self) -> int:
+        """Requests allowed in flight now."""
+        return int(self.limit)
+
+    def update(self, latency: float | None, in_flight: int, started_at: float, *, dropped: bool = False) -> float:
+        """
+        Adjust the limit to a completed request.
+
+        Args:
+            latency: Latency of the request, normalized so requests of different sizes compare; None if the
+                request carries no latency sample.
+            in_flight: Requests in flight when it completed, itself included.
+            started_at: ``time.monotonic()`` when it was sent.
+            dropped: Whether it timed out or the server refused it as overloaded.
+
+        Returns:
+            The new limit.
+
+        """
+        with self._lock:
+            if dropped:
+                self._back_off(started_at)
+            elif latency is not None:
+                self.baseline = latency if self.baseline is None else min(latency, self.baseline * (1 + BASELINE_DRIFT))
+                self.smoothed = latency if self.smoothed is None else (
+                    (1 - SMOOTHING) * self.smoothed + SMOOTHING * latency
+                )
+                if self.smoothed > LATENCY_TOLERANCE * self.baseline:
+                    self._back_off(started_at)
+                elif in_flight >= self.current:
+                    self.slow_start = self.slow_start and self.smoothed <= SLOW_START_EXIT * self.baseline
+                    self.limit = min(self.max_limit, self.limit + (1 if self.slow_start else 1 / self.limit))
+            return self.limit
+
+    def _back_off(self, started_at: float) -> None:
+        """Cut the limit, once per round of requests; the lock must be held."""
+        if started_at < self._backed_off_at:
+            return
+        self.limit = max(self.min_limit, self.limit * BACKOFF)
+        self.slow_start = False
+        self.smoothed = None
+        self._backed_off_at = time.monotonic()
@@ -0,0 +1,185 @@
+"""
+Token-budget-aware chunking of page texts.
+
+Pages are packed into chunks up to a token budget instead of a fixed number of pages. A page that does not
+fit into the budget on its own is split into paragraphs, then lines, then words. Every chunk keeps
+``PAGE n:`` markers so page references survive aggregation.
+"""
+
+from collections.abc import Callable, Iterable
+
+from utils.utils import clean_page_text, sanitize_text
+
+TokenEstimator = Callable[[str], int]
+
+CHARS_PER_TOKEN = 4  # Rough average for English scientific text
+PROMPT_OVERHEAD_TOKENS = 1024  # Instructions and question around a chunk
+DEFAULT_TOKEN_BUDGET = 8192
+SEPARATORS = ("\n\n", "\n", " ")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the token count of a text from its length.
+
+    Args:
+        text (str): The text to measure.
+
+    Returns:
+        int: Estimated number of tokens.
+
+    """
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def token_budget(context_window: int, max_output_tokens: int, prompt_overhead: int = PROMPT_OVERHEAD_TOKENS) -> int:
+    """
+    Derive the chunk token budget from a model's context window.
+
+    Args:
+        context_window (int): Context window of the model in tokens.
+        max_output_tokens (int): Tokens reserved for the completion.
+        prompt_overhead (int): Tokens reserved for the prompt around the chunk.
+
+    Returns:
+        int: Tokens available for chunk text.
+
+    """
+    return max(context_window - max_output_tokens - prompt_overhead, 1)
+
+
+def _clean(text: str) -> str:
+    """Flatten line breaks and strip control characters."""
+    return sanitize_text(clean_page_text(text))
+
+
+class TokenBudgetChunker:
+    """Pack pages, or parts of pages, into chunks that fit a token budget."""
+
+    def __init__(
+            self,
+            budget: int = DEFAULT_TOKEN_BUDGET,
+            overlap_tokens: int = 0,
+            estimator: TokenEstimator = estimate_tokens,
+    ) -> None:
+        """
+        Initialize the chunker.
+
+        Args:
+            budget (int): Maximum number of tokens per chunk.
+            overlap_tokens (int): Tokens of trailing text repeated at the start of the next chunk.
+            estimator (TokenEstimator): Function estimating the token count of a text.
+
+        """
+        self.budget = budget
+        self.overlap_tokens = overlap_tokens
+        self.estimator = estimator
+
+    def split(self, pages: Iterable[str]) -> list[str]:
+        """
+        Split raw page texts into chunks.
+
+        Args:
+            pages (Iterable[str]): Raw text of every page, in order.
+
+        Returns:
+            list[str]: Chunks with ``PAGE n:`` markers.
+
+        """
+        chunks: list[str] = []
+        current: list[tuple[int, str, int]] = []
+        used = 0
+
+        for unit in self._units(pages):
+            if current and used + unit[2] > self.budget:
+                chunks.append(self._render(current))
+                current = self._overlap(current, unit[2])
+                used = sum(cost for _, _, cost in current)
+            current.append(unit)
+            used += unit[2]
+
+        if current:
+            chunks.append(self._render(current))
+        return chunks
+
+    def _units(self, pages: Iterable[str]) -> Iterable[tuple[int, str, int]]:
+        """Yield ``(page number, text, token cost)`` units that each fit into the budget."""
+        for page_number, raw in enumerate(pages, 1):
+            marker_cost = self.estimator(f"PAGE {page_number}:\n")
+            limit = max(self.budget - marker_cost, 1)
+            text = _clean(raw)
+            if not text:
+                continue
+
+            pieces = [text] if self.estimator(text) <= limit else self._split_oversized(raw, limit, 0)
+            for piece in pieces:
+                cleaned = _clean(piece)
+                if cleaned:
+                    yield page_number, cleaned, self.estimator(cleaned) + marker_cost
+
+    def _split_oversized(self, text: str, limit: int, level: int) -> list[str]:
+        """Split text on paragraphs, then lines, then words, packing the parts up to ``limit`` tokens."""
+        if level == len(SEPARATORS):
+            step = max(limit * CHARS_PER_TOKEN, 1)
+            return [text[i:i + step] for i in range(0, len(text), step)]
+
+        separator = SEPARATORS[level]
+        pieces: list[str] = []
+        current = ""
+        current_cost = 0
+        for part in text.split(separator):
+            part_cost = self.estimator(_clean(part)) + 1
+            if current and current_cost + part_cost <= limit:
+                current = f"{current}{separator}{part}"
+                current_cost += part_cost
+                continue
+            if current:
+                pieces.append(current)
+            if part_cost <= limit:
+                current, current_cost = part, part_cost
+            else:
+                pieces.extend(self._split_oversized(part, limit, level + 1))
+                current, current_cost = "", 0
+        if current:
+            pieces.append(current)
+        return pieces
+
+    def _overlap(self, units: list[tuple[int, str, int]], next_cost: int) -> list[tuple[int, str, int]]:
+        """Return the trailing units of a finished chunk to repeat in the next one, the first cut to its word tail."""
+        carried: list[tuple[int, str, int]] = []
+        used = 0
+        for page_number, text, cost in reversed(units):
+            room = min(self.overlap_tokens, self.budget - next_cost) - used
+            if cost <= room:
+                carried.insert(0, (page_number, text, cost))
+                used += cost
+                continue
+            tail = self._tail(text, room - self.estimator(f"PAGE {page_number}:\n"))
+            if tail:
+                carried.insert(0, (page_number, tail, cost - self.estimator(text) + self.estimator(tail)))
+            break
+        return carried
+
+    def _tail(self, text: str, limit: int) -> str:
+        """Return the longest run of trailing words of a text that fits into ``limit`` tokens."""
+        words = text.split(" ")
+        low, high = 0, len(words)  # Numbers of trailing words known to fit and known not to fit
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.estimator(" ".join(words[-middle:])) <= limit:
+                low = middle
+            else:
+                high = middle - 1
+        return " ".join(words[len(words) - low:])
+
+    @staticmethod
+    def _render(units: list[tuple[int, str, int]]) -> str:
+        """Join units into chunk text with a marker at every page change."""
+        chunk_text = ""
+        previous_page = 0
+        for page_number, text, _ in units:
+            if page_number != previous_page:
+                chunk_text += f"PAGE {page_number}:\n"
+                previous_page = page_number
+            chunk_text += f"{text}\n"
+        return chunk_text
@@ -0,0 +1,220 @@
+"""
+Concurrent, resumable downloads of arXiv PDFs.
+
+Downloads share one pooled ``httpx.AsyncClient`` and are rate limited per host. Bytes are written to a
+``.part`` file that a retry or a later run resumes with an HTTP Range request, and the file only gets its
+final name once it passes a PDF integrity check, so a truncated download is never taken for a cached PDF.
+A failed item is logged and reported as None; it never ends the crawl.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import fitz
+import httpx
+
+from utils.metrics import metrics
+from utils.utils import normalize_arxiv_id
+
+if TYPE_CHECKING:
+    from typing_extensions import Self
+
+logger = logging.getLogger(__name__)
+
+ARXIV_PDF_URL = "https://arxiv.org/pdf/{arxiv_id}.pdf"
+DOWNLOAD_DIR = Path("research")
+DOWNLOAD_TIMEOUT = 30.0  # Seconds per attempt without data
+MAX_CONNECTIONS = 8  # Pooled connections across hosts
+HOST_INTERVAL = 1.0  # Minimum seconds between requests to the same host
+MAX_ATTEMPTS = 4
+BACKOFF_BASE = 1.0  # Seconds before the first retry
+READ_SIZE = 1 << 16
+PDF_CONTENT_TYPES = ("application/pdf", "application/octet-stream")
+RETRY_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+
+class InvalidContentError(Exception):
+    """The server answered with something that is not a PDF."""
+
+
+def is_valid_pdf(path: Path) -> bool:
+    """
+    Check that a file is a complete PDF.
+
+    Args:
+        path (Path): The file to check.
+
+    Returns:
+        bool: True if the file has a PDF header and trailer and PyMuPDF finds at least one page.
+
+    """
+    try:
+        with path.open("rb") as f:
+            header = f.read(5)
+            f.seek(max(path.stat().st_size - 1024, 0))
+            trailer = f.read()
+        if header != b"%PDF-" or b"%%EOF" not in trailer:
+            return False
+        with fitz.open(path) as doc:
+            return doc.page_count > 0
+    except Exception:
+        logger.exception("Error checking PDF %s", path)
+        return False
+
+
+def _file_size(path: Path) -> int:
+    """Return the size of a file, or 0 if it does not exist."""
+    return path.stat().st_size if path.exists() else 0
+
+
+class HostRateLimiter:
+    """Space out requests to the same host by a minimum interval."""
+
+    def __init__(self, interval: float = HOST_INTERVAL) -> None:
+        """
+        Initialize the limiter.
+
+        Args:
+            interval (float): Minimum seconds between two requests to one host.
+
+        """
+        self.interval = interval
+        self._locks: defaultdict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self._next_slot: defaultdict[str, float] = defaultdict(float)
+
+    async def wait(self, host: str) -> None:
+        """Wait until a request to the host is allowed."""
+        async with self._locks[host]:
+            delay = self._next_slot[host] - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next_slot[host] = time.monotonic() + self.interval
+
+
+class DownloadManager:
+    """Download PDFs over a pooled HTTP client; use it as an async context manager."""
+
+    def __init__(
+            self,
+            save_dir: Path = DOWNLOAD_DIR,
+            url_template: str = ARXIV_PDF_URL,
+            *,
+            host_interval: float = HOST_INTERVAL,
+            max_connections: int = MAX_CONNECTIONS,
+            timeout: float = DOWNLOAD_TIMEOUT,
+            max_attempts: int = MAX_ATTEMPTS,
+    ) -> None:
+        """
+        Initialize the manager.
+
+        Args:
+            save_dir (Path): Directory of the downloaded PDFs.
+            url_template (str): Download URL with an ``{arxiv_id}`` placeholder.
+            host_interval (float): Minimum seconds between two requests to one host.
+            max_connections (int): Maximum number of pooled connections.
+            timeout (float): Seconds an attempt may wait for data.
+            max_attempts (int): Attempts per file before it counts as failed.
+
+        """
+        self.save_dir = save_dir
+        self.url_template = url_template
+        self.max_attempts = max_attempts
+        self.limiter = HostRateLimiter(host_interval)
+        self._client = httpx.AsyncClient(
+            timeout=timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    async def __aenter__(self) -> "Self":
+        """Enter the manager context."""
+        return self
+
+    async def __aexit__(self, *_: object) -> None:
+        """Close the connection pool."""
+        await self._client.aclose()
+
+    async def download(self, arxiv_id: str) -> Path | None:
+        """
+        Download the PDF of an arXiv paper unless a valid copy is already there.
+
+        Args:
+            arxiv_id (str): The arXiv ID.
+
+        Returns:
+            Path | None: The PDF file, or None if it could not be downloaded.
+
+        """
+        normalized_id = normalize_arxiv_id(arxiv_id)
+        target = self.save_dir / f"{normalized_id}.pdf"
+        if target.exists():
+            if await asyncio.to_thread(is_valid_pdf, target):
+                logger.info("File %s already exists. Skipping download.", target)
+                return target
+            logger.warning("Discarding invalid PDF %s", target)
+            target.unlink()
+
+        self.save_dir.mkdir(parents=True, exist_ok=True)
+        part = target.with_name(f"{target.name}.part")
+        url = self.url_template.format(arxiv_id=normalized_id)
+        for attempt in range(self.max_attempts):
+            try:
+                await self._fetch(url, part)
+            except Exception as error:
+                if not self._is_transient(error) or attempt == self.max_attempts - 1:
+                    logger.exception("Failed to download %s", arxiv_id)
+                    return None
+                delay = random.uniform(0, BACKOFF_BASE * 2 ** attempt)  # noqa: S311
+                logger.warning("Download of %s failed (%s), retry %d in %.1fs", arxiv_id, error, attempt + 1, delay)
+                await asyncio.sleep(delay)
+                continue
+
+            if not await asyncio.to_thread(is_valid_pdf, part):
+                logger.error("Downloaded file for %s is not a valid PDF", arxiv_id)
+                part.unlink(missing_ok=True)
+                return None
+            part.replace(target)
+            logger.info("Successfully downloaded %s", normalized_id)
+            return target
+        return None
+
+    async def _fetch(self, url: str, part: Path) -> None:
+        """Stream a URL into the part file, resuming after the bytes it already holds."""
+        offset = await asyncio.to_thread(_file_size, part)
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        await self.limiter.wait(httpx.URL(url).host)
+
+        started = time.monotonic()
+        received = 0
+        with metrics.stage("download"):
+            async with self._client.stream("GET", url, headers=headers) as response:
+                if response.status_code == httpx.codes.REQUESTED_RANGE_NOT_SATISFIABLE and offset:
+                    return
+                response.raise_for_status()
+                content_type = response.headers.get("Content-Type", "")
+                if not content_type.startswith(PDF_CONTENT_TYPES):
+                    message = f"Invalid content type {content_type!r} for {url}"
+                    raise InvalidContentError(message)
+
+                resumed = response.status_code == httpx.codes.PARTIAL_CONTENT
+                f = await asyncio.to_thread(part.open, "ab" if resumed else "wb")
+                try:
+                    async for chunk in response.aiter_bytes(READ_SIZE):
+                        metrics.inc("download_bytes_total", len(chunk))
+                        received += len(chunk)
+                        await asyncio.to_thread(f.write, chunk)
+                finally:
+                    await asyncio.to_thread(f.close)
+        metrics.observe("download_bytes_per_second", received / max(time.monotonic() - started, 1e-9))
+
+    @staticmethod
+    def _is_transient(error: Exception) -> bool:
+        """Check whether a failed download is worth retrying."""
+        if isinstance(error, httpx.HTTPStatusError):
+            return error.response.status_code in RETRY_STATUS_CODES
+        return isinstance(error, httpx.TransportError)
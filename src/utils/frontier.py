@@ -0,0 +1,265 @@
+"""
+Crawl frontier data structures.
+
+CrawlFrontier keeps the queue of arXiv IDs in a deque plus a membership index, so enqueue, dequeue and
+membership checks are O(1) and an ID is never queued twice while it is queued, in flight or processed.
+PriorityFrontier serves the same IDs best-first by a score, such as the citation in-degree of a paper.
+BloomFilter is a compact, serializable "seen" set for crawls too large to keep every processed ID in memory.
+"""
+
+import base64
+import hashlib
+import heapq
+import itertools
+import math
+import zlib
+from collections import Counter, deque
+from collections.abc import Iterable
+from typing import Any
+
+DEFAULT_ERROR_RATE = 0.001
+
+
+class BloomFilter:
+    """Probabilistic set membership with a fixed memory footprint and no false negatives."""
+
+    def __init__(self, capacity: int, error_rate: float = DEFAULT_ERROR_RATE, bits: bytes | None = None) -> None:
+        """
+        Initialize an empty filter sized for ``capacity`` items.
+
+        Args:
+            capacity (int): Expected number of items.
+            error_rate (float): Target false positive rate at full capacity.
+            bits (bytes | None): Bit array of a previously serialized filter.
+
+        """
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray(bits) if bits is not None else bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> Iterable[int]:
+        """Yield the bit positions of an item using double hashing."""
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        for index in range(self.hash_count):
+            yield (first + index * second) % self.size
+
+    def add(self, item: str) -> None:
+        """Add an item to the filter."""
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        """Return True if the item was possibly added, False if it definitely was not."""
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def to_dict(self) -> dict[str, Any]:
+        """Serialize the filter to a JSON-compatible dictionary."""
+        return {
+            "capacity": self.capacity,
+            "error_rate": self.error_rate,
+            "bits": base64.b64encode(zlib.compress(bytes(self.bits))).decode("ascii"),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "BloomFilter":
+        """Restore a filter serialized with ``to_dict``."""
+        bits = zlib.decompress(base64.b64decode(data["bits"]))
+        return cls(data["capacity"], data["error_rate"], bits)
+
+
+class CrawlFrontier:
+    """FIFO crawl frontier that deduplicates IDs across queued, in-flight and processed items."""
+
+    def __init__(
+            self,
+            queued: Iterable[str] = (),
+            processed: Iterable[str] = (),
+            seen: BloomFilter | None = None,
+    ) -> None:
+        """
+        Initialize the frontier.
+
+        Args:
+            queued (Iterable[str]): IDs waiting to be processed, in order; duplicates are dropped.
+            processed (Iterable[str]): IDs that are already processed.
+            seen (BloomFilter | None): If given, processed IDs are kept only in this filter instead of an exact set.
+
+        """
+        self.seen = seen
+        self._processed: set[str] = set()
+        for arxiv_id in processed:
+            self._mark_processed(arxiv_id)
+
+        self._queue: deque[str] = deque()
+        self._queued: set[str] = set()
+        self._in_flight: set[str] = set()
+        for arxiv_id in queued:
+            self.push(arxiv_id)
+
+    def _mark_processed(self, arxiv_id: str) -> None:
+        """Record an ID as processed."""
+        if self.seen is not None:
+            self.seen.add(arxiv_id)
+        else:
+            self._processed.add(arxiv_id)
+
+    def is_processed(self, arxiv_id: str) -> bool:
+        """Check whether an ID is processed; may give false positives when a bloom filter is used."""
+        return arxiv_id in self._processed or (self.seen is not None and arxiv_id in self.seen)
+
+    def __contains__(self, arxiv_id: str) -> bool:
+        """Check whether an ID is queued, in flight or processed."""
+        return arxiv_id in self._queued or arxiv_id in self._in_flight or self.is_processed(arxiv_id)
+
+    def __len__(self) -> int:
+        """Return the number of queued IDs."""
+        return len(self._queue)
+
+    @property
+    def in_flight(self) -> frozenset[str]:
+        """IDs handed out by ``pop`` and not yet finished."""
+        return frozenset(self._in_flight)
+
+    def bump(self, arxiv_id: str, amount: int = 1) -> None:
+        """Raise the score of an ID; FIFO order ignores scores."""
+
+    def push(self, arxiv_id: str) -> bool:
+        """
+        Queue an ID unless it is already known.
+
+        Args:
+            arxiv_id (str): The arXiv ID.
+
+        Returns:
+            bool: True if the ID was queued.
+
+        """
+        if arxiv_id in self:
+            return False
+        self._queue.append(arxiv_id)
+        self._queued.add(arxiv_id)
+        return True
+
+    def pop(self) -> str | None:
+        """Move the next queued ID to the in-flight set and return it, or None if the queue is empty."""
+        if not self._queue:
+            return None
+        arxiv_id = self._queue.popleft()
+        self._queued.discard(arxiv_id)
+        self._in_flight.add(arxiv_id)
+        return arxiv_id
+
+    def complete(self, arxiv_id: str) -> None:
+        """Mark an in-flight ID as processed."""
+        self._in_flight.discard(arxiv_id)
+        self._mark_processed(arxiv_id)
+
+    def drop(self, arxiv_id: str) -> None:
+        """Forget an in-flight ID without marking it processed."""
+        self._in_flight.discard(arxiv_id)
+
+    def release(self, arxiv_id: str) -> None:
+        """Return an in-flight ID to the front of the queue."""
+        self._in_flight.discard(arxiv_id)
+        self._queue.appendleft(arxiv_id)
+        self._queued.add(arxiv_id)
+
+
+class PriorityFrontier(CrawlFrontier):
+    """
+    Crawl frontier that serves the queued ID with the highest score first, in discovery order on ties.
+
+    Scores only grow, so ``bump`` pushes a fresh heap entry and outdated entries are skipped lazily by ``pop``.
+    """
+
+    def __init__(
+            self,
+            queued: Iterable[str] = (),
+            processed: Iterable[str] = (),
+            seen: BloomFilter | None = None,
+            scores: Counter[str] | None = None,
+    ) -> None:
+        """
+        Initialize the frontier.
+
+        Args:
+            queued (Iterable[str]): IDs waiting to be processed, in discovery order; duplicates are dropped.
+            processed (Iterable[str]): IDs that are already processed.
+            seen (BloomFilter | None): If given, processed IDs are kept only in this filter instead of an exact set.
+            scores (Counter[str] | None): Initial scores, e.g. the number of relevant papers citing each ID.
+
+        """
+        self.scores: Counter[str] = Counter(scores)
+        self._heap: list[tuple[int, int, str]] = []
+        self._order: dict[str, int] = {}
+        self._counter = itertools.count()
+        super().__init__(queued, processed, seen)
+
+    def __len__(self) -> int:
+        """Return the number of queued IDs."""
+        return len(self._queued)
+
+    def _heap_push(self, arxiv_id: str) -> None:
+        """Add a heap entry with the current score of an ID."""
+        heapq.heappush(self._heap, (-self.scores[arxiv_id], self._order[arxiv_id], arxiv_id))
+
+    def bump(self, arxiv_id: str, amount: int = 1) -> None:
+        """
+        Raise the score of an ID and reorder it if it is queued.
+
+        Args:
+            arxiv_id (str): The arXiv ID.
+            amount (int): Score increment.
+
+        """
+        self.scores[arxiv_id] += amount
+        if arxiv_id in self._queued:
+            self._heap_push(arxiv_id)
+
+    def push(self, arxiv_id: str) -> bool:
+        """
+        Queue an ID unless it is already known.
+
+        Args:
+            arxiv_id (str): The arXiv ID.
+
+        Returns:
+            bool: True if the ID was queued.
+
+        """
+        if arxiv_id in self:
+            return False
+        self._order.setdefault(arxiv_id, next(self._counter))
+        self._queued.add(arxiv_id)
+        self._heap_push(arxiv_id)
+        return True
+
+    def pop(self) -> str | None:
+        """Move the best queued ID to the in-flight set and return it, or None if the queue is empty."""
+        while self._heap:
+            score, _, arxiv_id = heapq.heappop(self._heap)
+            if arxiv_id in self._queued and -score == self.scores[arxiv_id]:
+                self._queued.discard(arxiv_id)
+                self._in_flight.add(arxiv_id)
+                return arxiv_id
+        return None
+
+    def complete(self, arxiv_id: str) -> None:
+        """Mark an in-flight ID as processed."""
+        super().complete(arxiv_id)
+        self._order.pop(arxiv_id, None)
+
+    def drop(self, arxiv_id: str) -> None:
+        """Forget an in-flight ID without marking it processed."""
+        super().drop(arxiv_id)
+        self._order.pop(arxiv_id, None)
+
+    def release(self, arxiv_id: str) -> None:
+        """Return an in-flight ID to the queue at its previous rank."""
+        self._in_flight.discard(arxiv_id)
+        self._queued.add(arxiv_id)
+        self._heap_push(arxiv_id)
@@ -0,0 +1,98 @@
+"""
+Link extraction from PDF page text and link annotations.
+
+The document is streamed page by page instead of being joined into one string. Each page is lower-cased once
+and scanned by patterns compiled at import time that start with a literal, so the regex engine can jump
+straight to candidate positions. URLs wrapped across lines are rejoined before the scan, and the URIs of the
+PDF's link annotations are merged with the text matches; arXiv and DOI URLs also count as arXiv IDs and DOIs.
+"""
+
+import re
+from collections.abc import Iterable
+
+from utils.utils import normalize_arxiv_id
+
+ARXIV_ID = r"\d{4}\.\d{4,}(?:v\d+)?"
+PAGE_PATTERNS = (
+    ("arxiv", re.compile(rf"arxiv:\s*({ARXIV_ID})\b")),
+    ("url", re.compile(r"https?://\S+")),
+    ("doi", re.compile(r"10\.\d{4,}/\S+")),
+    ("pubmed", re.compile(r"pmid:\s?(\d+)")),
+    ("isbn", re.compile(r"isbn(?:-1[03])?:?\s*((?:\d[\s-]?){12}\d|(?:\d[\s-]?){9}[\dx])\b")),
+)
+# A line break inside a URL: the line ends in URL punctuation other than a sentence end, a dot is followed
+# by a lower-case continuation, or the next line continues with a path
+WRAPPED_URL = re.compile(
+    r"https?://(?:\S*(?:[/\-_=?&#%~]\n(?=\S)|[^\s).]\.\n(?=[a-z0-9])|[^\s.,;:)]\n(?=[^\s/]*/)))+",
+)
+ARXIV_URL = re.compile(rf"arxiv\.org/(?:abs|pdf)/(?P<arxiv>{ARXIV_ID})", re.IGNORECASE)
+DOI_URL = re.compile(r"doi\.org/(?P<doi>10\.\d{4,}/\S+)", re.IGNORECASE)
+ISBN_SEPARATORS = re.compile(r"[\s-]")
+TRAILING_PUNCTUATION = ".,;:'\"]>"
+LINK_TYPES = ("arxiv", "doi", "url", "pubmed", "isbn")
+
+
+def _join_lines(match: re.Match[str]) -> str:
+    """Remove the line breaks from a wrapped URL."""
+    return match[0].replace("\n", "")
+
+
+def _strip_trailing(value: str) -> str:
+    """Remove sentence punctuation and unbalanced closing parentheses from the end of a URL or DOI."""
+    value = value.rstrip(TRAILING_PUNCTUATION)
+    while value.endswith(")") and value.count(")") > value.count("("):
+        value = value[:-1].rstrip(TRAILING_PUNCTUATION)
+    return value
+
+
+def _add_url(results: dict[str, dict[str, None]], url: str) -> None:
+    """Record a URL, and the arXiv ID or DOI it points to."""
+    url = _strip_trailing(url).lower()
+    results["url"][url] = None
+    if match := ARXIV_URL.search(url):
+        results["arxiv"][normalize_arxiv_id(match["arxiv"])] = None
+    elif match := DOI_URL.search(url):
+        results["doi"][_strip_trailing(match["doi"])] = None
+
+
+def _add_match(results: dict[str, dict[str, None]], link_type: str, match: re.Match[str], text: str) -> None:
+    """Record a pattern match of the given link type."""
+    if link_type == "url":
+        _add_url(results, match[0])
+    elif link_type == "arxiv":
+        results["arxiv"][normalize_arxiv_id(match[1])] = None
+    elif link_type == "doi":
+        start = match.start()
+        if start == 0 or not (text[start - 1].isalnum() or text[start - 1] == "."):
+            results["doi"][_strip_trailing(match[0])] = None
+    elif link_type == "isbn":
+        results["isbn"][ISBN_SEPARATORS.sub("", match[1])] = None
+    else:
+        results[link_type][match[1]] = None
+
+
+def extract_links(pages: Iterable[str], uris: Iterable[str] = ()) -> dict[str, list[str]]:
+    """
+    Extract arXiv IDs, DOIs, URLs, PubMed IDs and ISBNs.
+
+    Args:
+        pages (Iterable[str]): Raw text of every page, consumed one page at a time.
+        uris (Iterable[str]): Targets of the link annotations of the document.
+
+    Returns:
+        dict[str, list[str]]: Unique lower-cased links by type, in order of appearance; empty types are omitted.
+
+    """
+    results: dict[str, dict[str, None]] = {link_type: {} for link_type in LINK_TYPES}
+
+    for page in pages:
+        text = (WRAPPED_URL.sub(_join_lines, page) if "://" in page else page).lower()
+        for link_type, pattern in PAGE_PATTERNS:
+            for match in pattern.finditer(text):
+                _add_match(results, link_type, match, text)
+
+    for uri in uris:
+        if uri.lower().startswith(("http://", "https://")):
+            _add_url(results, uri)
+
+    return {link_type: list(values) for link_type, values in results.items() if values}
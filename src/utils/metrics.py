@@ -0,0 +1,484 @@
+"""
+Stage-level run metrics.
+
+One process-wide registry, ``metrics``, holds counters, gauges and value distributions. The LLM clients record
+latency and tokens per call, ``ParsedDocument`` the parse time per page, the download manager bytes and
+throughput, and the runners queue depth. ``metrics.stage`` wraps one unit of work of a pipeline stage: it keeps
+the number in flight as a gauge and the start and end time of the work, from which the end-of-run summary
+derives how busy every stage was and how many units it ran concurrently on average. The stage closest to its
+concurrency limit tells whether a run is GPU-bound (LLM calls), parse-bound (PDF parsing) or network-bound
+(downloads).
+
+The registry is written in Prometheus text format, or appended as JSONL when the file name ends in ``.jsonl``.
+Worker processes hand their recordings to the parent with ``drain`` and ``merge``.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, NamedTuple
+
+METRICS_FILE = Path("metrics.prom")
+METRICS_FILE_ENV = "METRICS_FILE"  # Export path; a .jsonl suffix appends JSON lines instead of Prometheus text
+RESERVOIR_SIZE = 2048  # Samples kept per distribution for quantiles
+QUANTILES = (0.5, 0.95, 0.99)
+STAGE_RESOURCES = {"llm": "GPU", "embedding": "GPU", "parse": "parse", "download": "network"}
+
+logger = logging.getLogger(__name__)
+
+MetricKey = tuple[str, tuple[tuple[str, str], ...]]
+
+
+class StageLoad(NamedTuple):
+    """Activity of a pipeline stage over a run."""
+
+    count: int
+    busy_ratio: float  # Share of the run with at least one unit in flight
+    mean_in_flight: float
+    peak_in_flight: int
+
+
+class Distribution:
+    """Count, sum and extremes of observed values, with a uniform reservoir sample for quantiles."""
+
+    def __init__(self) -> None:
+        """Initialize an empty distribution."""
+        self.count = 0
+        self.total = 0.0
+        self.low = float("inf")
+        self.high = float("-inf")
+        self.samples: list[float] = []
+
+    def add(self, value: float) -> None:
+        """Record a value."""
+        self.count += 1
+        self.total += value
+        self.low = min(self.low, value)
+        self.high = max(self.high, value)
+        if len(self.samples) < RESERVOIR_SIZE:
+            self.samples.append(value)
+        elif (slot := random.randrange(self.count)) < RESERVOIR_SIZE:  # noqa: S311
+            self.samples[slot] = value
+
+    def merge(self, other: "Distribution") -> None:
+        """Add the values of another distribution; quantiles of the merge are approximate."""
+        self.count += other.count
+        self.total += other.total
+        self.low = min(self.low, other.low)
+        self.high = max(self.high, other.high)
+        self.samples = (self.samples + other.samples)[-RESERVOIR_SIZE:]
+
+    def quantile(self, q: float) -> float:
+        """Return the q-quantile of the sample, or 0 if nothing was recorded."""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+    @property
+    def mean(self) -> float:
+        """Mean of the recorded values."""
+        return self.total / self.count if self.count else 0.0
+
+
+def stage_load(intervals: list[tuple[float, float]], started_at: float, ended_at: float) -> StageLoad:
+    """
+    Measure the activity of a stage from the time intervals of its units of work.
+
+    Args:
+        intervals: Start and end wall time of every unit.
+        started_at: Start of the run.
+        ended_at: End of the run.
+
+    Returns:
+        Number of units, share of the run during which the stage was busy, mean and peak units in flight.
+
+    """
+    duration = max(ended_at - started_at, 1e-9)
+    events = sorted([(start, 1) for start, _ in intervals] + [(end, -1) for _, end in intervals])
+    busy = 0.0
+    in_flight = peak = 0
+    busy_since = 0.0
+    for moment, change in events:
+        if in_flight == 0 and change > 0:
+            busy_since = moment
+        in_flight += change
+        peak = max(peak, in_flight)
+        if in_flight == 0:
+            busy += moment - busy_since
+    work = sum(end - start for start, end in intervals)
+    return StageLoad(len(intervals), min(busy / duration, 1.0), work / duration, peak)
+
+
+def _key(name: str, labels: dict[str, Any]) -> MetricKey:
+    """Build the registry key of a metric and its labels."""
+    return name, tuple(sorted((label, str(value)) for label, value in labels.items()))
+
+
+def _format_labels(labels: tuple[tuple[str, str], ...], **extra: str) -> str:
+    """Format labels in Prometheus syntax."""
+    pairs = [*labels, *extra.items()]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{label}="{value}"' for label, value in pairs) + "}"
+
+
+class MetricsRegistry:
+    """Thread-safe store of the counters, gauges, distributions and stage intervals of a run."""
+
+    def __init__(self) -> None:
+        """Initialize an empty registry; the run starts now."""
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Drop everything recorded so far and restart the run clock."""
+        with self._lock:
+            self.started_at = time.time()
+            self._counters: defaultdict[MetricKey, float] = defaultdict(float)
+            self._gauges: dict[MetricKey, float] = {}
+            self._peaks: dict[MetricKey, float] = {}
+            self._distributions: defaultdict[MetricKey, Distribution] = defaultdict(Distribution)
+            self._intervals: defaultdict[str, list[tuple[float, float]]] = defaultdict(list)
+
+    def inc(self, name: str, amount: float = 1, **labels: Any) -> None:  # noqa: ANN401
+        """Increase a counter."""
+        with self._lock:
+            self._counters[_key(name, labels)] += amount
+
+    def set(self, name: str, value: float, **labels: Any) -> None:  # noqa: ANN401
+        """Set a gauge; its peak over the run is kept too."""
+        with self._lock:
+            self._set_gauge(_key(name, labels), value)
+
+    def adjust(self, name: str, delta: float, **labels: Any) -> None:  # noqa: ANN401
+        """Move a gauge up or down."""
+        key = _key(name, labels)
+        with self._lock:
+            self._set_gauge(key, self._gauges.get(key, 0) + delta)
+
+    def _set_gauge(self, key: MetricKey, value: float) -> None:
+        """Store a gauge value and its peak; the lock must be held."""
+        self._gauges[key] = value
+        self._peaks[key] = max(self._peaks.get(key, value), value)
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:  # noqa: ANN401
+        """Record a value of a distribution."""
+        with self._lock:
+            self._distributions[_key(name, labels)].add(value)
+
+    def add_interval(self, stage: str, started_at: float, ended_at: float) -> None:
+        """Record a unit of work of a stage that ran between two wall times, possibly in another process."""
+        with self._lock:
+            self._intervals[stage].append((started_at, ended_at))
+
+    @contextmanager
+    def stage(self, stage: str) -> Iterator[None]:
+        """
+        Track a unit of work of a pipeline stage.
+
+        Args:
+            stage: Stage name, a key of ``STAGE_RESOURCES`` for the bottleneck verdict.
+
+        """
+        self.adjust("stage_in_flight", 1, stage=stage)
+        started_at = time.time()
+        try:
+            yield
+        finally:
+            self.add_interval(stage, started_at, time.time())
+            self.adjust("stage_in_flight", -1, stage=stage)
+
+    @asynccontextmanager
+    async def waiting(self, queue: str, slots: asyncio.Semaphore) -> AsyncIterator[None]:
+        """
+        Hold a slot of a semaphore, counting the tasks waiting for it in the ``queue_depth`` gauge.
+
+        Args:
+            queue: Queue name, the ``queue`` label of the gauge.
+            slots: Semaphore limiting the work behind the queue.
+
+        """
+        self.adjust("queue_depth", 1, queue=queue)
+        try:
+            await slots.acquire()
+        finally:
+            self.adjust("queue_depth", -1, queue=queue)
+        try:
+            yield
+        finally:
+            slots.release()
+
+    def drain(self) -> dict[str, Any]:
+        """
+        Take the counters, distributions and stage intervals recorded so far, for ``merge`` in another process.
+
+        Returns:
+            The recordings, which are removed from this registry.
+
+        """
+        with self._lock:
+            recorded = {
+                "counters": dict(self._counters),
+                "distributions": dict(self._distributions),
+                "intervals": dict(self._intervals),
+            }
+            self._counters.clear()
+            self._distributions.clear()
+            self._intervals.clear()
+        return recorded
+
+    def merge(self, recorded: dict[str, Any]) -> None:
+        """Add recordings drained from another registry."""
+        with self._lock:
+            for key, amount in recorded["counters"].items():
+                self._counters[key] += amount
+            for key, distribution in recorded["distributions"].items():
+                self._distributions[key].merge(distribution)
+            for stage, intervals in recorded["intervals"].items():
+                self._intervals[stage].extend(intervals)
+
+    def counter(self, name: str, **labels: Any) -> float:  # noqa: ANN401
+        """Return the value of a counter."""
+        with self._lock:
+            return self._counters.get(_key(name, labels), 0.0)
+
+    def distribution(self, name: str, **labels: Any) -> Distribution:  # noqa: ANN401
+        """Return a distribution; an empty one if nothing was recorded."""
+        with self._lock:
+            return self._distributions.get(_key(name, labels)) or Distribution()
+
+    def stage_loads(self, ended_at: float | None = None) -> dict[str, StageLoad]:
+        """Measure every stage from the start of the run until ``ended_at``, now by default."""
+        ended_at = ended_at or time.time()
+        with self._lock:
+            intervals = {stage: list(stage_intervals) for stage, stage_intervals in self._intervals.items()}
+        return {stage: stage_load(spans, self.started_at, ended_at) for stage, spans in intervals.items()}
+
+    def stage_limit(self, stage: str) -> float | None:
+        """Return the concurrency limit a runner declared for a stage with the ``stage_limit`` gauge."""
+        with self._lock:
+            return self._gauges.get(_key("stage_limit", {"stage": stage}))
+
+    def bottleneck(self, loads: dict[str, StageLoad]) -> tuple[str, float] | None:
+        """
+        Pick the stage closest to saturation.
+
+        Returns:
+            The stage and its utilization, mean units in flight over the declared limit if there is one and the
+            busy ratio otherwise; None if no stage recorded work.
+
+        """
+        utilization = {}
+        for stage, load in loads.items():
+            limit = self.stage_limit(stage)
+            utilization[stage] = load.mean_in_flight / limit if limit else load.busy_ratio
+        if not utilization:
+            return None
+        stage = max(utilization, key=utilization.__getitem__)
+        return stage, utilization[stage]
+
+    def to_prometheus(self) -> str:
+        """
+        Render the registry in the Prometheus text exposition format.
+
+        Returns:
+            Counters, gauges with their ``_peak``, distributions as summaries and the stage loads as gauges.
+
+        """
+        ended_at = time.time()
+        loads = self.stage_loads(ended_at)
+        with self._lock:
+            counters = sorted(self._counters.items())
+            gauges = sorted(self._gauges.items())
+            peaks = dict(self._peaks)
+            distributions = sorted(self._distributions.items())
+
+        lines = ["# TYPE run_seconds gauge", f"run_seconds {ended_at - self.started_at:.6g}"]
+        typed: set[str] = set()
+
+        def declare(name: str, kind: str) -> None:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            declare(name, "counter")
+            lines.append(f"{name}{_format_labels(labels)} {value:.6g}")
+        for (name, labels), value in gauges:
+            declare(name, "gauge")
+            lines.append(f"{name}{_format_labels(labels)} {value:.6g}")
+        for (name, labels), _ in gauges:
+            declare(f"{name}_peak", "gauge")
+            lines.append(f"{name}_peak{_format_labels(labels)} {peaks[name, labels]:.6g}")
+        for (name, labels), distribution in distributions:
+            declare(name, "summary")
+            lines.extend(
+                f"{name}{_format_labels(labels, quantile=str(q))} {distribution.quantile(q):.6g}" for q in QUANTILES
+            )
+            lines.append(f"{name}_sum{_format_labels(labels)} {distribution.total:.6g}")
+            lines.append(f"{name}_count{_format_labels(labels)} {distribution.count}")
+        for field in StageLoad._fields:
+            declare(f"stage_{field}", "gauge")
+            lines.extend(
+                f"stage_{field}{_format_labels((), stage=stage)} {getattr(load, field):.6g}"
+                for stage, load in sorted(loads.items())
+            )
+        return "\n".join(lines) + "\n"
+
+    def to_records(self) -> list[dict[str, Any]]:
+        """
+        Render the registry as JSON records, one per metric and label set.
+
+        Returns:
+            Records with the run start, the metric name, type and labels and its values.
+
+        """
+        ended_at = time.time()
+        loads = self.stage_loads(ended_at)
+        run = datetime.fromtimestamp(self.started_at, timezone.utc).isoformat()
+        with self._lock:
+            counters = sorted(self._counters.items())
+            gauges = sorted(self._gauges.items())
+            peaks = dict(self._peaks)
+            distributions = sorted(self._distributions.items())
+
+        records: list[dict[str, Any]] = [
+            {"run": run, "metric": "run_seconds", "type": "gauge", "labels": {}, "value": ended_at - self.started_at},
+        ]
+        records.extend(
+            {"run": run, "metric": name, "type": "counter", "labels": dict(labels), "value": value}
+            for (name, labels), value in counters
+        )
+        records.extend(
+            {
+                "run": run, "metric": name, "type": "gauge", "labels": dict(labels),
+                "value": value, "peak": peaks[name, labels],
+            }
+            for (name, labels), value in gauges
+        )
+        records.extend(
+            {
+                "run": run, "metric": name, "type": "summary", "labels": dict(labels),
+                "count": distribution.count, "sum": distribution.total,
+                "min": distribution.low, "max": distribution.high,
+                **{f"p{round(q * 100)}": distribution.quantile(q) for q in QUANTILES},
+            }
+            for (name, labels), distribution in distributions
+        )
+        records.extend(
+            {"run": run, "metric": "stage_load", "type": "gauge", "labels": {"stage": stage}, **load._asdict()}
+            for stage, load in sorted(loads.items())
+        )
+        return records
+
+    def export(self, path: Path | None = None) -> Path | None:
+        """
+        Write the registry to a file.
+
+        Args:
+            path: Output file; ``METRICS_FILE`` or the ``METRICS_FILE`` environment variable by default. A
+                ``.jsonl`` file is appended to, so it collects the records of every run; anything else is
+                overwritten with Prometheus text.
+
+        Returns:
+            The written file, or None if writing failed.
+
+        """
+        path = path or Path(os.environ.get(METRICS_FILE_ENV, METRICS_FILE))
+        try:
+            if path.suffix == ".jsonl":
+                with path.open("a", encoding="utf-8") as f:
+                    f.writelines(json.dumps(record, ensure_ascii=False) + "\n" for record in self.to_records())
+            else:
+                path.write_text(self.to_prometheus(), encoding="utf-8")
+        except Exception:
+            logger.exception("Error writing metrics to %s", path)
+            return None
+        return path
+
+    def summary(self) -> str:
+        """
+        Build the end-of-run report.
+
+        Returns:
+            Stage activity, LLM, parse and download totals, LLM concurrency limits, queue depth and the
+            bottleneck verdict.
+
+        """
+        ended_at = time.time()
+        run_seconds = ended_at - self.started_at
+        loads = self.stage_loads(ended_at)
+        lines = [f"Run metrics over {run_seconds:.1f} s:"]
+        for stage, load in sorted(loads.items()):
+            limit = self.stage_limit(stage)
+            lines.append(
+                f"  {stage:<10} {load.count:6d} units, busy {load.busy_ratio:4.0%}, "
+                f"{load.mean_in_flight:.2f} in flight on average (peak {load.peak_in_flight}"
+                f"{f', limit {limit:g}' if limit else ''})",
+            )
+
+        latency = self.distribution("llm_request_seconds")
+        if latency.count:
+            prompt_tokens = self.distribution("llm_prompt_tokens").total
+            completion_tokens = self.distribution("llm_completion_tokens").total
+            lines.append(
+                f"  LLM: {latency.count} calls, p50 {latency.quantile(0.5):.2f} s, p95 {latency.quantile(0.95):.2f} s, "
+                f"{prompt_tokens:.0f} prompt and {completion_tokens:.0f} completion tokens "
+                f"({completion_tokens / max(run_seconds, 1e-9):.1f} completion tokens/s)",
+            )
+        parse = self.distribution("pdf_parse_seconds_per_page")
+        if parse.count:
+            lines.append(
+                f"  PDF parsing: {parse.count} documents, {self.counter('pdf_pages_total'):.0f} pages, "
+                f"{parse.mean * 1000:.1f} ms/page on average",
+            )
+        downloaded = self.counter("download_bytes_total")
+        throughput = self.distribution("download_bytes_per_second")
+        if throughput.count:
+            lines.append(
+                f"  Downloads: {throughput.count} files, {downloaded / 1e6:.1f} MB, "
+                f"median {throughput.quantile(0.5) / 1e6:.2f} MB/s per file",
+            )
+        lines.extend(
+            f"  LLM concurrency limit of {dict(labels).get('backend', '')}: {value:.1f} at the end, peak {peak:.0f}"
+            for labels, value, peak in self._gauges_named("llm_concurrency_limit")
+        )
+        lines.extend(
+            f"  Queue {dict(labels).get('queue', '')}: depth {value:.0f} at the end, peak {peak:.0f}"
+            for labels, value, peak in self._gauges_named("queue_depth")
+        )
+
+        bottleneck = self.bottleneck(loads)
+        if bottleneck is None:
+            lines.append("No stage activity recorded")
+        else:
+            stage, utilization = bottleneck
+            lines.append(
+                f"Verdict: {STAGE_RESOURCES.get(stage, stage)}-bound ({stage} stage at {utilization:.0%} utilization)",
+            )
+        return "\n".join(lines)
+
+    def _gauges_named(self, name: str) -> list[tuple[tuple[tuple[str, str], ...], float, float]]:
+        """Return the labels, value and peak of every gauge with the given name, sorted by labels."""
+        with self._lock:
+            return sorted(
+                (labels, value, self._peaks[key, labels])
+                for (key, labels), value in self._gauges.items() if key == name
+            )
+
+    def log_summary(self) -> None:
+        """Log the end-of-run report."""
+        logger.info("%s", self.summary())
+
+
+metrics = MetricsRegistry()
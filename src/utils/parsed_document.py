@@ -0,0 +1,280 @@
+"""
+Parse-once representation of a PDF document.
+
+The text of every page and the targets of its link annotations are extracted with PyMuPDF a single time and
+persisted in the corpus store under the arXiv ID, together with the SHA-256 of the file content. Summary text,
+page chunks and link extraction work on that parse, so a rerun over an unchanged or indexed corpus does not open
+a single PDF. ``first_page`` reads only the first page of an unstored PDF, for decisions that do not need the
+whole document.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from collections.abc import Iterator
+from pathlib import Path
+from typing import ClassVar
+
+import fitz
+
+from DAO.corpus_store import CorpusStore, DocumentRecord
+from utils.chunking import DEFAULT_TOKEN_BUDGET, TokenBudgetChunker, TokenEstimator, estimate_tokens
+from utils.link_extractor import extract_links
+from utils.metrics import metrics
+from utils.utils import clean_page_text, normalize_arxiv_id
+
+MEMO_SIZE = 32  # Parsed documents kept in memory
+
+logger = logging.getLogger(__name__)
+
+
+class ParsedDocument:
+    """Per-page text of a PDF, stored as one string with page offsets."""
+
+    _memo: ClassVar[OrderedDict[tuple[str, int, int], "ParsedDocument"]] = OrderedDict()
+    _memo_lock: ClassVar[threading.Lock] = threading.Lock()
+
+    def __init__(self, content_hash: str, pages: list[str], uris: list[str] | None = None) -> None:
+        """
+        Initialize the document from its page texts.
+
+        Args:
+            content_hash (str): SHA-256 of the PDF file.
+            pages (list[str]): Raw text of every page.
+            uris (list[str] | None): Targets of the link annotations, in page order.
+
+        """
+        self.content_hash = content_hash
+        self.uris = uris or []
+        self._text = "".join(pages)
+        self._offsets = array("I", [0])
+        for page in pages:
+            self._offsets.append(self._offsets[-1] + len(page))
+
+    @classmethod
+    def load(cls, pdf_path: Path | str, store: CorpusStore | None = None) -> "ParsedDocument":
+        """
+        Return the parsed document, reading PyMuPDF only if the corpus store has no current copy.
+
+        Args:
+            pdf_path (Path | str): The path to the PDF file.
+            store (CorpusStore | None): Corpus store to read from and write to; the shared store by default.
+
+        Returns:
+            ParsedDocument: The parsed document.
+
+        """
+        pdf_path = Path(pdf_path)
+        memo_key = cls._memo_key(pdf_path)
+        with cls._memo_lock:
+            if memo_key in cls._memo:
+                cls._memo.move_to_end(memo_key)
+                return cls._memo[memo_key]
+
+        store = store or CorpusStore.shared()
+        document = cls._from_store(store, pdf_path)
+        if document is not None:
+            metrics.inc("corpus_store_hits_total")
+        else:
+            document = cls.parse(pdf_path, cls.hash_file(pdf_path))
+            document.save(store, pdf_path)
+
+        with cls._memo_lock:
+            cls._memo[memo_key] = document
+            if len(cls._memo) > MEMO_SIZE:
+                cls._memo.popitem(last=False)
+        return document
+
+    @classmethod
+    def first_page(cls, pdf_path: Path | str, store: CorpusStore | None = None) -> str:
+        """
+        Return the raw text of the first page, parsing only that page if the document is not in the store.
+
+        Args:
+            pdf_path (Path | str): The path to the PDF file.
+            store (CorpusStore | None): Corpus store to read from; the shared store by default.
+
+        Returns:
+            str: The first page text, or an empty string for a document without pages.
+
+        """
+        pdf_path = Path(pdf_path)
+        with cls._memo_lock:
+            document = cls._memo.get(cls._memo_key(pdf_path))
+        if document is None:
+            document = cls._from_store(store or CorpusStore.shared(), pdf_path)
+        if document is not None:
+            return document.page(0) if document.page_count else ""
+
+        with metrics.stage("parse"), fitz.open(pdf_path) as doc:
+            return doc[0].get_text() if doc.page_count else ""
+
+    @staticmethod
+    def _memo_key(pdf_path: Path) -> tuple[str, int, int]:
+        """Identify a file version by path, modification time and size."""
+        stat = pdf_path.stat()
+        return str(pdf_path.resolve()), stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def doc_id(pdf_path: Path) -> str:
+        """Return the store key of a PDF, its normalized arXiv ID."""
+        return normalize_arxiv_id(pdf_path.stem)
+
+    @classmethod
+    def _from_store(cls, store: CorpusStore, pdf_path: Path) -> "ParsedDocument | None":
+        """
+        Load a document from the store if its stored copy matches the file.
+
+        A matching modification time and size are trusted; otherwise the file is hashed, and an unchanged
+        hash only refreshes the stored file metadata.
+        """
+        doc_id = cls.doc_id(pdf_path)
+        record = store.document(doc_id)
+        if record is None:
+            return None
+        stat = pdf_path.stat()
+        if (record.mtime_ns, record.size) != (stat.st_mtime_ns, stat.st_size):
+            if cls.hash_file(pdf_path) != record.content_hash:
+                return None
+            store.touch(doc_id, str(pdf_path), stat.st_mtime_ns, stat.st_size)
+        return cls(record.content_hash, store.pages(doc_id), record.uris)
+
+    @classmethod
+    def current_hash(cls, pdf_path: Path, store: CorpusStore | None = None) -> str:
+        """
+        Return the SHA-256 of a file, taken from the corpus store while its modification time and size match.
+
+        Args:
+            pdf_path (Path): The path to the PDF file.
+            store (CorpusStore | None): Corpus store to read from; the shared store by default.
+
+        Returns:
+            str: Hex digest of the file content.
+
+        """
+        record = (store or CorpusStore.shared()).document(cls.doc_id(pdf_path))
+        stat = pdf_path.stat()
+        if record is not None and (record.mtime_ns, record.size) == (stat.st_mtime_ns, stat.st_size):
+            return record.content_hash
+        return cls.hash_file(pdf_path)
+
+    @staticmethod
+    def hash_file(pdf_path: Path) -> str:
+        """
+        Compute the SHA-256 of a file.
+
+        Args:
+            pdf_path (Path): The path to the file.
+
+        Returns:
+            str: Hex digest of the file content.
+
+        """
+        digest = hashlib.sha256()
+        with pdf_path.open("rb") as f:
+            while block := f.read(1 << 20):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @classmethod
+    def parse(cls, pdf_path: Path, content_hash: str) -> "ParsedDocument":
+        """
+        Extract the text and the link annotation targets of every page with PyMuPDF.
+
+        Args:
+            pdf_path (Path): The path to the PDF file.
+            content_hash (str): SHA-256 of the file.
+
+        Returns:
+            ParsedDocument: The parsed document.
+
+        """
+        pages = []
+        uris = []
+        started = time.perf_counter()
+        with metrics.stage("parse"), fitz.open(pdf_path) as doc:
+            for page in doc:
+                pages.append(page.get_text())
+                uris.extend(link["uri"] for link in page.get_links() if link.get("uri"))
+        metrics.inc("pdf_pages_total", len(pages))
+        metrics.observe("pdf_parse_seconds_per_page", (time.perf_counter() - started) / max(len(pages), 1))
+        logger.debug("Parsed %s (%d pages)", pdf_path, len(pages))
+        return cls(content_hash, pages, uris)
+
+    def record(self, pdf_path: Path) -> DocumentRecord:
+        """Return the store metadata of the document parsed from a file."""
+        stat = pdf_path.stat()
+        return DocumentRecord(
+            self.doc_id(pdf_path), str(pdf_path), self.content_hash, stat.st_mtime_ns, stat.st_size,
+            self.page_count, self.uris,
+        )
+
+    def save(self, store: CorpusStore, pdf_path: Path) -> None:
+        """Write the document to the corpus store; a failure only costs a parse on the next load."""
+        try:
+            store.put(self.record(pdf_path), list(self.pages()))
+        except Exception:
+            logger.exception("Error storing %s in the corpus store", pdf_path)
+
+    @property
+    def page_count(self) -> int:
+        """Number of pages in the document."""
+        return len(self._offsets) - 1
+
+    def page(self, index: int) -> str:
+        """
+        Return the raw text of a page.
+
+        Args:
+            index (int): Zero-based page number.
+
+        Returns:
+            str: The page text as extracted by PyMuPDF.
+
+        """
+        return self._text[self._offsets[index]:self._offsets[index + 1]]
+
+    def pages(self) -> Iterator[str]:
+        """Iterate over the raw text of all pages."""
+        for index in range(self.page_count):
+            yield self.page(index)
+
+    def summary_text(self, num_pages: int) -> str:
+        """
+        Return the cleaned text of the first pages for summarization.
+
+        Args:
+            num_pages (int): The number of pages to include.
+
+        Returns:
+            str: The cleaned text.
+
+        """
+        return "".join(clean_page_text(self.page(index)) for index in range(min(num_pages, self.page_count)))
+
+    def chunks(
+            self,
+            token_budget: int = DEFAULT_TOKEN_BUDGET,
+            overlap_tokens: int = 0,
+            estimator: TokenEstimator = estimate_tokens,
+    ) -> list[str]:
+        """
+        Split the document into chunks that fit a token budget, with ``PAGE n`` markers.
+
+        Args:
+            token_budget (int): Maximum number of tokens per chunk.
+            overlap_tokens (int): Tokens of trailing text repeated at the start of the next chunk.
+            estimator (TokenEstimator): Function estimating the token count of a text.
+
+        Returns:
+            list[str]: A list of text chunks.
+
+        """
+        return TokenBudgetChunker(token_budget, overlap_tokens, estimator).split(self.pages())
+
+    def links(self) -> dict[str, list[str]]:
+        """Extract links from the page texts and the link annotations."""
+        return extract_links(self.pages(), self.uris)
@@ -2,30 +2,35 @@
 PDFUtils Module.
 
 Module provides utility functions for handling PDF operations, including reading, cleaning,
-extracting links, and downloading arXiv PDFs.
+extracting links, and downloading arXiv PDFs. Text access goes through ParsedDocument, so each
+PDF is parsed at most once.
 
 Classes:
     PDFUtils: A class containing static methods for PDF operations.
 
 Functions:
     read_and_clean_pdf: Read and clean text from a PDF file.
+    read_abstract: Read the abstract from the first page of a PDF file.
     read_pdf_chunks: Read PDF in chunks with error handling.
     extract_links_from_pdf: Extract links from a PDF file.
     download_arxiv_pdf: Download an arXiv PDF.
 """
 
+import asyncio
 import logging
 import re
-import sys
 from pathlib import Path
 
-import fitz
-import requests
-
-from utils.utils import normalize_arxiv_id, sanitize_text
+from utils.chunking import DEFAULT_TOKEN_BUDGET, TokenEstimator, estimate_tokens
+from utils.download_manager import DownloadManager
+from utils.parsed_document import ParsedDocument
+from utils.utils import clean_page_text
 
 MAX_PAGES_FOR_SUMMARY = 5
-CHUNK_SIZE = 5
+MAX_ABSTRACT_CHARS = 3000
+ABSTRACT_PATTERN = re.compile(
+    r"\babstract\b[\s.:\u2014-]*(.+?)(?:\n\s*(?:\d+\.?|I\.)?\s*introduction\b|$)", re.IGNORECASE | re.DOTALL,
+)
 
 # Set up a logger for the module
 logger = logging.getLogger(__name__)
@@ -47,40 +52,53 @@ class PDFUtils:
 
         """
         try:
-            doc = fitz.open(pdf_path)
-            text = ""
-            for page_num in range(min(num_pages, len(doc))):
-                page = doc[page_num]
-                text += page.get_text().replace("-\n", "").replace("\n", " ")
-            return text
+            return ParsedDocument.load(pdf_path).summary_text(num_pages)
         except Exception:
             logger.exception("Error reading PDF %s", pdf_path)
             return ""
 
     @staticmethod
-    def read_pdf_chunks(pdf_path: Path, chunk_size: int = CHUNK_SIZE) -> list[str]:
+    def read_abstract(pdf_path: str) -> str:
+        """
+        Read the abstract of a paper, parsing only its first page.
+
+        Args:
+            pdf_path (str): The path to the PDF file.
+
+        Returns:
+            str: The cleaned abstract, or the beginning of the first page if no abstract heading is found.
+
+        """
+        try:
+            page = ParsedDocument.first_page(pdf_path)
+            match = ABSTRACT_PATTERN.search(page)
+            return clean_page_text(match.group(1) if match else page).strip()[:MAX_ABSTRACT_CHARS]
+        except Exception:
+            logger.exception("Error reading abstract of %s", pdf_path)
+            return ""
+
+    @staticmethod
+    def read_pdf_chunks(
+            pdf_path: Path,
+            token_budget: int = DEFAULT_TOKEN_BUDGET,
+            overlap_tokens: int = 0,
+            estimator: TokenEstimator = estimate_tokens,
+    ) -> list[str]:
         """
-        Read PDF in chunks with error handling.
+        Read PDF in chunks packed up to a token budget, with error handling.
 
         Args:
             pdf_path (Path): The path to the PDF file.
-            chunk_size (int): The number of pages per chunk.
+            token_budget (int): Maximum number of tokens per chunk.
+            overlap_tokens (int): Tokens of trailing text repeated at the start of the next chunk.
+            estimator (TokenEstimator): Function estimating the token count of a text.
 
         Returns:
             list[str]: A list of text chunks from the PDF.
 
         """
         try:
-            doc = fitz.open(pdf_path)
-            chunks = []
-            for i in range(0, len(doc), chunk_size):
-                chunk_text = ""
-                for page_num in range(i, min(i + chunk_size, len(doc))):
-                    page = doc[page_num]
-                    text = page.get_text().replace("-\n", "").replace("\n", " ")
-                    chunk_text += f"PAGE {page_num + 1}:\n{sanitize_text(text)}\n"
-                chunks.append(chunk_text)
-            return chunks
+            return ParsedDocument.load(pdf_path).chunks(token_budget, overlap_tokens, estimator)
         except Exception:
             logger.exception("Error reading %s", pdf_path)
             return []
@@ -88,7 +106,7 @@ class PDFUtils:
     @staticmethod
     def extract_links_from_pdf(pdf_path: str) -> dict[str, list[str]]:
         """
-        Extract links from a PDF file.
+        Extract links from the text and the link annotations of a PDF file.
 
         Args:
             pdf_path (str): The path to the PDF file.
@@ -98,28 +116,7 @@ class PDFUtils:
 
         """
         try:
-            doc = fitz.open(pdf_path)
-            text = "".join([page.get_text().replace("\n", " ") for page in doc])
-
-            patterns = {
-                "arxiv": re.compile(r"arxiv:\s*(\d{4}\.\d{4,}(?:v\d+)?)\b", re.IGNORECASE),
-                "doi": re.compile(r"\b(10\.\d{4,}/[\S]+)\b", re.IGNORECASE),
-                "url": re.compile(r"https?://\S+"),
-                "pubmed": re.compile(r"pmid:\s?(\d+)"),
-                "isbn": re.compile(r"\bISBN(?:-1[0-9]{3}(?:-[0-9]{3}){2}-[0-9X])?\b", re.IGNORECASE),
-            }
-
-            results = {}
-            for key, pattern in patterns.items():
-                matches = pattern.findall(text)
-                clean_matches = [m[0].lower().strip() if isinstance(m, tuple) else m.lower().strip() for m in matches]
-                if clean_matches:
-                    results[key] = list(set(clean_matches))
-
-            if "arxiv" in results:
-                results["arxiv"] = [normalize_arxiv_id(arxiv_id) for arxiv_id in results["arxiv"]]
-
-            return results
+            return ParsedDocument.load(pdf_path).links()
         except Exception:
             logger.exception("Error extracting links from %s", pdf_path)
             return {}
@@ -129,6 +126,8 @@ class PDFUtils:
         """
         Download an arXiv PDF.
 
+        Must not be called from a running event loop; use ``DownloadManager.download`` there.
+
         Args:
             arxiv_id (str): The arXiv ID.
             save_dir (str): The directory to save the PDF.
@@ -137,29 +136,8 @@ class PDFUtils:
             bool: True if the download was successful, False otherwise.
 
         """
-        normalized_id = normalize_arxiv_id(arxiv_id)
-        Path(save_dir).mkdir(exist_ok=True)
-        filename = Path(save_dir) / f"{normalized_id}.pdf"
-
-        if filename.exists():
-            logger.info("File %s already exists. Skipping download.", filename)
-            return True
+        async def run_download() -> Path | None:
+            async with DownloadManager(Path(save_dir)) as manager:
+                return await manager.download(arxiv_id)
 
-        url = f"https://arxiv.org/pdf/{arxiv_id}.pdf"
-        try:
-            response = requests.get(url, stream=True, timeout=10)
-            response.raise_for_status()
-
-            if "application/pdf" not in response.headers.get("Content-Type", ""):
-                logger.error("Invalid content type for %s", arxiv_id)
-                sys.exit(1)
-
-            with filename.open("wb") as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-            logger.info("Successfully downloaded %s", normalized_id)
-            return True
-        except Exception:
-            logger.exception("Failed to download %s", arxiv_id)
-            return False
+        return asyncio.run(run_download()) is not None
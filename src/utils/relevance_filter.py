@@ -0,0 +1,260 @@
+"""
+Local relevance pre-filter in front of the LLM relevance check.
+
+A logistic regression over hashed TF-IDF features of the paper text is trained on the yes/no decisions of
+the LLM. Papers the model is confident about skip the LLM; uncertain ones, and a small audit sample of the
+confident ones, still go to the LLM and become new training data. The model is refit every
+``RETRAIN_EVERY`` decisions, warm-started from the previous weights. All methods are thread-safe, so the
+crawler can run them off the event loop.
+"""
+
+import hashlib
+import itertools
+import logging
+import re
+import threading
+import zlib
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+RELEVANCE_FILTER_FILE = Path("relevance_filter.npz")
+N_FEATURES = 1 << 18  # Hashed unigram and bigram buckets
+MIN_CLASS_SIZE = 20  # LLM decisions of each class before the filter decides on its own
+LOWER_THRESHOLD = 0.05  # Below this probability a paper is rejected without the LLM
+UPPER_THRESHOLD = 0.95  # Above this probability a paper is accepted without the LLM
+DECISION_THRESHOLD = 0.5  # Probability counted as a "yes" when comparing with the LLM
+AUDIT_RATE = 0.05  # Share of confident decisions still sent to the LLM to measure agreement
+RETRAIN_EVERY = 20  # New decisions between refits
+EPOCHS = 300
+LEARNING_RATE = 2.0
+L2_PENALTY = 1e-4
+TOKEN_PATTERN = re.compile(r"[a-z][a-z0-9]+")
+STAT_NAMES = ("skipped", "saved_llm_calls", "llm_checked", "agreed", "audited", "audit_agreed")
+
+
+def hash_features(text: str) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Count the hashed unigrams and bigrams of a text.
+
+    Args:
+        text (str): The text to featurize.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Sorted feature indices and their counts.
+
+    """
+    tokens = TOKEN_PATTERN.findall(text.lower())
+    terms = itertools.chain(tokens, (f"{first} {second}" for first, second in itertools.pairwise(tokens)))
+    hashes = np.fromiter((zlib.crc32(term.encode()) for term in terms), dtype=np.int64) % N_FEATURES
+    indices, counts = np.unique(hashes, return_counts=True)
+    return indices.astype(np.int32), counts.astype(np.float64)
+
+
+class RelevanceFilter:
+    """Cascade classifier that answers confident relevance checks locally and defers the rest to the LLM."""
+
+    def __init__(self, path: Path = RELEVANCE_FILTER_FILE) -> None:
+        """
+        Initialize an untrained filter without loading it.
+
+        Args:
+            path (Path): File holding the training decisions, the model and the statistics.
+
+        """
+        self.path = path
+        self.indices: list[np.ndarray] = []
+        self.counts: list[np.ndarray] = []
+        self.labels: list[bool] = []
+        self.weights = np.zeros(N_FEATURES)
+        self.bias = 0.0
+        self.idf: np.ndarray | None = None
+        self.pending = 0
+        self.counters = dict.fromkeys(STAT_NAMES, 0)
+        self._audited: set[str] = set()
+        self._lock = threading.RLock()
+
+    def load(self) -> None:
+        """Load the decisions, the model and the statistics of previous runs."""
+        if not self.path.exists():
+            return
+        try:
+            with np.load(self.path) as data:
+                bounds = data["indptr"]
+                self.indices = np.split(data["indices"], bounds[1:-1])
+                self.counts = np.split(data["counts"], bounds[1:-1])
+                self.labels = data["labels"].astype(bool).tolist()
+                self.weights = data["weights"]
+                self.bias = float(data["bias"])
+                self.idf = data["idf"] if data["idf"].size else None
+                self.counters = dict(zip(STAT_NAMES, data["stats"].tolist(), strict=True))
+            logger.info("Relevance filter loaded with %d decisions", len(self.labels))
+        except Exception:
+            logger.exception("Error loading relevance filter %s", self.path)
+
+    def save(self) -> None:
+        """Persist the decisions, the model and the statistics atomically."""
+        with self._lock:
+            try:
+                lengths = [len(indices) for indices in self.indices]
+                tmp_path = self.path.with_name(f"{self.path.stem}.tmp.npz")
+                np.savez_compressed(
+                    tmp_path,
+                    indptr=np.concatenate(([0], np.cumsum(lengths, dtype=np.int64))),
+                    indices=np.concatenate(self.indices) if self.indices else np.empty(0, np.int32),
+                    counts=np.concatenate(self.counts) if self.counts else np.empty(0),
+                    labels=np.array(self.labels, dtype=bool),
+                    weights=self.weights,
+                    bias=np.array(self.bias),
+                    idf=self.idf if self.idf is not None else np.empty(0),
+                    stats=np.array([self.counters[name] for name in STAT_NAMES]),
+                )
+                tmp_path.replace(self.path)
+            except Exception:
+                logger.exception("Error saving relevance filter %s", self.path)
+
+    @property
+    def trained(self) -> bool:
+        """Whether the model has seen enough decisions of both classes to decide on its own."""
+        return self.idf is not None and self._enough_decisions()
+
+    def probability(self, text: str) -> float | None:
+        """
+        Estimate the probability that a paper is relevant.
+
+        Args:
+            text (str): Text of the paper.
+
+        Returns:
+            float | None: The probability, or None while the filter is not trained.
+
+        """
+        features = hash_features(text)
+        with self._lock:
+            return self._probability(*features) if self.trained else None
+
+    def _probability(self, indices: np.ndarray, counts: np.ndarray) -> float:
+        """Apply the model to hashed feature counts."""
+        values = self._tfidf(indices, counts, self.idf)
+        return float(1 / (1 + np.exp(-(values @ self.weights[indices] + self.bias))))
+
+    def decide(self, key: str, text: str) -> bool | None:
+        """
+        Decide relevance locally if the model is confident.
+
+        Args:
+            key (str): Stable identifier of the paper, used to pick the audit sample.
+            text (str): Text of the paper.
+
+        Returns:
+            bool | None: The verdict, or None if the LLM has to decide.
+
+        """
+        probability = self.probability(text)
+        if probability is None or LOWER_THRESHOLD < probability < UPPER_THRESHOLD:
+            return None
+        with self._lock:
+            if int(hashlib.sha256(key.encode()).hexdigest()[:8], 16) < AUDIT_RATE * 0x100000000:
+                self._audited.add(key)
+                return None
+            self.counters["skipped"] += 1
+        return probability >= UPPER_THRESHOLD
+
+    def count_saved_calls(self, calls: int) -> None:
+        """Add LLM calls that a local decision made unnecessary."""
+        with self._lock:
+            self.counters["saved_llm_calls"] += calls
+
+    def record(self, key: str, text: str, *, relevant: bool) -> None:
+        """
+        Add an LLM decision to the training data and refit the model when enough new decisions arrived.
+
+        Args:
+            key (str): Identifier passed to ``decide``.
+            text (str): Text of the paper.
+            relevant (bool): The verdict of the LLM.
+
+        """
+        indices, counts = hash_features(text)
+        with self._lock:
+            if self.trained:
+                agreed = (self._probability(indices, counts) >= DECISION_THRESHOLD) == relevant
+                self.counters["llm_checked"] += 1
+                self.counters["agreed"] += agreed
+                if key in self._audited:
+                    self._audited.discard(key)
+                    self.counters["audited"] += 1
+                    self.counters["audit_agreed"] += agreed
+
+            self.indices.append(indices)
+            self.counts.append(counts)
+            self.labels.append(relevant)
+            self.pending += 1
+            if self.pending >= RETRAIN_EVERY or (self.idf is None and self._enough_decisions()):
+                self.fit()
+                self.save()
+
+    def _enough_decisions(self) -> bool:
+        """Whether there are enough decisions of both classes to fit the model."""
+        positives = sum(self.labels)
+        return min(positives, len(self.labels) - positives) >= MIN_CLASS_SIZE
+
+    @staticmethod
+    def _tfidf(indices: np.ndarray, counts: np.ndarray, idf: np.ndarray) -> np.ndarray:
+        """Weight raw counts with sublinear TF and IDF, normalized to unit length."""
+        values = (1 + np.log(counts)) * idf[indices]
+        norm = np.linalg.norm(values)
+        return values / norm if norm else values
+
+    def fit(self) -> None:
+        """Refit TF-IDF and the logistic regression on all decisions, warm-started from the current weights."""
+        with self._lock:
+            self.pending = 0
+            if not self._enough_decisions():
+                return
+
+            rows = len(self.labels)
+            lengths = np.array([len(indices) for indices in self.indices])
+            indices = np.concatenate(self.indices)
+            row_ids = np.repeat(np.arange(rows), lengths)
+            document_frequency = np.bincount(indices, minlength=N_FEATURES)
+            idf = np.log((1 + rows) / (1 + document_frequency)) + 1
+            values = np.concatenate([
+                self._tfidf(row_indices, row_counts, idf)
+                for row_indices, row_counts in zip(self.indices, self.counts, strict=True)
+            ])
+
+            labels = np.array(self.labels, dtype=np.float64)
+            positives = labels.sum()
+            sample_weight = np.where(labels == 1, rows / (2 * positives), rows / (2 * (rows - positives))) / rows
+
+            weights = self.weights.copy()
+            bias = self.bias
+            for _ in range(EPOCHS):
+                scores = np.bincount(row_ids, weights=values * weights[indices], minlength=rows) + bias
+                residual = (1 / (1 + np.exp(-scores)) - labels) * sample_weight
+                gradient = np.bincount(indices, weights=values * residual[row_ids], minlength=N_FEATURES)
+                weights -= LEARNING_RATE * (gradient + L2_PENALTY * weights)
+                bias -= LEARNING_RATE * residual.sum()
+
+            self.weights, self.bias, self.idf = weights, bias, idf
+            logger.info("Relevance filter refit on %d decisions (%d relevant)", rows, int(positives))
+
+    def stats(self) -> dict[str, Any]:
+        """Return the counters together with the size of the training data."""
+        return {**self.counters, "decisions": len(self.labels), "relevant": sum(self.labels)}
+
+    def log_stats(self) -> None:
+        """Log a one-line summary of the filter statistics."""
+        stats = self.counters
+        logger.info(
+            "Relevance filter: %d local decisions, %d LLM calls saved, %.1f%% agreement with the LLM "
+            "(%d checks), %.1f%% on audited confident decisions (%d audits)",
+            stats["skipped"], stats["saved_llm_calls"],
+            100 * stats["agreed"] / stats["llm_checked"] if stats["llm_checked"] else 0.0, stats["llm_checked"],
+            100 * stats["audit_agreed"] / stats["audited"] if stats["audited"] else 0.0, stats["audited"],
+        )
+
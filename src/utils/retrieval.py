@@ -0,0 +1,108 @@
+"""
+Question-driven chunk retrieval over the vector index.
+
+The chunks of an article are embedded once and kept in the vector index; a question is embedded once per run.
+The map phase then sends only the chunks closest to the question to the LLM, and the same index answers
+questions over the whole corpus.
+"""
+
+import logging
+from collections.abc import Sequence
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from utils.vector_index import VectorHit, VectorIndex, chunks_hash
+
+if TYPE_CHECKING:
+    from prompt.llm_service import AsyncEmbeddingClient
+
+logger = logging.getLogger(__name__)
+
+RETRIEVAL_TOP_K = 4  # Chunks per article sent to the LLM in retrieval mode
+RETRIEVAL_CHUNK_TOKENS = 2000  # Chunk size in retrieval mode, small enough for the embedding model
+
+
+class ChunkRetriever:
+    """Select the chunks most relevant to a question."""
+
+    def __init__(self, embedder: "AsyncEmbeddingClient", index: VectorIndex, top_k: int = RETRIEVAL_TOP_K) -> None:
+        """
+        Initialize the retriever.
+
+        Args:
+            embedder: Client of the embeddings endpoint.
+            index: Loaded vector index.
+            top_k: Number of chunks selected per article.
+
+        """
+        self.embedder = embedder
+        self.index = index
+        self.top_k = top_k
+        self._questions: dict[str, np.ndarray] = {}
+
+    async def embed_article(self, article_id: str, chunks: Sequence[str]) -> bool:
+        """
+        Make sure the index holds current vectors of an article.
+
+        Args:
+            article_id: The article.
+            chunks: Its chunk texts.
+
+        Returns:
+            True if the vectors are available, False if embedding failed.
+
+        """
+        content_hash = chunks_hash(chunks, self.embedder.model)
+        if self.index.has_article(article_id, content_hash):
+            return True
+        vectors = await self.embedder.embed(chunks)
+        if vectors is None:
+            return False
+        self.index.add(article_id, content_hash, vectors)
+        return True
+
+    async def question_vector(self, question: str) -> np.ndarray | None:
+        """Return the embedding of a question, computed once."""
+        if question not in self._questions:
+            vectors = await self.embedder.embed([question])
+            if vectors is None:
+                return None
+            self._questions[question] = vectors[0]
+        return self._questions[question]
+
+    async def select(self, article_id: str, chunks: Sequence[str], question: str) -> list[int]:
+        """
+        Pick the chunks of an article that are most relevant to a question.
+
+        Args:
+            article_id: The article.
+            chunks: Its chunk texts.
+            question: The research question.
+
+        Returns:
+            Indices of the selected chunks in document order; all chunks if embedding failed.
+
+        """
+        if len(chunks) <= self.top_k:
+            return list(range(len(chunks)))
+        query = await self.question_vector(question)
+        if query is None or not await self.embed_article(article_id, chunks):
+            logger.warning("Retrieval unavailable for %s, mapping all chunks", article_id)
+            return list(range(len(chunks)))
+        return sorted(hit.chunk for hit in self.index.search(query, self.top_k, article_id))
+
+    async def search(self, question: str, k: int) -> list[VectorHit]:
+        """
+        Find the chunks of the whole index most relevant to a question.
+
+        Args:
+            question: The question.
+            k: Maximum number of chunks.
+
+        Returns:
+            Hits ordered by similarity, best first; empty if the question could not be embedded.
+
+        """
+        query = await self.question_vector(question)
+        return [] if query is None else self.index.search(query, k)
@@ -24,19 +24,18 @@ def normalize_arxiv_id(arxiv_id: str) -> str:
     """
     return re.sub(r"v\d+$", "", arxiv_id, flags=re.IGNORECASE).lower().strip()
 
-def setup_signal_handler(state: object, links: object) -> None:
+def setup_signal_handler(*stores: object) -> None:
     """
     Set up signal handlers to save state and links on interrupt signals.
 
     Args:
-        state (object): The state object to save.
-        links (object): The links object to save.
+        *stores (object): The state and links objects to save.
 
     """
-    def handler() -> None:
+    def handler(_signum: int, _frame: object) -> None:
         logger.info("Received interrupt signal. Saving state...")
-        state.save()
-        links.save()
+        for store in stores:
+            store.save()
         sys.exit(0)
 
     signal.signal(signal.SIGINT, handler)
@@ -55,6 +54,19 @@ def sanitize_text(text: str) -> str:
     """
     return re.sub(r"[\x00-\x1F\\]", " ", text).strip()
 
+def clean_page_text(text: str) -> str:
+    """
+    Join hyphenated line breaks and flatten the remaining line breaks to spaces.
+
+    Args:
+        text (str): Raw page text.
+
+    Returns:
+        str: Single-line page text.
+
+    """
+    return text.replace("-\n", "").replace("\n", " ")
+
 def batched(iterable: Iterable, n: int) -> Iterable[tuple]:
     """
     Batch data into tuples of size n.
@@ -0,0 +1,168 @@
+"""
+Memory-mapped vector index of document chunks.
+
+Chunk embeddings are appended to one flat float32 file that is memory-mapped for search, so the index never
+has to fit in memory and opening it is free. A JSON manifest maps every article to its row range together
+with a hash of the chunk texts; an article whose chunks changed gets new rows and its old rows are ignored.
+Vectors are expected to be L2-normalized, so the dot product is the cosine similarity.
+"""
+
+import hashlib
+import json
+import logging
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any, NamedTuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+VECTOR_INDEX_DIR = Path("vector_index")
+VECTORS_FILE = "vectors.f32"
+MANIFEST_FILE = "manifest.json"
+
+
+class VectorHit(NamedTuple):
+    """A chunk matching a query vector."""
+
+    article_id: str
+    chunk: int
+    score: float
+
+
+def chunks_hash(chunks: Sequence[str], model: str) -> str:
+    """
+    Hash the chunk texts of an article together with the embedding model.
+
+    Args:
+        chunks: Chunk texts in order.
+        model: Name of the embedding model.
+
+    Returns:
+        Hex digest identifying the embedded content.
+
+    """
+    digest = hashlib.sha256(model.encode())
+    for chunk in chunks:
+        digest.update(b"\0")
+        digest.update(chunk.encode())
+    return digest.hexdigest()
+
+
+class VectorIndex:
+    """Append-only vector store with exact top-k search over a memory map."""
+
+    def __init__(self, directory: Path = VECTOR_INDEX_DIR) -> None:
+        """
+        Initialize an empty index without loading it.
+
+        Args:
+            directory: Directory of the vector file and the manifest.
+
+        """
+        self.directory = directory
+        self.dim = 0
+        self.rows = 0
+        self.articles: dict[str, dict[str, Any]] = {}
+        self._vectors: np.memmap | None = None
+
+    @property
+    def vectors_path(self) -> Path:
+        """File of the raw float32 vectors."""
+        return self.directory / VECTORS_FILE
+
+    @property
+    def manifest_path(self) -> Path:
+        """File of the article row ranges."""
+        return self.directory / MANIFEST_FILE
+
+    def load(self) -> None:
+        """Load the manifest of a previous run."""
+        if not self.manifest_path.exists():
+            return
+        try:
+            manifest = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+            self.dim, self.rows, self.articles = manifest["dim"], manifest["rows"], manifest["articles"]
+            self._vectors = None
+            logger.info("Vector index loaded with %d articles, %d vectors", len(self.articles), self.rows)
+        except Exception:
+            logger.exception("Error loading vector index %s", self.manifest_path)
+
+    def save(self) -> None:
+        """Write the manifest atomically; vectors beyond its row count are ignored on load."""
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.manifest_path.with_suffix(".tmp")
+            tmp_path.write_text(
+                json.dumps({"dim": self.dim, "rows": self.rows, "articles": self.articles}), encoding="utf-8",
+            )
+            tmp_path.replace(self.manifest_path)
+        except Exception:
+            logger.exception("Error saving vector index %s", self.manifest_path)
+
+    def has_article(self, article_id: str, content_hash: str) -> bool:
+        """Whether the index holds current vectors of an article."""
+        entry = self.articles.get(article_id)
+        return entry is not None and entry["hash"] == content_hash
+
+    def add(self, article_id: str, content_hash: str, vectors: np.ndarray) -> None:
+        """
+        Append the chunk vectors of an article, replacing its previous vectors.
+
+        Args:
+            article_id: Article the chunks belong to.
+            content_hash: Hash of the chunk texts from ``chunks_hash``.
+            vectors: One normalized vector per chunk, in chunk order.
+
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if not self.dim:
+            self.dim = vectors.shape[1]
+        elif vectors.shape[1] != self.dim:
+            message = f"Vector dimension {vectors.shape[1]} does not match the index dimension {self.dim}"
+            raise ValueError(message)
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self.vectors_path.open("ab") as f:
+            f.truncate(self.rows * self.dim * vectors.itemsize)
+            f.write(vectors.tobytes())
+        self.articles[article_id] = {"hash": content_hash, "start": self.rows, "stop": self.rows + len(vectors)}
+        self.rows += len(vectors)
+        self._vectors = None
+        self.save()
+
+    def _matrix(self) -> np.ndarray:
+        """Return the memory-mapped vectors."""
+        if self._vectors is None:
+            self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(self.rows, self.dim))
+        return self._vectors
+
+    def search(self, query: np.ndarray, k: int, article_id: str | None = None) -> list[VectorHit]:
+        """
+        Find the chunks most similar to a query vector.
+
+        Args:
+            query: Normalized query vector.
+            k: Maximum number of hits.
+            article_id: Restrict the search to the chunks of one article.
+
+        Returns:
+            Hits ordered by cosine similarity, best first.
+
+        """
+        entries = [(article_id, self.articles[article_id])] if article_id in self.articles else []
+        if article_id is None:
+            entries = list(self.articles.items())
+        if not entries or k <= 0:
+            return []
+
+        matrix = self._matrix()
+        query = np.asarray(query, dtype=np.float32)
+        scores = np.concatenate([matrix[entry["start"]:entry["stop"]] @ query for _, entry in entries])
+        owners = np.repeat(np.arange(len(entries)), [entry["stop"] - entry["start"] for _, entry in entries])
+        offsets = np.concatenate([np.arange(entry["stop"] - entry["start"]) for _, entry in entries])
+
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+        return [VectorHit(entries[owners[row]][0], int(offsets[row]), float(scores[row])) for row in top]
@@ -0,0 +1,22 @@
+import time
+
+from utils.adaptive_limit import AdaptiveLimit
+
+
+def test_grows_while_latency_is_flat_and_backs_off_on_spikes_and_drops():
+    limit = AdaptiveLimit(max_limit=8, initial=2)
+    for _ in range(10):
+        limit.update(0.1, limit.current, time.monotonic())
+    assert limit.current == 8
+
+    sent = time.monotonic()
+    limit.update(1.0, 8, sent)
+    assert limit.current == 5
+    limit.update(1.0, 8, sent)
+    assert limit.current == 5  # The same round of requests backs off once
+
+    limit.update(None, 5, time.monotonic(), dropped=True)
+    assert limit.current == 3
+    before = limit.limit
+    limit.update(0.1, 1, time.monotonic())
+    assert limit.limit == before  # No growth while the limit is not used
@@ -0,0 +1,43 @@
+from utils.chunking import TokenBudgetChunker, estimate_tokens, token_budget
+
+
+def count_words(text: str) -> int:
+    return len(text.split())
+
+
+def test_sparse_pages_are_packed_together():
+    pages = ["Figure 1.", "Figure 2.", "Figure 3."]
+    chunks = TokenBudgetChunker(budget=100).split(pages)
+    assert chunks == ["PAGE 1:\nFigure 1.\nPAGE 2:\nFigure 2.\nPAGE 3:\nFigure 3.\n"]
+
+
+def test_dense_page_is_split_within_budget():
+    page = "\n\n".join(" ".join(["word"] * 40) for _ in range(5))
+    chunker = TokenBudgetChunker(budget=60, estimator=count_words)
+    chunks = chunker.split([page])
+
+    assert len(chunks) == 5
+    assert all(chunk.startswith("PAGE 1:\n") for chunk in chunks)
+    assert all(count_words(chunk) <= 60 for chunk in chunks)
+
+
+def test_overlap_repeats_trailing_text():
+    pages = ["alpha " * 10, "beta " * 10, "gamma " * 10]
+    chunks = TokenBudgetChunker(budget=30, overlap_tokens=15, estimator=count_words).split(pages)
+
+    assert chunks[0].startswith("PAGE 1:\nalpha")
+    assert chunks[1].startswith("PAGE 1:\nalpha\nPAGE 2:\nbeta")
+    assert "PAGE 3:\ngamma" in chunks[1]
+
+
+def test_budget_from_context_window():
+    assert token_budget(32768, 10000, 768) == 22000
+    assert estimate_tokens("abcdefgh") == 2
+
+
+def test_overlap_smaller_than_a_unit_repeats_its_word_tail():
+    pages = [" ".join(f"w{index}" for index in range(page * 10, page * 10 + 10)) for page in range(3)]
+    chunks = TokenBudgetChunker(budget=24, overlap_tokens=5, estimator=count_words).split(pages)
+
+    assert chunks[0] == f"PAGE 1:\n{pages[0]}\nPAGE 2:\n{pages[1]}\n"
+    assert chunks[1] == f"PAGE 2:\nw17 w18 w19\nPAGE 3:\n{pages[2]}\n"
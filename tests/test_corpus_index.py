@@ -0,0 +1,37 @@
+import os
+from pathlib import Path
+
+import pytest
+
+fitz = pytest.importorskip("fitz")
+
+from corpus_index import index_corpus  # noqa: E402
+from DAO.corpus_store import CorpusStore  # noqa: E402
+
+
+def write_pdf(path: Path, *pages: str) -> None:
+    doc = fitz.open()
+    for text in pages:
+        doc.new_page().insert_text((72, 72), text)
+    doc.save(path)
+
+
+def test_index_is_incremental_and_searchable(tmp_path: Path):
+    corpus = tmp_path / "research"
+    corpus.mkdir()
+    write_pdf(corpus / "2401.00001v2.pdf", "Sparse attention for long documents", "Related work")
+    write_pdf(corpus / "2401.00002.pdf", "State space models")
+    store = CorpusStore(tmp_path / "corpus.sqlite")
+
+    assert index_corpus(store, (corpus,), workers=2)["parsed"] == 2
+    assert store.pages("2401.00001")[1].startswith("Related work")
+    assert [hit.doc_id for hit in store.search("attention")] == ["2401.00001"]
+    assert store.search('state space (') == store.search("state space")
+
+    os.utime(corpus / "2401.00002.pdf", ns=(0, 0))
+    write_pdf(corpus / "2401.00001v2.pdf", "Dense retrieval")
+    counts = index_corpus(store, (corpus,), workers=2)
+
+    assert (counts["parsed"], counts["refreshed"], counts["unchanged"]) == (1, 1, 0)
+    assert store.search("attention") == []
+    assert store.search("retrieval")[0].page == 0
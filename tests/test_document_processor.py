@@ -0,0 +1,264 @@
+import asyncio
+import hashlib
+import json
+import random
+
+import fitz
+import httpx
+import pytest
+
+from DAO.processing_state import ProcessingState
+from prompt.llm_service import AsyncLLMClient, LLMService
+
+
+class CountingLLM:
+    def __init__(self):
+        self.calls = 0
+
+    async def get_llm_response(self, prompt):
+        self.calls += 1
+        return hashlib.sha256(prompt.encode()).hexdigest()[:12]
+
+
+class RecordingLLM(CountingLLM):
+    def __init__(self):
+        super().__init__()
+        self.prompts = []
+
+    async def get_llm_response(self, prompt):
+        self.prompts.append(prompt)
+        return await super().get_llm_response(prompt)
+
+
+class StubClient(RecordingLLM):
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_):
+        pass
+
+
+class JitteredLLM(CountingLLM):
+    def __init__(self, *, sequential):
+        super().__init__()
+        self.slots = asyncio.Semaphore(1 if sequential else 64)
+
+    async def get_llm_response(self, prompt):
+        async with self.slots:
+            await asyncio.sleep(random.Random(prompt).random() / 100)
+            return await super().get_llm_response(prompt)
+
+
+TOKEN_BUDGET = 100
+SCOPE = f"chunks:a1@v1:{TOKEN_BUDGET}"
+
+
+def merge_prompt(group, _number):
+    return "|".join(map(str, group))
+
+
+@pytest.fixture
+def state(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return ProcessingState()
+
+
+def reduce(state, llm, items):
+    from document_processor import MerkleReduceTree  # Logs to processing.log in the working directory on import
+
+    return asyncio.run(MerkleReduceTree("articles", merge_prompt, state, llm).reduce(items))
+
+
+def test_merkle_tree_only_merges_the_path_of_a_new_or_changed_article(state):
+    items = {f"a{index:03d}": (f"a{index:03d}", f"text {index}") for index in range(150)}
+    llm = CountingLLM()
+    root = reduce(state, llm, items)
+    full_build = llm.calls
+    assert root and full_build > 15
+
+    llm.calls = 0
+    assert reduce(state, llm, items) == root
+    assert llm.calls == 0
+
+    items["a075b"] = ("a075b", "new article")
+    added_root = reduce(state, llm, items)
+    assert added_root != root
+    assert 1 <= llm.calls <= 4
+
+    llm.calls = 0
+    items["a010"] = ("a010", "revised text")
+    assert reduce(state, llm, items) != added_root
+    assert 1 <= llm.calls <= 4
+    assert len(state.data["group_outputs"]) < full_build + 4  # Replaced nodes are pruned
+
+
+def test_parallel_chunk_map_matches_the_sequential_path(tmp_path, monkeypatch):
+    from document_processor import process_article
+
+    chunks = [f"Chunk {index} text." for index in range(35)]
+    results = []
+    for sequential in (True, False):
+        directory = tmp_path / ("sequential" if sequential else "parallel")
+        directory.mkdir()
+        monkeypatch.chdir(directory)
+        state = ProcessingState()
+        asyncio.run(process_article("a1", chunks, "Question?", state, content_hash="v1", llm=JitteredLLM(sequential=sequential)))
+        results.append((state.data["article_outputs"], state.data["group_outputs"]))
+
+    assert results[0][0]["a1"]
+    assert results[0] == results[1]
+
+
+def build_tree(state, llm, count, *, finish=True):
+    from document_processor import ReduceTree
+
+    async def run():
+        tree = ReduceTree(SCOPE, merge_prompt, state, llm)
+        for index in range(count):
+            tree.add(f"a1#{index}", f"output {index}")
+        if finish:
+            return await tree.finish()
+        await asyncio.gather(*tree.tasks[0])
+        state.save()
+        return None
+
+    return asyncio.run(run())
+
+
+def test_reduce_tree_groups_items_in_order(state):
+    llm = CountingLLM()
+    root = build_tree(state, llm, 25)
+
+    nodes = state.data["group_outputs"]
+    assert [node["members"] for key, node in nodes.items() if key.startswith(f"{SCOPE}/L0/")] == [
+        [f"a1#{index}" for index in range(start, min(start + 10, 25))] for start in (0, 10, 20)
+    ]
+    assert nodes[f"{SCOPE}/L1/G0"]["members"] == [f"{SCOPE}/L0/G0", f"{SCOPE}/L0/G1", f"{SCOPE}/L0/G2"]
+    assert root == nodes[f"{SCOPE}/L1/G0"]["output"]
+    assert llm.calls == 4
+
+
+def test_reduce_tree_resumes_from_persisted_nodes(state, tmp_path, monkeypatch):
+    build_tree(state, CountingLLM(), 20, finish=False)
+    assert sorted(ProcessingState().data["group_outputs"]) == [f"{SCOPE}/L0/G0", f"{SCOPE}/L0/G1"]
+
+    llm = CountingLLM()
+    resumed_root = build_tree(ProcessingState(), llm, 25)
+    assert llm.calls == 2
+
+    (tmp_path / "fresh").mkdir()
+    monkeypatch.chdir(tmp_path / "fresh")
+    assert build_tree(ProcessingState(), CountingLLM(), 25) == resumed_root
+
+
+def test_process_article_maps_only_chunks_not_yet_merged(state):
+    from document_processor import process_article
+
+    chunks = [f"Chunk {index} text." for index in range(15)]
+    build_tree(state, CountingLLM(), 10, finish=False)
+
+    llm = RecordingLLM()
+    asyncio.run(process_article("a1", chunks, "Question?", state, content_hash="v1", llm=llm, token_budget=TOKEN_BUDGET))
+    mapped = [chunk for chunk in chunks if any(chunk in prompt for prompt in llm.prompts)]
+    assert mapped == chunks[10:]
+    assert state.data["article_outputs"]["a1"]
+    assert not state.data["group_outputs"]
+
+
+def test_chunks_split_with_another_budget_are_all_mapped_again(state):
+    from document_processor import process_article
+
+    chunks = [f"Chunk {index} text." for index in range(15)]
+    build_tree(state, CountingLLM(), 10, finish=False)
+
+    llm = RecordingLLM()
+    asyncio.run(process_article("a1", chunks, "Question?", state, content_hash="v1", llm=llm, token_budget=2 * TOKEN_BUDGET))
+    assert [chunk for chunk in chunks if any(chunk in prompt for prompt in llm.prompts)] == chunks
+    assert not state.data["group_outputs"]
+
+
+class GappyLLM(RecordingLLM):
+    def __init__(self, gaps):
+        super().__init__()
+        self.gaps = gaps
+
+    async def get_llm_response(self, prompt):
+        response = await super().get_llm_response(prompt)
+        return "" if any(gap in prompt for gap in self.gaps) else response
+
+
+def test_partial_map_is_not_recorded_and_completes_on_rerun(state):
+    from document_processor import process_article
+
+    chunks = [f"Chunk {index} text." for index in range(15)]
+    asyncio.run(process_article("a1", chunks, "Question?", state, content_hash="v1", llm=GappyLLM({chunks[3]})))
+    assert "a1" not in state.data["article_outputs"]
+    assert state.data["group_outputs"]
+
+    llm = RecordingLLM()
+    asyncio.run(process_article("a1", chunks, "Question?", ProcessingState(), content_hash="v1", llm=llm))
+    mapped = [chunk for chunk in chunks if any(chunk in prompt for prompt in llm.prompts)]
+    assert mapped == [chunks[3], *chunks[11:]]
+    assert ProcessingState().data["article_outputs"]["a1"]
+
+
+def test_article_with_more_chunks_than_llm_slots_is_fully_mapped(state, monkeypatch):
+    from document_processor import process_article
+
+    mapped = set()
+
+    async def handler(request):
+        await asyncio.sleep(0.02)
+        content = json.loads(request.content)["messages"][-1]["content"]
+        mapped.update(index for index, chunk in enumerate(chunks) if chunk in content)
+        return httpx.Response(200, json={"choices": [{"message": {"content": f"Summary {len(mapped)}"}}]})
+
+    monkeypatch.setattr(LLMService, "cache", None)
+    chunks = [f"Chunk {index} text." for index in range(30)]
+    llm = AsyncLLMClient("http://llm/v1/chat/completions", concurrency=2, deadline=0.2)
+    llm._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    asyncio.run(process_article("a1", chunks, "Question?", state, content_hash="v1", llm=llm))
+
+    assert mapped == set(range(len(chunks)))
+    assert state.data["article_outputs"]["a1"]
+
+
+def write_pdf(path, text):
+    with fitz.open() as doc:
+        doc.new_page().insert_text((72, 72), text)
+        doc.save(path)
+
+
+def test_main_remaps_only_new_or_changed_articles(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    import document_processor
+    from prompt.llm_service import LLMService
+
+    llm = StubClient()
+    monkeypatch.setattr(document_processor, "AsyncLLMClient", lambda **_: llm)
+    monkeypatch.setattr(document_processor, "setup_signal_handler", lambda _state: None)
+    monkeypatch.setattr(LLMService, "cache", None)
+    (tmp_path / "research").mkdir()
+    for index in range(30):
+        write_pdf(tmp_path / "research" / f"2401.{index:05d}.pdf", f"Article {index} on lane keeping.")
+
+    def run():
+        llm.calls = 0
+        document_processor.main("Question?", extract_workers=1)
+        state = ProcessingState()
+        nodes = {key for key in state.data["group_outputs"] if key.startswith("articles/")}
+        return (tmp_path / "final_answer.md").read_text(), dict(state.data["article_outputs"]), nodes
+
+    answer, outputs, nodes = run()
+    assert len(outputs) == 30
+    assert llm.calls > 60
+
+    assert run() == (answer, outputs, nodes)
+    assert llm.calls == 0
+
+    write_pdf(tmp_path / "research" / "2401.00012.pdf", "Article 12, revised, on lane changes.")
+    changed_answer, changed_outputs, changed_nodes = run()
+    assert changed_answer != answer
+    assert {key for key in outputs if changed_outputs[key] != outputs[key]} == {"2401.00012"}
+    assert 3 <= llm.calls <= 6  # Map and merge of the article, and the article groups on its path
+    assert len(changed_nodes - nodes) == llm.calls - 2
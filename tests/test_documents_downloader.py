@@ -0,0 +1,187 @@
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import pytest
+
+import documents_downloader
+from DAO.document_links import DocumentLinks
+from DAO.research_state import ResearchState
+from documents_downloader import LLM_CALLS_PER_PAPER, CrawlBudget, CrawlEngine
+from prompt.llm_service import stop_at_verdict
+
+RELEVANT_ANSWER = '{"relevant": true, "summary": "A summary."}'
+
+
+def answer(structured):
+    return lambda _prompt, stop: "Yes." if stop is stop_at_verdict else structured
+
+
+class StageProbe:
+    def __init__(self):
+        self.active = {}
+        self.peak = {}
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def track(self, stage):
+        with self.lock:
+            self.active[stage] = self.active.get(stage, 0) + 1
+            self.peak[stage] = max(self.peak.get(stage, 0), self.active[stage])
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.active[stage] -= 1
+
+
+class StubDownloader:
+    def __init__(self, probe, failing):
+        self.probe = probe
+        self.failing = failing
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_):
+        pass
+
+    async def download(self, arxiv_id):
+        with self.probe.track("download"):
+            await asyncio.sleep(0.01)
+        return None if arxiv_id in self.failing else Path(f"{arxiv_id}.pdf")
+
+
+class StubLLM:
+    def __init__(self, probe):
+        self.probe = probe
+        self.respond = answer(RELEVANT_ANSWER)
+        self.delay = 0.01
+        self.calls = 0
+        self.cancelled = 0  # Calls cancelled while the engine was running
+        self.closed = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_):
+        self.closed = True
+
+    async def stream_llm_response(self, prompt, _temperature, *, max_tokens, stop=None):  # noqa: ARG002
+        self.calls += 1
+        with self.probe.track("llm"):
+            try:
+                await asyncio.sleep(self.delay if stop is None else 0.01)
+            except asyncio.CancelledError:
+                self.cancelled += not self.closed
+                raise
+        return self.respond(prompt, stop)
+
+
+@pytest.fixture
+def crawl(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    probe = StageProbe()
+    llm = StubLLM(probe)
+
+    def parse(result):
+        def stage(_pdf_path):
+            with probe.track("parse"):
+                time.sleep(0.01)
+            return result
+        return stage
+
+    monkeypatch.setattr(documents_downloader.PDFUtils, "read_abstract", parse("An abstract."))
+    monkeypatch.setattr(documents_downloader.PDFUtils, "read_and_clean_pdf", parse("Full text."))
+    probe.full_texts = 0
+
+    def read_full_text(pdf_path):
+        probe.full_texts += 1
+        return parse("Full text.")(pdf_path)
+
+    monkeypatch.setattr(documents_downloader.PDFUtils, "read_and_clean_pdf", read_full_text)
+    monkeypatch.setattr(documents_downloader.PDFUtils, "extract_links_from_pdf", parse({"arxiv": []}))
+    monkeypatch.setattr(documents_downloader, "AsyncLLMClient", lambda **_: llm)
+
+    def run(ids, *, failing=(), budget=None, limits=(2, 1, 2)):
+        monkeypatch.setattr(documents_downloader, "DownloadManager", lambda **_: StubDownloader(probe, failing))
+        state = ResearchState()
+        for arxiv_id in ids:
+            state.enqueue(arxiv_id)
+        links = DocumentLinks()
+        asyncio.run(CrawlEngine(state, links, *limits, budget=budget).run())
+        return state, links
+
+    run.probe = probe
+    run.llm = llm
+    return run
+
+
+def test_crawl_engine_respects_stage_limits_and_overlaps_stages(crawl):
+    ids = [f"2401.{index:05d}" for index in range(12)]
+    state, links = crawl(ids)
+
+    assert sorted(state.data["processed"]) == ids
+    assert sorted(links.links_data) == ids
+    assert crawl.probe.peak == {"download": 2, "parse": 1, "llm": 2}
+
+
+def test_crawl_engine_failing_paper_does_not_stall_the_others(crawl):
+    ids = [f"2401.{index:05d}" for index in range(8)]
+    state, links = crawl(ids, failing={ids[1]})
+
+    assert sorted(state.data["processed"]) == [arxiv_id for arxiv_id in ids if arxiv_id != ids[1]]
+    assert ids[1] not in links.links_data
+    assert not state.data["queue"]
+
+
+def test_crawl_budget_holds_when_structured_answers_are_malformed(crawl):
+    def respond(_prompt, stop):
+        if stop is stop_at_verdict:
+            return "Yes."
+        return "A summary." if stop is None else "Sure! Here is the JSON you asked for"
+
+    crawl.llm.respond = respond
+    ids = [f"2401.{index:05d}" for index in range(6)]
+    state, _ = crawl(ids, budget=CrawlBudget(max_llm_calls=8))
+
+    assert crawl.llm.calls <= 8
+    assert len(state.data["processed"]) == 2
+    assert crawl.llm.calls == 2 * LLM_CALLS_PER_PAPER
+
+
+def test_summary_in_flight_is_cancelled_when_link_extraction_fails(crawl, monkeypatch):
+    def extract_links(_pdf_path):
+        raise ValueError("broken PDF")
+
+    crawl.llm.respond = answer('{"relevant": true, "summary": ""}')
+    crawl.llm.delay = 10
+    monkeypatch.setattr(documents_downloader.PDFUtils, "extract_links_from_pdf", extract_links)
+    started = time.monotonic()
+    state, _ = crawl(["2401.00001"])
+
+    assert crawl.llm.cancelled == 1
+    assert time.monotonic() - started < 5
+    assert list(state.data["queue"]) == ["2401.00001"]
+
+
+def test_full_text_is_only_judged_for_papers_that_pass_on_their_abstract(crawl, monkeypatch):
+    def read_abstract(pdf_path):
+        return f"Abstract of {pdf_path.stem}."
+
+    def respond(prompt, stop):
+        if stop is stop_at_verdict:
+            return "Yes." if "2401.00000" in prompt else "No."
+        return RELEVANT_ANSWER
+
+    monkeypatch.setattr(documents_downloader.PDFUtils, "read_abstract", read_abstract)
+    crawl.llm.respond = respond
+    ids = [f"2401.{index:05d}" for index in range(4)]
+    state, links = crawl(ids)
+
+    assert sorted(state.data["processed"]) == ids
+    assert list(links.links_data) == ids[:1]
+    assert crawl.llm.calls == len(ids) + 1
+    assert crawl.probe.full_texts == 1
@@ -0,0 +1,81 @@
+import asyncio
+import threading
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+fitz = pytest.importorskip("fitz")
+
+from utils.download_manager import DownloadManager  # noqa: E402
+
+
+def make_pdf() -> bytes:
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), "Lane keeping " * 200)
+    return doc.tobytes()
+
+
+PDF = make_pdf()
+
+
+class StandIn(BaseHTTPRequestHandler):
+    ranges: list[str] = []
+
+    def log_message(self, *_: object) -> None:
+        pass
+
+    def do_GET(self) -> None:  # noqa: N802
+        if "html" in self.path:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.end_headers()
+            self.wfile.write(b"<html>PDF unavailable</html>")
+            return
+
+        start = 0
+        if range_header := self.headers.get("Range"):
+            StandIn.ranges.append(range_header)
+            start = int(range_header.removeprefix("bytes=").rstrip("-"))
+        self.send_response(206 if start else 200)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Content-Length", str(len(PDF) - start))
+        self.end_headers()
+        self.wfile.write(PDF[start:])
+
+
+@pytest.fixture
+def url_template() -> Iterator[str]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/pdf/{{arxiv_id}}.pdf"
+    server.shutdown()
+
+
+def download(tmp_path: Path, url_template: str, *arxiv_ids: str) -> list[Path | None]:
+    async def run() -> list[Path | None]:
+        async with DownloadManager(tmp_path, url_template, host_interval=0) as manager:
+            return list(await asyncio.gather(*(manager.download(arxiv_id) for arxiv_id in arxiv_ids)))
+
+    return asyncio.run(run())
+
+
+def test_resumes_partial_download(tmp_path: Path, url_template: str):
+    (tmp_path / "2401.00001.pdf.part").write_bytes(PDF[:100])
+    (tmp_path / "2401.00002.pdf").write_bytes(PDF[:100])
+
+    first, second = download(tmp_path, url_template, "2401.00001", "2401.00002")
+
+    assert first.read_bytes() == PDF
+    assert second.read_bytes() == PDF
+    assert "bytes=100-" in StandIn.ranges
+    assert not list(tmp_path.glob("*.part"))
+
+
+def test_bad_item_does_not_stop_others(tmp_path: Path, url_template: str):
+    bad, good = download(tmp_path, url_template, "html.00001", "2401.00003")
+
+    assert bad is None
+    assert good.read_bytes() == PDF
+    assert not (tmp_path / "html.00001.pdf").exists()
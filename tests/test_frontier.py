@@ -0,0 +1,80 @@
+import json
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+from DAO.journal_store import JournalStore
+from DAO.research_state import ResearchState
+from utils.frontier import BloomFilter, CrawlFrontier, PriorityFrontier
+
+
+def test_frontier_deduplicates_across_states():
+    frontier = CrawlFrontier(["a", "b", "a"], processed=["c"])
+    assert len(frontier) == 2
+    assert not frontier.push("c")
+
+    assert frontier.pop() == "a"
+    assert not frontier.push("a")
+    frontier.complete("a")
+    assert not frontier.push("a")
+
+    assert frontier.pop() == "b"
+    frontier.release("b")
+    assert frontier.pop() == "b"
+    frontier.drop("b")
+    assert frontier.push("b")
+
+
+def test_priority_frontier_serves_most_cited_first():
+    frontier = PriorityFrontier(["a", "b", "c", "d"], scores=Counter({"c": 2}))
+    frontier.bump("b")
+    frontier.bump("d")
+    frontier.bump("d")
+    frontier.bump("d")
+
+    assert frontier.pop() == "d"
+    frontier.release("d")
+    assert frontier.pop() == "d"
+    assert [frontier.pop() for _ in range(3)] == ["c", "b", "a"]
+    assert frontier.pop() is None
+
+
+def test_bloom_filter_roundtrip():
+    bloom = BloomFilter(1000)
+    for index in range(500):
+        bloom.add(f"2401.{index:05d}")
+
+    restored = BloomFilter.from_dict(bloom.to_dict())
+    assert all(f"2401.{index:05d}" in restored for index in range(500))
+    assert sum(f"2402.{index:05d}" in restored for index in range(1000)) < 20
+
+
+def test_set_fields_persist_through_journal(tmp_path: Path):
+    store = JournalStore(tmp_path / "state.json", lambda: {"queue": []}, set_fields=("queue",))
+    store.load()
+    store.add("queue", "a")
+    store.add("queue", "b")
+    store.add("queue", "a")
+    store.discard("queue", "a")
+    store.commit()
+
+    reloaded = JournalStore(tmp_path / "state.json", lambda: {"queue": []}, set_fields=("queue",))
+    reloaded.load()
+    assert list(reloaded.data["queue"]) == ["b"]
+    assert reloaded.export_json().read_text() == '{\n  "queue": [\n    "b"\n  ]\n}'
+
+
+@pytest.mark.parametrize("seen_capacity", [None, 1000])
+def test_legacy_state_drops_processed_ids_from_the_queue(tmp_path: Path, monkeypatch, seen_capacity):
+    monkeypatch.chdir(tmp_path)
+    legacy = {"queue": ["a", "b", "c"], "processed": ["b"], "main_summaries": [], "stages": {}}
+    (tmp_path / "research_state.json").write_text(json.dumps(legacy))
+
+    state = ResearchState(seen_capacity=seen_capacity)
+    state.load()
+    assert [state.next_id(), state.next_id(), state.next_id()] == ["a", "c", None]
+
+    reloaded = ResearchState(seen_capacity=seen_capacity)
+    reloaded.load()
+    assert sorted(reloaded.data["queue"]) == ["a", "c"]
@@ -0,0 +1,40 @@
+import numpy as np
+
+from utils.graph_analytics import connected_components, force_layout, in_degree, pagerank
+
+SOURCES = np.array([0, 0, 1, 2, 4])
+TARGETS = np.array([1, 2, 2, 0, 5])
+
+
+def test_pagerank_matches_dense_power_iteration():
+    node_count = 7
+    transition = np.zeros((node_count, node_count))
+    transition[TARGETS, SOURCES] = 1
+    out_degree = transition.sum(axis=0)
+    transition = np.where(out_degree > 0, transition / np.maximum(out_degree, 1), 1 / node_count)
+    expected = np.full(node_count, 1 / node_count)
+    for _ in range(300):
+        expected = 0.85 * transition @ expected + 0.15 / node_count
+
+    np.testing.assert_allclose(pagerank(node_count, SOURCES, TARGETS), expected, atol=1e-9)
+    assert in_degree(node_count, TARGETS).tolist() == [1, 1, 2, 0, 0, 1, 0]
+
+
+def test_components_numbered_by_size():
+    assert connected_components(7, SOURCES, TARGETS).tolist() == [0, 0, 0, 2, 1, 1, 3]
+
+
+def test_layout_is_reproducible_and_pulls_neighbors_together():
+    rng = np.random.default_rng(3)
+    clusters = [rng.integers(0, 50, (200, 2)), rng.integers(50, 100, (200, 2))]
+    sources, targets = np.concatenate(clusters).T
+
+    positions = force_layout(100, sources, targets, iterations=100)
+
+    assert positions.shape == (100, 2)
+    assert np.abs(positions).max() <= 1
+    np.testing.assert_array_equal(positions, force_layout(100, sources, targets, iterations=100))
+    centers = positions[:50].mean(axis=0), positions[50:].mean(axis=0)
+    spread = max(np.linalg.norm(positions[:50] - centers[0], axis=1).mean(),
+                 np.linalg.norm(positions[50:] - centers[1], axis=1).mean())
+    assert np.linalg.norm(centers[0] - centers[1]) > spread
@@ -0,0 +1,42 @@
+import json
+from pathlib import Path
+from types import SimpleNamespace
+
+import graph_export
+from graph_export import build_graph, export_graph
+
+
+def summary(title: str) -> str:
+    return f'**Title:** "{title}"\n\n**Scope:** ...'
+
+
+LINKS_DATA = {
+    "a": {"links": {"arxiv": ["b", "c", "a", "x"]}, "summary": summary("Paper A")},
+    "b": {"links": {"arxiv": ["c"]}, "summary": summary("Paper B")},
+    "c": {"links": {}, "summary": "No heading"},
+    "d": {"links": {"arxiv": ["a"]}, "summary": summary("Paper D")},
+}
+
+
+def test_nodes_and_edges_sorted_by_degree():
+    graph = build_graph(LINKS_DATA)
+
+    assert graph.ids == ["a", "b", "c", "d"]
+    assert graph.degrees == [3, 2, 2, 1]
+    assert graph.titles == ["Paper A", "Paper B", "Untitled Article", "Paper D"]
+    assert graph.edges == [(0, 1), (0, 2), (1, 2), (3, 0)]
+
+
+def test_export_writes_prefix_cutoffs_and_shards(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(graph_export, "SHARD_SIZE", 3)
+    (tmp_path / "summaries").mkdir()
+    (tmp_path / "summaries" / "7.json").write_text("[]")
+
+    graph_file = export_graph(SimpleNamespace(links_data=LINKS_DATA), tmp_path)
+    payload = json.loads(graph_file.read_text())
+
+    assert payload["edges"] == [0, 1, 0, 2, 1, 2, 3, 0]
+    assert payload["node_cutoffs"][:4] == [4, 4, 3, 1]
+    assert payload["edge_cutoffs"][:4] == [4, 4, 3, 0]
+    assert sorted(path.name for path in (tmp_path / "summaries").iterdir()) == ["0.json", "1.json"]
+    assert json.loads((tmp_path / "summaries" / "1.json").read_text()) == [summary("Paper D")]
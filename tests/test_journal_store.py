@@ -0,0 +1,58 @@
+import json
+from pathlib import Path
+
+from DAO.journal_store import JournalStore
+
+
+def make_store(tmp_path: Path) -> JournalStore:
+    store = JournalStore(tmp_path / "state.json", lambda: {"queue": [], "outputs": {}})
+    store.load()
+    return store
+
+
+def test_updates_survive_reload_without_snapshot_rewrite(tmp_path: Path):
+    store = make_store(tmp_path)
+    store.append("queue", "a")
+    store.append("queue", "b")
+    store.remove("queue", "a")
+    store.set("outputs", "a", "text")
+    store.commit()
+
+    assert not store.snapshot_file.exists()
+    reloaded = make_store(tmp_path)
+    assert reloaded.data == {"queue": ["b"], "outputs": {"a": "text"}}
+
+
+def test_export_writes_plain_json(tmp_path: Path):
+    store = make_store(tmp_path)
+    store.set("outputs", "a", "text")
+    path = store.export_json()
+
+    assert json.loads(path.read_text()) == {"queue": [], "outputs": {"a": "text"}}
+    assert make_store(tmp_path).data == {"queue": [], "outputs": {"a": "text"}}
+
+
+def test_journal_folded_into_snapshot_is_not_replayed(tmp_path: Path):
+    store = make_store(tmp_path)
+    store.append("queue", "a")
+    store.commit()
+    journal = store.journal_file.read_text()
+
+    store.compact()
+    store.journal_file.write_text(journal)  # crash before the journal was reset
+
+    assert make_store(tmp_path).data["queue"] == ["a"]
+
+
+def test_torn_record_is_ignored(tmp_path: Path):
+    store = make_store(tmp_path)
+    store.append("queue", "a")
+    store.commit()
+    store.close()
+    with store.journal_file.open("a") as f:
+        f.write('["append", "queue", "b')
+
+    reloaded = make_store(tmp_path)
+    reloaded.append("queue", "c")
+    reloaded.commit()
+    assert make_store(tmp_path).data["queue"] == ["a", "c"]
@@ -0,0 +1,26 @@
+from utils.link_extractor import extract_links
+
+
+def test_extracts_links_page_by_page():
+    pages = [
+        "Code at https://github.\ncom/org/repo. See arXiv:2301.00001v2 and\n(https://example.com/x).\nNext",
+        "DOI 10.1109/CVPR.2016.90. Data: http://arxiv.org/abs/\n1706.03762, PMID: 12345",
+    ]
+
+    links = extract_links(pages, ["https://doi.org/10.1000/XYZ", "mailto:someone@example.com"])
+
+    assert links == {
+        "arxiv": ["2301.00001", "1706.03762"],
+        "doi": ["10.1109/cvpr.2016.90", "10.1000/xyz"],
+        "url": [
+            "https://github.com/org/repo",
+            "https://example.com/x",
+            "http://arxiv.org/abs/1706.03762",
+            "https://doi.org/10.1000/xyz",
+        ],
+        "pubmed": ["12345"],
+    }
+
+
+def test_no_links():
+    assert extract_links(["Plain text without references."]) == {}
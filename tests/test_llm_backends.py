@@ -0,0 +1,35 @@
+import time
+
+from prompt.llm_backends import BackendPool
+
+
+def test_least_outstanding_routing_and_caps():
+    pool = BackendPool.from_spec("http://a/v1/chat/completions|model-a|2, http://b/v1/chat/completions", "default", 1)
+    a, b = pool.backends
+    assert (a.model, a.concurrency, b.model, b.concurrency) == ("model-a", 2, "default", 1)
+    assert b.health_url == "http://b/v1/models"
+
+    taken = [pool.try_acquire() for _ in range(4)]
+    assert taken[:3].count(a) == 2 and taken[:3].count(b) == 1
+    assert taken[3] is None
+    pool.release(b, time.monotonic())
+    assert pool.try_acquire() is b
+
+
+def test_eject_and_recover(monkeypatch):
+    pool = BackendPool.from_spec("http://a/v1/chat/completions,http://b/v1/chat/completions", "m", 4)
+    pool.eject_after, pool.check_interval = 2, 0.01
+    a, b = pool.backends
+    up = {"http://b/v1/models": False}
+    monkeypatch.setattr(BackendPool, "probe", staticmethod(lambda _client, backend: up.get(backend.health_url, True)))
+
+    for _ in range(2):
+        assert (pool.try_acquire(), pool.try_acquire()) == (a, b)
+        pool.release(a, time.monotonic())
+        pool.release(b, time.monotonic(), failed=True)
+    assert not b.healthy
+    assert [pool.try_acquire() for _ in range(3)] == [a, a, None]
+
+    up["http://b/v1/models"] = True
+    assert pool.acquire(timeout=2) is b
+    assert b.healthy and b.failures == 0
@@ -0,0 +1,57 @@
+from pathlib import Path
+
+from prompt.llm_cache import CacheMode, LLMCache
+
+
+def make_payload(prompt: str) -> dict:
+    return {
+        "model": "test-model",
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": 0.8,
+        "max_tokens": 100,
+    }
+
+
+def test_key_depends_on_request_fields():
+    key = LLMCache.make_key(make_payload("a"))
+    assert key == LLMCache.make_key(make_payload("a"))
+    assert key != LLMCache.make_key(make_payload("b"))
+    assert key != LLMCache.make_key({**make_payload("a"), "temperature": 0.1})
+
+
+def test_hit_miss_stats(tmp_path: Path):
+    cache = LLMCache(tmp_path / "cache.sqlite")
+    key = LLMCache.make_key(make_payload("a"))
+
+    assert cache.get(key) is None
+    cache.put(key, "answer", latency=30.0)
+    assert cache.get("other-model", key) == "answer"
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["writes"]) == (1, 1, 1)
+    assert stats["saved_gpu_minutes"] == 0.5
+
+
+def test_lru_eviction(tmp_path: Path):
+    cache = LLMCache(tmp_path / "cache.sqlite", max_bytes=10)
+    cache.put("old", "12345", latency=1.0)
+    cache.put("recent", "12345", latency=1.0)
+    assert cache.get("old") == "12345"
+    cache.put("new", "12345", latency=1.0)
+
+    assert cache.get("recent") is None
+    assert cache.get("old") == "12345"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_read_only_and_bypass_modes(tmp_path: Path):
+    path = tmp_path / "cache.sqlite"
+    LLMCache(path).put("key", "answer", latency=1.0)
+
+    read_only = LLMCache(path, CacheMode.READ_ONLY)
+    read_only.put("other", "answer", latency=1.0)
+    assert read_only.get("key") == "answer"
+    assert read_only.get("other") is None
+
+    bypass = LLMCache(path, CacheMode.BYPASS)
+    assert bypass.get("key") is None
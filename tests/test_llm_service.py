@@ -0,0 +1,161 @@
+import asyncio
+import json
+import time
+
+import httpx
+
+from prompt import llm_service
+from prompt.llm_backends import BackendPool
+from prompt.llm_cache import CacheMode, LLMCache
+from prompt.llm_service import AsyncLLMClient, LLMService, _build_payload, _StreamedText, stop_at_verdict
+from prompt.prompt_service import SUMMARY_RELEVANCE_SCHEMA
+
+
+def test_structured_response_validation():
+    parse = LLMService.parse_structured_response
+
+    fenced = '```json\n{"relevant": true, "summary": "A study of lane keeping."}\n```'
+    assert parse(fenced, SUMMARY_RELEVANCE_SCHEMA) == {"relevant": True, "summary": "A study of lane keeping."}
+    assert parse('{"relevant": "yes", "summary": ""}', SUMMARY_RELEVANCE_SCHEMA) is None
+    assert parse('{"relevant": false}', SUMMARY_RELEVANCE_SCHEMA) is None
+    assert parse('{"relevant": false, "summary": "', SUMMARY_RELEVANCE_SCHEMA) is None
+    assert parse("Yes", SUMMARY_RELEVANCE_SCHEMA) is None
+
+    multiline = '{"relevant": true, "summary": "First paragraph.\n\nSecond paragraph."}'
+    assert parse(multiline, SUMMARY_RELEVANCE_SCHEMA)["summary"] == "First paragraph.\n\nSecond paragraph."
+
+
+def test_verdict_parsing_and_stream_stop():
+    assert LLMService.parse_verdict("**No**.") is False
+    assert LLMService.parse_verdict("Yesterday's results") is None
+    assert LLMService.parse_verdict("Ye", complete=False) is None
+
+    stream = _StreamedText(_build_payload("Is it relevant?", 0.0), stop_at_verdict, None)
+    events = [
+        'data: {"choices": [{"delta": {"content": "Ye"}}]}',
+        ": keep-alive",
+        'data: {"choices": [{"delta": {"content": "s, it"}}]}',
+    ]
+    assert [stream.feed(line) for line in events] == [False, False, True]
+    assert stream.finish() == "Yes, it"
+
+
+def mock_client(monkeypatch, handler, **kwargs):
+    monkeypatch.setattr(LLMService, "cache", None)
+    monkeypatch.setattr(llm_service, "_backoff_delay", lambda _attempt: 0.05)
+    client = AsyncLLMClient("http://llm/v1/chat/completions", **kwargs)
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+
+def completion(text):
+    return httpx.Response(200, json={"choices": [{"message": {"content": text}}]})
+
+
+def test_async_client_retries_overload_and_server_errors(monkeypatch):
+    statuses = [429, 503]
+
+    def handler(_request):
+        return httpx.Response(statuses.pop(0)) if statuses else completion("Yes")
+
+    client = mock_client(monkeypatch, handler)
+    assert asyncio.run(client.get_llm_response("Is it relevant?")) == "Yes"
+    assert not statuses
+
+    statuses = [400]
+    assert asyncio.run(client.get_llm_response("Is it relevant?")) == ""
+    assert not statuses
+
+
+def test_async_client_gives_up_at_the_deadline(monkeypatch):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503)
+
+    client = mock_client(monkeypatch, handler, deadline=0.12, max_retries=10)
+    client.backends.eject_after = 100
+    started = time.monotonic()
+    assert asyncio.run(client.get_llm_response("Is it relevant?")) == ""
+    assert time.monotonic() - started < 0.5
+    assert 2 <= len(calls) <= 4
+
+
+def test_async_stream_retries_only_before_the_first_text(monkeypatch):
+    responses = []
+
+    async def broken_stream():
+        yield b'data: {"choices": [{"delta": {"content": "Ye"}}]}\n\n'
+        raise httpx.ReadError("connection reset")
+
+    def handler(_request):
+        return responses.pop(0)
+
+    client = mock_client(monkeypatch, handler)
+    responses = [
+        httpx.Response(502),
+        httpx.Response(200, content=b'data: {"choices": [{"delta": {"content": "Yes"}}]}\n\ndata: [DONE]\n\n'),
+    ]
+    assert asyncio.run(client.stream_llm_response("Is it relevant?")) == "Yes"
+
+    received = []
+    responses = [httpx.Response(200, content=broken_stream()), httpx.Response(500)]
+    assert asyncio.run(client.stream_llm_response("Is it relevant?", on_text=received.append)) == ""
+    assert received == ["Ye"]
+    assert len(responses) == 1
+
+
+def test_stream_cut_short_by_a_stop_condition_is_not_cached(tmp_path, monkeypatch):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, content=(
+            b'data: {"choices": [{"delta": {"content": "Yes"}}]}\n\ndata: {"choices": [{"delta": {"content": ","}}]}\n\n'
+            b'data: {"choices": [{"delta": {"content": " it is relevant."}}]}\n\ndata: [DONE]\n\n'
+        ))
+
+    client = mock_client(monkeypatch, handler)
+    monkeypatch.setattr(LLMService, "cache", LLMCache(tmp_path / "llm_cache.sqlite", CacheMode.WRITE_THROUGH))
+    assert asyncio.run(client.stream_llm_response("Is it relevant?", stop=stop_at_verdict)) == "Yes,"
+    assert asyncio.run(client.stream_llm_response("Is it relevant?")) == "Yes, it is relevant."
+    assert asyncio.run(client.stream_llm_response("Is it relevant?", stop=stop_at_verdict)) == "Yes, it is relevant."
+    assert len(requests) == 2
+    LLMService.cache.close()
+
+
+def test_cache_keys_responses_on_the_model_of_the_serving_backend(tmp_path, monkeypatch):
+    requests = []
+
+    def handler(request):
+        model = json.loads(request.content)["model"]
+        requests.append(model)
+        return completion(f"Answer of {model}")
+
+    def client_of(spec):
+        monkeypatch.setattr(LLMService, "_backends", BackendPool.from_spec(spec, "default"))
+        client = AsyncLLMClient()
+        client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return client
+
+    monkeypatch.setattr(LLMService, "cache", LLMCache(tmp_path / "llm_cache.sqlite", CacheMode.WRITE_THROUGH))
+    mixed = client_of("http://a/v1/chat/completions|model-a|1,http://b/v1/chat/completions|model-b|1")
+    assert asyncio.run(mixed.get_llm_response("Summarize.")) == "Answer of model-a"
+
+    only_b = client_of("http://b/v1/chat/completions|model-b|1")
+    assert asyncio.run(only_b.get_llm_response("Summarize.")) == "Answer of model-b"
+    assert asyncio.run(only_b.get_llm_response("Summarize.")) == "Answer of model-b"
+    assert asyncio.run(mixed.get_llm_response("Summarize.")) == "Answer of model-a"
+    assert requests == ["model-a", "model-b"]
+    LLMService.cache.close()
+
+
+def test_queued_requests_do_not_spend_their_deadline_waiting(monkeypatch):
+    async def handler(_request):
+        await asyncio.sleep(0.05)
+        return completion("ok")
+
+    client = mock_client(monkeypatch, handler, concurrency=1, deadline=0.2)
+    prompts = [f"Prompt {index}" for index in range(10)]
+    assert asyncio.run(client.get_llm_responses(prompts)) == ["ok"] * 10
@@ -0,0 +1,67 @@
+import json
+from pathlib import Path
+
+from utils.metrics import MetricsRegistry, stage_load
+
+
+def test_stage_load_from_intervals():
+    load = stage_load([(0.0, 4.0), (2.0, 6.0), (8.0, 9.0)], started_at=0.0, ended_at=10.0)
+    assert load.count == 3
+    assert load.busy_ratio == 0.7
+    assert load.mean_in_flight == 0.9
+    assert load.peak_in_flight == 2
+
+
+def test_bottleneck_uses_declared_limits():
+    registry = MetricsRegistry()
+    registry.started_at = 0.0
+    registry.add_interval("llm", 0.0, 10.0)
+    for _ in range(4):
+        registry.add_interval("download", 0.0, 10.0)
+    registry.set("stage_limit", 1, stage="llm")
+    registry.set("stage_limit", 8, stage="download")
+
+    loads = registry.stage_loads(ended_at=10.0)
+    assert registry.bottleneck(loads) == ("llm", 1.0)
+    assert "Verdict: GPU-bound" in registry.summary()
+
+
+def test_drain_and_merge_across_registries():
+    worker = MetricsRegistry()
+    worker.inc("pdf_pages_total", 12)
+    worker.observe("pdf_parse_seconds_per_page", 0.5)
+    with worker.stage("parse"):
+        pass
+
+    parent = MetricsRegistry()
+    parent.inc("pdf_pages_total", 3)
+    parent.merge(worker.drain())
+
+    assert parent.counter("pdf_pages_total") == 15
+    assert parent.distribution("pdf_parse_seconds_per_page").count == 1
+    assert parent.stage_loads()["parse"].count == 1
+    assert worker.counter("pdf_pages_total") == 0
+
+
+def test_export_formats(tmp_path: Path):
+    registry = MetricsRegistry()
+    registry.inc("download_bytes_total", 2048)
+    registry.adjust("queue_depth", 3, queue="llm")
+    registry.adjust("queue_depth", -2, queue="llm")
+    for latency in (1.0, 2.0, 3.0):
+        registry.observe("llm_request_seconds", latency)
+
+    text = registry.export(tmp_path / "metrics.prom").read_text()
+    assert "# TYPE download_bytes_total counter\ndownload_bytes_total 2048\n" in text
+    assert 'queue_depth{queue="llm"} 1\n' in text
+    assert 'queue_depth_peak{queue="llm"} 3\n' in text
+    assert 'llm_request_seconds{quantile="0.5"} 2\n' in text
+    assert "llm_request_seconds_count 3\n" in text
+
+    jsonl_path = tmp_path / "metrics.jsonl"
+    registry.export(jsonl_path)
+    registry.export(jsonl_path)
+    records = [json.loads(line) for line in jsonl_path.read_text().splitlines()]
+    latency = [record for record in records if record["metric"] == "llm_request_seconds"]
+    assert len(latency) == 2
+    assert (latency[0]["count"], latency[0]["sum"], latency[0]["max"]) == (3, 6.0, 3.0)
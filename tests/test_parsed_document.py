@@ -0,0 +1,59 @@
+from pathlib import Path
+
+import pytest
+
+fitz = pytest.importorskip("fitz")
+
+from DAO.corpus_store import CorpusStore  # noqa: E402
+from utils.parsed_document import ParsedDocument  # noqa: E402
+
+
+@pytest.fixture
+def pdf_path(tmp_path: Path) -> Path:
+    path = tmp_path / "2401.00001.pdf"
+    doc = fitz.open()
+    for number in range(1, 4):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Page {number} text\nsee arXiv:2301.0000{number}")
+    page.insert_link({"kind": fitz.LINK_URI, "from": fitz.Rect(72, 100, 200, 120), "uri": "https://github.com/a/b"})
+    doc.save(path)
+    return path
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> CorpusStore:
+    return CorpusStore(tmp_path / "corpus.sqlite")
+
+
+def test_views_share_one_parse(pdf_path: Path, store: CorpusStore):
+    document = ParsedDocument.load(pdf_path, store=store)
+
+    assert document.page_count == 3
+    assert "Page 2 text" in document.page(1)
+    assert document.summary_text(1).startswith("Page 1 text see")
+    assert document.chunks(token_budget=15)[1].startswith("PAGE 2:\n")
+    assert document.links() == {
+        "arxiv": ["2301.00001", "2301.00002", "2301.00003"],
+        "url": ["https://github.com/a/b"],
+    }
+
+
+def test_store_skips_pymupdf(pdf_path: Path, store: CorpusStore, monkeypatch: pytest.MonkeyPatch):
+    first = ParsedDocument.load(pdf_path, store=store)
+    ParsedDocument._memo.clear()
+
+    def fail(*_):
+        raise AssertionError("PDF parsed again")
+
+    monkeypatch.setattr(fitz, "open", fail)
+    second = ParsedDocument.load(pdf_path, store=store)
+
+    assert list(second.pages()) == list(first.pages())
+
+
+def test_first_page_without_full_parse(pdf_path: Path, store: CorpusStore):
+    assert "Page 1 text" in ParsedDocument.first_page(pdf_path, store=store)
+    assert store.document("2401.00001") is None
+
+    ParsedDocument.load(pdf_path, store=store)
+    assert "Page 1 text" in ParsedDocument.first_page(pdf_path, store=store)
@@ -0,0 +1,33 @@
+import random
+from pathlib import Path
+
+from utils.relevance_filter import MIN_CLASS_SIZE, RelevanceFilter
+
+COMMON = "the of and we in model results method data propose show experiments".split()
+RELEVANT = "autonomous driving vehicle lidar trajectory planning pedestrian lane".split()
+IRRELEVANT = "protein molecule galaxy stellar quantum spin genome market".split()
+
+
+def make_text(rng: random.Random, *, relevant: bool) -> str:
+    topic = RELEVANT if relevant else IRRELEVANT
+    return " ".join(rng.choice(COMMON) if rng.random() < 0.8 else rng.choice(topic) for _ in range(500))
+
+
+def test_filter_defers_until_trained_then_decides(tmp_path: Path):
+    rng = random.Random(0)
+    prefilter = RelevanceFilter(tmp_path / "filter.npz")
+    assert prefilter.decide("x", make_text(rng, relevant=True)) is None
+
+    for index in range(MIN_CLASS_SIZE):
+        prefilter.record(f"p{index}", make_text(rng, relevant=True), relevant=True)
+        prefilter.record(f"n{index}", make_text(rng, relevant=False), relevant=False)
+
+    assert prefilter.trained
+    assert prefilter.probability(make_text(rng, relevant=True)) > 0.9
+    assert prefilter.probability(make_text(rng, relevant=False)) < 0.1
+
+    reloaded = RelevanceFilter(tmp_path / "filter.npz")
+    reloaded.load()
+    assert reloaded.stats()["decisions"] == 2 * MIN_CLASS_SIZE
+    text = make_text(rng, relevant=False)
+    assert reloaded.probability(text) == prefilter.probability(text)
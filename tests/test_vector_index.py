@@ -0,0 +1,27 @@
+from pathlib import Path
+
+import numpy as np
+
+from utils.vector_index import VectorIndex, chunks_hash
+
+
+def unit(*values: float) -> np.ndarray:
+    vector = np.array(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_top_k_search_and_replacement(tmp_path: Path):
+    index = VectorIndex(tmp_path)
+    index.add("a", chunks_hash(["x", "y"], "m"), np.stack([unit(1, 0, 0), unit(0, 1, 0)]))
+    index.add("b", chunks_hash(["z"], "m"), np.stack([unit(1, 1, 0)]))
+
+    assert [(hit.article_id, hit.chunk) for hit in index.search(unit(1, 0.1, 0), 2)] == [("a", 0), ("b", 0)]
+    assert [hit.chunk for hit in index.search(unit(0, 1, 0), 1, article_id="a")] == [1]
+
+    index.add("a", chunks_hash(["w"], "m"), np.stack([unit(0, 0, 1)]))
+    reloaded = VectorIndex(tmp_path)
+    reloaded.load()
+
+    assert reloaded.has_article("a", chunks_hash(["w"], "m"))
+    assert not reloaded.has_article("a", chunks_hash(["x", "y"], "m"))
+    assert [(hit.article_id, hit.chunk) for hit in reloaded.search(unit(1, 0, 0), 5)] == [("b", 0), ("a", 0)]